@@ -10,15 +10,34 @@ Implements DATABASE.txt accounting system with:
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from .database import get_db_connection
+from core.bulk import require_ids, bulk_insert
+from core.result_cache import cached_result, invalidate_cache
+from core.row_mapping import RowShape, to_float
+from core.fanout import fetch_parallel
+from core.pagination import Keyset, approximate_count
 
 
 # ===== INVOICES =====
 
-def get_all_invoices(limit=100, offset=0, status_filter=None):
-    """Get invoices with customer and totals"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
-    
+_INVOICE_LIST_ROW = RowShape('InvoiceListRow', converters={
+    name: to_float for name in (
+        'subtotal', 'tax_amount', 'total_amount', 'discount_amount', 'paid_amount', 'remaining_amount'
+    )
+})
+_CASH_TRANSACTION_ROW = RowShape('CashTransactionRow', converters={'amount': to_float})
+
+
+_INVOICE_KEYSET = Keyset('invoices', ('i.invoice_date', 'DESC', 'invoice_date'), ('i.id', 'DESC', 'id'))
+_CASH_TRANSACTION_KEYSET = Keyset(
+    'cash_transactions', ('transaction_date', 'DESC', 'transaction_date'), ('id', 'DESC', 'id')
+)
+
+
+def get_all_invoices(limit=100, cursor_token=None, status_filter=None, with_total=False):
+    """
+    Invoices with customer and totals, newest first, keyset-paginated on (invoice_date, id).
+    Returns {'invoices', 'next_cursor', 'has_more', 'total'}; total (approximate) only with with_total.
+    """
     where_conditions = []
     params = []
     
@@ -26,10 +45,18 @@ def get_all_invoices(limit=100, offset=0, status_filter=None):
         where_conditions.append("i.invoice_status = ?")
         params.append(status_filter)
     
+    count_where = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+    count_params = list(params)
+    
+    seek, seek_params = _INVOICE_KEYSET.seek(cursor_token)
+    if seek:
+        where_conditions.append(seek)
+        params.extend(seek_params)
+    
     where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
     
     query = f"""
-    SELECT 
+    SELECT TOP (?)
         i.id, i.invoice_number, i.invoice_date, i.due_date,
         i.invoice_status, i.payment_status, i.currency_type,
         i.subtotal, i.tax_amount, i.total_amount, i.discount_amount,
@@ -48,36 +75,29 @@ def get_all_invoices(limit=100, offset=0, status_filter=None):
         GROUP BY invoice_id
     ) payments ON i.id = payments.invoice_id
     {where_clause}
-    ORDER BY i.invoice_date DESC, i.created_date DESC
-    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
+    ORDER BY {_INVOICE_KEYSET.order_by()}
     """
     
-    params.extend([offset, limit])
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    # One extra row tells whether another page exists
+    cursor.execute(query, [int(limit) + 1] + params)
+    rows = _INVOICE_LIST_ROW.dicts(cursor)
     connection.close()
     
-    invoices = []
-    for row in rows:
-        invoices.append({
-            'id': row[0],
-            'invoice_number': row[1],
-            'invoice_date': row[2],
-            'due_date': row[3],
-            'invoice_status': row[4],
-            'payment_status': row[5],
-            'currency_type': row[6],
-            'subtotal': float(row[7]) if row[7] else 0,
-            'tax_amount': float(row[8]) if row[8] else 0,
-            'total_amount': float(row[9]) if row[9] else 0,
-            'discount_amount': float(row[10]) if row[10] else 0,
-            'customer_name': row[11],
-            'customer_phone': row[12],
-            'paid_amount': float(row[13]) if row[13] else 0,
-            'remaining_amount': float(row[14]) if row[14] else 0
-        })
+    invoices, next_cursor, has_more = _INVOICE_KEYSET.page(rows, limit)
+    total = None
+    if with_total:
+        total = approximate_count(
+            'invoices', f"SELECT COUNT(*) FROM invoices i {count_where}", count_params, tags=('accounting',)
+        )
     
-    return invoices
+    return {
+        'invoices': invoices,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'total': total
+    }
 
 
 def get_invoice_by_id(invoice_id):
@@ -228,27 +248,29 @@ def create_invoice(customer_id, items, currency_type='TRY', due_days=30):
         
         invoice_id = cursor.fetchone()[0]
         
-        # Add invoice items
-        for item in items:
-            item_total = item['quantity'] * item['unit_price']
-            
-            cursor.execute("""
-                INSERT INTO invoice_items (
-                    invoice_id, item_type, item_description, quantity,
-                    unit_price, total_price, tax_rate, part_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                invoice_id,
-                item.get('item_type', 'PART'),
-                item['item_description'],
-                item['quantity'],
-                item['unit_price'],
-                item_total,
-                item.get('tax_rate', 18.0),
-                item.get('part_id')
-            ))
+        # Add invoice items (referenced parts validated in one query, rows written in one batch)
+        require_ids(cursor, 'parts', [item['part_id'] for item in items if item.get('part_id') is not None], label='Part')
+        bulk_insert(
+            cursor, 'invoice_items',
+            ('invoice_id', 'item_type', 'item_description', 'quantity',
+             'unit_price', 'total_price', 'tax_rate', 'part_id'),
+            [
+                (
+                    invoice_id,
+                    item.get('item_type', 'PART'),
+                    item['item_description'],
+                    item['quantity'],
+                    item['unit_price'],
+                    item['quantity'] * item['unit_price'],
+                    item.get('tax_rate', 18.0),
+                    item.get('part_id')
+                )
+                for item in items
+            ]
+        )
         
         connection.commit()
+        invalidate_cache('accounting')
         return invoice_id
         
     except Exception as e:
@@ -306,6 +328,7 @@ def create_cash_transaction(data):
             _update_invoice_paid_amount(cursor, data['reference_id'])
         
         connection.commit()
+        invalidate_cache('accounting')
         return transaction_id
         
     except Exception as e:
@@ -352,6 +375,7 @@ def update_cash_transaction(transaction_id, data):
             _update_invoice_paid_amount(cursor, data['reference_id'])
 
         connection.commit()
+        invalidate_cache('accounting')
         return True
     except Exception as e:
         connection.rollback()
@@ -379,6 +403,7 @@ def delete_cash_transaction(transaction_id):
             _update_invoice_paid_amount(cursor, ref_id)
 
         connection.commit()
+        invalidate_cache('accounting')
         return True
     except Exception as e:
         connection.rollback()
@@ -557,21 +582,32 @@ def generate_monthly_tax_report(year, month):
         connection.close()
 
 
+@cached_result('accounting')
 def get_accounting_summary():
     """Get accounting dashboard summary"""
     connection = get_db_connection()
     cursor = connection.cursor()
     
+    # Invoices and cash transactions are aggregated separately (each on its date index)
     query = """
     SELECT 
-        COUNT(DISTINCT i.id) as total_invoices,
-        COUNT(DISTINCT CASE WHEN ISNULL(i.paid_amount, 0) < ISNULL(i.total_amount, 0) THEN i.id END) as unpaid_invoices,
-        SUM(CASE WHEN ISNULL(i.paid_amount, 0) < ISNULL(i.total_amount, 0) THEN (ISNULL(i.total_amount, 0) - ISNULL(i.paid_amount, 0)) ELSE 0 END) as total_unpaid_amount,
-        SUM(CASE WHEN ct.transaction_type = 'INCOME' AND ct.transaction_date >= DATEADD(month, -1, GETDATE()) THEN ct.amount ELSE 0 END) as monthly_income,
-        SUM(CASE WHEN ct.transaction_type = 'EXPENSE' AND ct.transaction_date >= DATEADD(month, -1, GETDATE()) THEN ct.amount ELSE 0 END) as monthly_expenses
-    FROM invoices i
-    LEFT JOIN cash_transactions ct ON 1=1
-    WHERE i.invoice_date >= DATEADD(month, -12, GETDATE())
+        inv.total_invoices, inv.unpaid_invoices, inv.total_unpaid_amount,
+        cash.monthly_income, cash.monthly_expenses
+    FROM (
+        SELECT 
+            COUNT(*) as total_invoices,
+            COUNT(CASE WHEN ISNULL(paid_amount, 0) < ISNULL(total_amount, 0) THEN 1 END) as unpaid_invoices,
+            SUM(CASE WHEN ISNULL(paid_amount, 0) < ISNULL(total_amount, 0) THEN (ISNULL(total_amount, 0) - ISNULL(paid_amount, 0)) ELSE 0 END) as total_unpaid_amount
+        FROM invoices
+        WHERE invoice_date >= DATEADD(month, -12, GETDATE())
+    ) inv
+    CROSS JOIN (
+        SELECT 
+            SUM(CASE WHEN transaction_type = 'INCOME' THEN amount ELSE 0 END) as monthly_income,
+            SUM(CASE WHEN transaction_type = 'EXPENSE' THEN amount ELSE 0 END) as monthly_expenses
+        FROM cash_transactions
+        WHERE transaction_date >= DATEADD(month, -1, GETDATE())
+    ) cash
     """
     
     cursor.execute(query)
@@ -591,11 +627,11 @@ def get_accounting_summary():
 # ===== CARİ (CASH FLOW) HELPERS =====
 
 def get_cash_transactions_filtered(start_date=None, end_date=None, transaction_type=None,
-                                   payment_method=None, limit=200, offset=0):
-    """List cash transactions with optional filters"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
+                                   payment_method=None, limit=200, cursor_token=None, with_total=False):
+    """
+    List cash transactions with optional filters, newest first, keyset-paginated on (transaction_date, id).
+    Returns {'transactions', 'next_cursor', 'has_more', 'total'}; total (approximate) only with with_total.
+    """
     conditions = []
     params = []
 
@@ -612,44 +648,49 @@ def get_cash_transactions_filtered(start_date=None, end_date=None, transaction_t
         conditions.append("payment_method = ?")
         params.append(payment_method)
 
+    count_where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+    count_params = list(params)
+
+    seek, seek_params = _CASH_TRANSACTION_KEYSET.seek(cursor_token)
+    if seek:
+        conditions.append(seek)
+        params.extend(seek_params)
+
     where_clause = ("WHERE " + " AND ".join(conditions)) if conditions else ""
 
     query = f"""
-    SELECT 
+    SELECT TOP (?)
         id, transaction_date, transaction_type, amount,
         payment_method, description, reference_type, reference_id
     FROM cash_transactions
     {where_clause}
-    ORDER BY transaction_date DESC, id DESC
-    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
+    ORDER BY {_CASH_TRANSACTION_KEYSET.order_by()}
     """
 
-    params.extend([offset, limit])
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    cursor.execute(query, [int(limit) + 1] + params)
+    rows = _CASH_TRANSACTION_ROW.dicts(cursor)
     connection.close()
 
-    transactions = []
-    for row in rows:
-        transactions.append({
-            'id': row[0],
-            'transaction_date': row[1],
-            'transaction_type': row[2],
-            'amount': float(row[3]) if row[3] else 0,
-            'payment_method': row[4],
-            'description': row[5],
-            'reference_type': row[6],
-            'reference_id': row[7]
-        })
+    transactions, next_cursor, has_more = _CASH_TRANSACTION_KEYSET.page(rows, limit)
+    total = None
+    if with_total:
+        total = approximate_count(
+            'cash_transactions', f"SELECT COUNT(*) FROM cash_transactions {count_where}", count_params,
+            tags=('accounting',)
+        )
 
-    return transactions
+    return {
+        'transactions': transactions,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'total': total
+    }
 
 
 def get_cash_summary_range(start_date=None, end_date=None):
     """Get cash summary totals for a date range with method breakdown and basic revenue sources."""
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
     # Totals and method breakdown
     conditions = []
     params = []
@@ -661,24 +702,6 @@ def get_cash_summary_range(start_date=None, end_date=None):
         params.append(end_date)
     where_clause = ("WHERE " + " AND ".join(conditions)) if conditions else ""
 
-    cursor.execute(f"""
-        SELECT 
-            SUM(CASE WHEN transaction_type = 'INCOME' THEN amount ELSE 0 END) as total_income,
-            SUM(CASE WHEN transaction_type = 'EXPENSE' THEN amount ELSE 0 END) as total_expenses,
-            SUM(CASE WHEN transaction_type = 'INCOME' AND payment_method = 'CASH' THEN amount ELSE 0 END) as cash_income,
-            SUM(CASE WHEN transaction_type = 'INCOME' AND payment_method = 'CARD' THEN amount ELSE 0 END) as card_income,
-            SUM(CASE WHEN transaction_type = 'INCOME' AND payment_method = 'TRANSFER' THEN amount ELSE 0 END) as transfer_income
-        FROM cash_transactions
-        {where_clause}
-    """, params)
-    totals = cursor.fetchone()
-
-    total_income = float(totals[0]) if totals and totals[0] else 0
-    total_expenses = float(totals[1]) if totals and totals[1] else 0
-    cash_income = float(totals[2]) if totals and totals[2] else 0
-    card_income = float(totals[3]) if totals and totals[3] else 0
-    transfer_income = float(totals[4]) if totals and totals[4] else 0
-
     # Billed revenue breakdown: services vs sales, within date range
     inv_conditions = []
     inv_params = []
@@ -690,46 +713,64 @@ def get_cash_summary_range(start_date=None, end_date=None):
         inv_params.append(end_date)
     inv_where = ("WHERE " + " AND ".join(inv_conditions)) if inv_conditions else ""
 
-    # Sales billed (all SALE invoices, total amount)
-    cursor.execute(f"""
-        SELECT ISNULL(SUM(total_amount), 0)
-        FROM invoices
-        {inv_where} {(' AND ' if inv_where else ' WHERE ')} invoice_type = 'SALE'
-    """, inv_params)
-    row_sales = cursor.fetchone()
+    # The five aggregates are independent: run them concurrently on separate pooled connections
+    rows = fetch_parallel({
+        'totals': (f"""
+            SELECT 
+                SUM(CASE WHEN transaction_type = 'INCOME' THEN amount ELSE 0 END) as total_income,
+                SUM(CASE WHEN transaction_type = 'EXPENSE' THEN amount ELSE 0 END) as total_expenses,
+                SUM(CASE WHEN transaction_type = 'INCOME' AND payment_method = 'CASH' THEN amount ELSE 0 END) as cash_income,
+                SUM(CASE WHEN transaction_type = 'INCOME' AND payment_method = 'CARD' THEN amount ELSE 0 END) as card_income,
+                SUM(CASE WHEN transaction_type = 'INCOME' AND payment_method = 'TRANSFER' THEN amount ELSE 0 END) as transfer_income
+            FROM cash_transactions
+            {where_clause}
+        """, params),
+        # Sales billed (all SALE invoices, total amount)
+        'sales': (f"""
+            SELECT ISNULL(SUM(total_amount), 0)
+            FROM invoices
+            {inv_where} {(' AND ' if inv_where else ' WHERE ')} invoice_type = 'SALE'
+        """, inv_params),
+        # Service billed: subtotal minus parts for non-SALE invoices
+        'service_subtotal': (f"""
+            SELECT ISNULL(SUM(subtotal), 0)
+            FROM invoices i
+            {inv_where} {(' AND ' if inv_where else ' WHERE ')} i.invoice_type <> 'SALE'
+        """, inv_params),
+        'service_parts': (f"""
+            SELECT ISNULL(SUM(ii.line_total), 0)
+            FROM invoice_items ii
+            INNER JOIN invoices i ON ii.invoice_id = i.id
+            {inv_where} {(' AND ' if inv_where else ' WHERE ')} i.invoice_type <> 'SALE'
+        """, inv_params),
+        # Total parts across all invoices (optional, legacy)
+        'parts_all': (f"""
+            SELECT ISNULL(SUM(ii.line_total), 0)
+            FROM invoice_items ii
+            INNER JOIN invoices i ON ii.invoice_id = i.id
+            {inv_where}
+        """, inv_params),
+    }, one=True)
+
+    totals = rows['totals']
+    total_income = float(totals[0]) if totals and totals[0] else 0
+    total_expenses = float(totals[1]) if totals and totals[1] else 0
+    cash_income = float(totals[2]) if totals and totals[2] else 0
+    card_income = float(totals[3]) if totals and totals[3] else 0
+    transfer_income = float(totals[4]) if totals and totals[4] else 0
+
+    row_sales = rows['sales']
     sales_billed = float(row_sales[0]) if row_sales and row_sales[0] is not None else 0.0
 
-    # Service billed: subtotal minus parts for non-SALE invoices
-    cursor.execute(f"""
-        SELECT ISNULL(SUM(subtotal), 0)
-        FROM invoices i
-        {inv_where} {(' AND ' if inv_where else ' WHERE ')} i.invoice_type <> 'SALE'
-    """, inv_params)
-    row_service_sub = cursor.fetchone()
+    row_service_sub = rows['service_subtotal']
     service_subtotal_sum = float(row_service_sub[0]) if row_service_sub and row_service_sub[0] is not None else 0.0
-
-    cursor.execute(f"""
-        SELECT ISNULL(SUM(ii.line_total), 0)
-        FROM invoice_items ii
-        INNER JOIN invoices i ON ii.invoice_id = i.id
-        {inv_where} {(' AND ' if inv_where else ' WHERE ')} i.invoice_type <> 'SALE'
-    """, inv_params)
-    row_service_parts = cursor.fetchone()
+    row_service_parts = rows['service_parts']
     service_parts_total = float(row_service_parts[0]) if row_service_parts and row_service_parts[0] is not None else 0.0
     services_billed = max(0.0, service_subtotal_sum - service_parts_total)
 
-    # Total parts across all invoices (optional, legacy)
-    cursor.execute(f"""
-        SELECT ISNULL(SUM(ii.line_total), 0)
-        FROM invoice_items ii
-        INNER JOIN invoices i ON ii.invoice_id = i.id
-        {inv_where}
-    """, inv_params)
-    row_parts_all = cursor.fetchone()
+    row_parts_all = rows['parts_all']
     parts_billed_total = float(row_parts_all[0]) if row_parts_all and row_parts_all[0] is not None else 0.0
 
-    connection.close()
-
     return {
         'total_income': total_income,
         'total_expenses': total_expenses,
@@ -0,0 +1,39 @@
+"""
+Outstanding invoice balance (invoices.balance_due)
+The dashboard's unpaid count and total read only the unpaid invoices through IX_invoices_balance_due
+instead of scanning every invoice for paid_amount < total_amount. SQL Server filtered indexes cannot
+compare two columns, hence the persisted computed column with its own index.
+"""
+from core.database import get_dedicated_connection
+
+# Cache flag to avoid checking the column on every call
+_BALANCE_COLUMN_ENSURED = False
+
+BALANCE_COLUMN_DDL = "ALTER TABLE invoices ADD balance_due AS (total_amount - paid_amount) PERSISTED"
+
+BALANCE_INDEX_DDL = "CREATE INDEX IX_invoices_balance_due ON invoices(balance_due)"
+
+
+def ensure_invoice_balance_due():
+    """Add balance_due and its index on databases that predate them (once per process)"""
+    global _BALANCE_COLUMN_ENSURED
+    if _BALANCE_COLUMN_ENSURED:
+        return
+    # Own connection: the DDL commit must not commit a caller's open transaction
+    connection = get_dedicated_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_NAME = 'invoices' AND COLUMN_NAME = 'balance_due'
+        """)
+        if not cursor.fetchone()[0]:
+            cursor.execute(BALANCE_COLUMN_DDL)
+            cursor.execute(BALANCE_INDEX_DDL)
+            connection.commit()
+        _BALANCE_COLUMN_ENSURED = True
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
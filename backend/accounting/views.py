@@ -5,6 +5,8 @@ from datetime import datetime, date
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from core.renderers import FAST_JSON_RENDERERS
+from core.pagination import InvalidCursor
 from .accounting_functions import (
     get_all_invoices, get_invoice_by_id, create_invoice,
     create_cash_transaction, update_cash_transaction, delete_cash_transaction, get_daily_cash_summary,
@@ -13,13 +15,20 @@ from .accounting_functions import (
 )
 
 class InvoicesView(APIView):
+    renderer_classes = FAST_JSON_RENDERERS
+
     def get(self, request):
         try:
-            limit = int(request.GET.get('limit', 100))
-            offset = int(request.GET.get('offset', 0))
+            limit = min(max(int(request.GET.get('limit', 100)), 1), 1000)
             status_filter = request.GET.get('status')
-            invoices = get_all_invoices(limit, offset, status_filter)
-            return Response({'invoices': invoices, 'count': len(invoices)}, status=status.HTTP_200_OK)
+            with_total = request.GET.get('with_total') in ('1', 'true')
+            page = get_all_invoices(limit, request.GET.get('cursor'), status_filter, with_total)
+            return Response({
+                'invoices': page['invoices'], 'count': len(page['invoices']),
+                'next_cursor': page['next_cursor'], 'has_more': page['has_more'], 'total': page['total']
+            }, status=status.HTTP_200_OK)
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': f'Failed to get invoices: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -49,16 +58,25 @@ class InvoiceDetailView(APIView):
             return Response({'error': f'Failed to get invoice: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class CashTransactionsView(APIView):
+    renderer_classes = FAST_JSON_RENDERERS
+
     def get(self, request):
         try:
             start_date = request.GET.get('start')
             end_date = request.GET.get('end')
             transaction_type = request.GET.get('type')  # INCOME / EXPENSE
             payment_method = request.GET.get('method')  # CASH / CARD / TRANSFER
-            limit = int(request.GET.get('limit', 200))
-            offset = int(request.GET.get('offset', 0))
-            transactions = get_cash_transactions_filtered(start_date, end_date, transaction_type, payment_method, limit, offset)
-            return Response({'transactions': transactions, 'count': len(transactions)}, status=status.HTTP_200_OK)
+            limit = min(max(int(request.GET.get('limit', 200)), 1), 1000)
+            with_total = request.GET.get('with_total') in ('1', 'true')
+            page = get_cash_transactions_filtered(
+                start_date, end_date, transaction_type, payment_method, limit, request.GET.get('cursor'), with_total
+            )
+            return Response({
+                'transactions': page['transactions'], 'count': len(page['transactions']),
+                'next_cursor': page['next_cursor'], 'has_more': page['has_more'], 'total': page['total']
+            }, status=status.HTTP_200_OK)
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({'error': f'Failed to get transactions: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
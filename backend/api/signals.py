@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core.result_cache import invalidate_cache
+from .models import Customer, Part, Service, ServicePart, StockMovement
+
+
+@receiver([post_save, post_delete], sender=Customer)
+@receiver([post_save, post_delete], sender=Part)
+@receiver([post_save, post_delete], sender=Service)
+@receiver([post_save, post_delete], sender=ServicePart)
+@receiver([post_save, post_delete], sender=StockMovement)
+def invalidate_dashboard_stats(sender, **kwargs):
+    """DashboardViewSet.stats is cached under the 'api' tag"""
+    invalidate_cache('api')
@@ -8,6 +8,7 @@ from .models import (
     VespaModel, PartCategory, Part, ModelPart, Customer, 
     Service, ServicePart, StockMovement, UserProfile
 )
+from core.result_cache import cached_result
 from .serializers import (
     VespaModelSerializer, PartCategorySerializer, PartSerializer, ModelPartSerializer,
     CustomerSerializer, ServiceSerializer, ServicePartSerializer, StockMovementSerializer,
@@ -201,44 +202,48 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
+@cached_result('api')
+def get_dashboard_stats():
+    """Dashboard istatistikleri (önbellekli; api modelleri yazılınca api/signals.py temizler)"""
+    # Toplam sayılar
+    total_customers = Customer.objects.count()
+    total_parts = Part.objects.count()
+    total_services = Service.objects.count()
+    
+    # Düşük stoklu parçalar
+    low_stock_parts = Part.objects.filter(
+        current_stock__lte=models.F('min_stock')
+    ).count()
+    
+    # Bekleyen servisler
+    pending_services = Service.objects.filter(status='pending').count()
+    
+    # Aylık gelir (son 30 gün)
+    thirty_days_ago = timezone.now() - timedelta(days=30)
+    monthly_revenue = Service.objects.filter(
+        status='completed',
+        end_date__gte=thirty_days_ago
+    ).aggregate(
+        total=Sum('actual_cost')
+    )['total'] or 0
+    
+    return {
+        'total_customers': total_customers,
+        'total_parts': total_parts,
+        'total_services': total_services,
+        'low_stock_parts': low_stock_parts,
+        'pending_services': pending_services,
+        'monthly_revenue': monthly_revenue,
+    }
+
+
 class DashboardViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Dashboard istatistikleri"""
-        # Toplam sayılar
-        total_customers = Customer.objects.count()
-        total_parts = Part.objects.count()
-        total_services = Service.objects.count()
-        
-        # Düşük stoklu parçalar
-        low_stock_parts = Part.objects.filter(
-            current_stock__lte=models.F('min_stock')
-        ).count()
-        
-        # Bekleyen servisler
-        pending_services = Service.objects.filter(status='pending').count()
-        
-        # Aylık gelir (son 30 gün)
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        monthly_revenue = Service.objects.filter(
-            status='completed',
-            end_date__gte=thirty_days_ago
-        ).aggregate(
-            total=Sum('actual_cost')
-        )['total'] or 0
-        
-        data = {
-            'total_customers': total_customers,
-            'total_parts': total_parts,
-            'total_services': total_services,
-            'low_stock_parts': low_stock_parts,
-            'pending_services': pending_services,
-            'monthly_revenue': monthly_revenue,
-        }
-        
-        serializer = DashboardStatsSerializer(data)
+        serializer = DashboardStatsSerializer(get_dashboard_stats())
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
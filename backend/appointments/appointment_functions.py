@@ -8,6 +8,8 @@ Implements DATABASE.txt appointment system with:
 """
 from datetime import datetime, date, timedelta, time
 from .database import get_db_connection
+from core.result_cache import cached_result, invalidate_cache
+from core.row_mapping import RowShape
 
 
 # ===== APPOINTMENT SLOTS =====
@@ -133,6 +135,13 @@ def get_appointment_slots_config():
 
 # ===== APPOINTMENTS =====
 
+# The calendar has always sent customer_code as license_plate and customer_notes as notes
+_CALENDAR_ROW = RowShape('CalendarAppointmentRow', rename={
+    'customer_notes': 'notes',
+    'customer_code': 'license_plate',
+})
+
+
 def get_appointments_by_date_range(start_date, end_date, status_filter=None):
     """Get appointments within date range for calendar view"""
     try:
@@ -177,26 +186,9 @@ def get_appointments_by_date_range(start_date, end_date, status_filter=None):
         """
         
         cursor.execute(query, params)
-        rows = cursor.fetchall()
+        appointments = _CALENDAR_ROW.dicts(cursor)
         connection.close()
         
-        appointments = []
-        for row in rows:
-            appointments.append({
-                'id': row[0],
-                'appointment_date': row[1],
-                'appointment_time': row[2],
-                'estimated_duration': row[3],
-                'service_type': row[4],
-                'status': row[5],
-                'notes': row[6],
-                'created_date': row[7],
-                'customer_name': row[8],
-                'customer_phone': row[9],
-                'license_plate': row[10],
-                'model_name': row[11]
-            })
-        
         return appointments
         
     except Exception as e:
@@ -329,6 +321,7 @@ def create_appointment(data):
         """, (appointment_id, data.get('created_by', 1)))
         
         connection.commit()
+        invalidate_cache('appointments')
         return appointment_id
         
     except Exception as e:
@@ -368,6 +361,7 @@ def update_appointment_status(appointment_id, new_status, change_reason='', chan
         """, (appointment_id, old_status, new_status, change_reason, changed_by))
         
         connection.commit()
+        invalidate_cache('appointments')
         return True
         
     except Exception as e:
@@ -424,6 +418,7 @@ def reschedule_appointment(appointment_id, new_date, new_time, reason=''):
         """, (appointment_id, change_reason))
         
         connection.commit()
+        invalidate_cache('appointments')
         return True
         
     except Exception as e:
@@ -463,6 +458,7 @@ def _has_appointment_conflict(cursor, appointment_datetime, duration_minutes, ex
 
 # ===== APPOINTMENT ANALYTICS =====
 
+@cached_result('appointments')
 def get_appointment_summary():
     """Get appointment statistics"""
     try:
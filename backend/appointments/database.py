@@ -1,28 +1,17 @@
 """
 Database connection helper for appointments module
 """
-import pyodbc
-from django.conf import settings
 import logging
+from core.database import get_db_connection
 
 logger = logging.getLogger(__name__)
 
 
-def get_db_connection():
-    """Get raw database connection using Windows Authentication"""
-    connection_string = (
-        f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-        f"SERVER={settings.DATABASES['default']['HOST']};"
-        f"DATABASE={settings.DATABASES['default']['NAME']};"
-        f"Trusted_Connection=yes;"
-    )
-    return pyodbc.connect(connection_string)
-
-
 def execute_query(query, params=None):
     """
     Execute a SQL query and return results as list of dictionaries
     """
+    connection = None
     try:
         connection = get_db_connection()
         cursor = connection.cursor()
@@ -47,7 +36,6 @@ def execute_query(query, params=None):
             result.append(row_dict)
         
         cursor.close()
-        connection.close()
         
         return result
         
@@ -55,6 +43,9 @@ def execute_query(query, params=None):
         logger.error(f"Database query error: {str(e)}")
         logger.error(f"Query: {query}")
         raise Exception(f"Database query failed: {str(e)}")
+    finally:
+        if connection:
+            connection.close()
 
 
 def execute_non_query(query, params=None):
@@ -62,6 +53,7 @@ def execute_non_query(query, params=None):
     Execute a non-query SQL command (INSERT, UPDATE, DELETE)
     Returns number of affected rows
     """
+    connection = None
     try:
         connection = get_db_connection()
         cursor = connection.cursor()
@@ -79,11 +71,13 @@ def execute_non_query(query, params=None):
         connection.commit()
         
         cursor.close()
-        connection.close()
         
         return affected_rows
         
     except Exception as e:
         logger.error(f"Database non-query error: {str(e)}")
         logger.error(f"Query: {query}")
-        raise Exception(f"Database operation failed: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Database operation failed: {str(e)}")
+    finally:
+        if connection:
+            connection.close()
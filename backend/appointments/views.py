@@ -5,6 +5,8 @@ from datetime import datetime, date, timedelta
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from core.renderers import FAST_JSON_RENDERERS
+from core.reference_data import conditional_get
 from .appointment_functions import (
     get_available_slots, get_appointment_slots_config,
     get_appointments_by_date_range, get_appointment_by_id,
@@ -52,6 +54,7 @@ class AvailableSlotsView(APIView):
 class SlotsConfigView(APIView):
     """Appointment slots configuration"""
     
+    @conditional_get('appointment_slots')
     def get(self, request):
         """Get all configured appointment slots"""
         try:
@@ -81,6 +84,7 @@ class SlotsConfigView(APIView):
 
 class AppointmentsView(APIView):
     """Appointment management"""
+    renderer_classes = FAST_JSON_RENDERERS
     
     def get(self, request):
         """Get appointments by date range"""
@@ -256,6 +260,7 @@ class AppointmentRescheduleView(APIView):
 
 class CalendarView(APIView):
     """Calendar view for appointments"""
+    renderer_classes = FAST_JSON_RENDERERS
     
     def get(self, request):
         """Get calendar view data for specific month"""
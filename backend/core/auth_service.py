@@ -7,6 +7,7 @@ import secrets
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 from .base_service import BaseSQLService
+from .principal_cache import invalidate_principal
 
 
 class AuthService(BaseSQLService):
@@ -102,6 +103,20 @@ class AuthService(BaseSQLService):
             'password_hash': password_hash,
             'updated_date': datetime.now()
         })
+        if affected_rows > 0:
+            invalidate_principal(user_id)
+        
+        return affected_rows > 0
+    
+    @staticmethod
+    def deactivate_user(user_id: int) -> bool:
+        """Deactivate user (soft delete); existing tokens stop authenticating"""
+        affected_rows = AuthService.update('users', user_id, {
+            'is_active': 0,
+            'updated_date': datetime.now()
+        })
+        if affected_rows > 0:
+            invalidate_principal(user_id)
         
         return affected_rows > 0
     
@@ -0,0 +1,44 @@
+"""
+Bulk helpers for child rows (service parts, work items, invoice items)
+Referenced ids are validated with one IN (...) query and rows are written with executemany,
+using pyodbc fast_executemany so a whole batch travels in a single round trip.
+"""
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# SQL Server accepts at most 2100 parameters per statement
+ID_CHUNK_SIZE = 1000
+
+
+def fetch_rows_by_id(cursor, table: str, ids: Iterable, columns: Sequence[str] = ('id',)) -> Dict[int, Tuple]:
+    """{id: row} for the ids that exist; row holds `columns` (the first column must be the id)"""
+    unique_ids = sorted({int(i) for i in ids if i is not None})
+    rows = {}
+    column_list = ', '.join(columns)
+    for start in range(0, len(unique_ids), ID_CHUNK_SIZE):
+        chunk = unique_ids[start:start + ID_CHUNK_SIZE]
+        placeholders = ', '.join('?' for _ in chunk)
+        cursor.execute(f"SELECT {column_list} FROM {table} WHERE id IN ({placeholders})", chunk)
+        for row in cursor.fetchall():
+            rows[row[0]] = tuple(row)
+    return rows
+
+
+def require_ids(cursor, table: str, ids: Iterable, columns: Sequence[str] = ('id',), label: str = None) -> Dict[int, Tuple]:
+    """Like fetch_rows_by_id, but raises for the first id (in input order) that does not exist"""
+    ids = list(ids)
+    rows = fetch_rows_by_id(cursor, table, ids, columns)
+    for i in ids:
+        if i is None or int(i) not in rows:
+            raise Exception(f"{label or table} ID {i} not found in {table} table")
+    return rows
+
+
+def bulk_insert(cursor, table: str, columns: Sequence[str], rows: List[Sequence]) -> int:
+    """INSERT all rows with one executemany; returns the number of rows written"""
+    if not rows:
+        return 0
+    column_list = ', '.join(columns)
+    placeholders = ', '.join('?' for _ in columns)
+    cursor.fast_executemany = True
+    cursor.executemany(f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})", [tuple(r) for r in rows])
+    return len(rows)
@@ -0,0 +1,346 @@
+"""
+Thread-safe connection pool for the raw SQL helpers
+Every app's database.py checks connections out of the single pool built in core.database
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from .instrumentation import instrument_cursor
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+class _PoolEntry:
+    """A physical connection owned by the pool"""
+
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """
+    Connection handed out by the pool.
+    Behaves like a pyodbc connection; close() returns it to the pool instead of
+    tearing down the ODBC session, so existing `connection.close()` calls keep working.
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    @property
+    def raw(self):
+        if self._entry is None:
+            raise Exception("Connection has already been returned to the pool")
+        return self._entry.raw
+
+    def cursor(self):
+        return instrument_cursor(self.raw.cursor())
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        """Return the connection to the pool (idempotent)"""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool._release(entry)
+
+    @property
+    def closed(self):
+        return self._entry is None
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Same semantics as pyodbc: commit on success, rollback on error
+        try:
+            if self._entry is not None:
+                if exc_type is None:
+                    self.raw.commit()
+                else:
+                    self.raw.rollback()
+        finally:
+            self.close()
+        return False
+
+    def __del__(self):
+        # Functions that raise before reaching connection.close() must not leak a slot
+        entry, self._entry = getattr(self, '_entry', None), None
+        if entry is not None:
+            self._pool._release(entry, reclaimed=True)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DB-API connections.
+
+    - min_size connections are opened up front and kept even when idle
+    - at most max_size connections exist at once; extra callers wait up to checkout_timeout
+    - idle connections above min_size are closed after idle_timeout seconds
+    - connections older than max_lifetime seconds are recycled on checkout/release
+    - a connection idle for more than health_check_interval seconds is pinged before checkout
+    """
+
+    def __init__(self, factory, min_size=1, max_size=10, idle_timeout=300, max_lifetime=3600,
+                 checkout_timeout=30, health_check_interval=10, health_check_query='SELECT 1'):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._factory = factory
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.health_check_query = health_check_query
+
+        # RLock: PooledConnection.__del__ may run while this thread already holds the lock
+        self._cond = threading.Condition(threading.RLock())
+        self._idle = []
+        self._size = 0
+        self._checked_out = 0
+        self._waiting = 0
+        self._counters = {
+            'created': 0,
+            'recycled': 0,
+            'checkouts': 0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+            'reclaimed': 0,
+            'wait_time_total': 0.0,
+        }
+        self._closed = False
+
+    # ===== CHECKOUT / RELEASE =====
+
+    def acquire(self, timeout=None):
+        """Check out a connection; close() on the returned object gives it back"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+
+        with self._cond:
+            if self._closed:
+                raise Exception("Connection pool is closed")
+            entry = None
+            while True:
+                entry = self._pop_idle()
+                if entry is not None:
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {timeout}s "
+                        f"(max_size={self.max_size}, checked_out={self._checked_out})"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._checked_out += 1
+            self._counters['checkouts'] += 1
+            self._counters['wait_time_total'] += time.monotonic() - started
+
+        try:
+            if entry is None:
+                entry = self._create_entry()
+            elif not self._is_healthy(entry):
+                self._discard(entry, reserve_slot=True)
+                entry = self._create_entry()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, entry)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager: commit on success, rollback on error, always release"""
+        conn = self.acquire(timeout)
+        with conn:
+            yield conn
+
+    def _release(self, entry, reclaimed=False):
+        discard = False
+        try:
+            # Never hand the next caller someone else's open transaction
+            entry.raw.rollback()
+        except Exception:
+            discard = True
+
+        now = time.monotonic()
+        with self._cond:
+            self._checked_out -= 1
+            if reclaimed:
+                self._counters['reclaimed'] += 1
+            if self._closed or discard or self._expired(entry, now):
+                self._size -= 1
+                self._counters['recycled'] += 1
+                self._cond.notify()
+                to_close = entry
+            else:
+                entry.last_used = now
+                self._idle.append(entry)
+                self._cond.notify()
+                to_close = None
+        if to_close is not None:
+            self._close_raw(to_close)
+
+    # ===== MAINTENANCE =====
+
+    def warm(self):
+        """Open connections until min_size exist"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = self._create_entry()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def prune(self):
+        """Close idle connections past idle_timeout/max_lifetime, keeping min_size"""
+        now = time.monotonic()
+        to_close = []
+        with self._cond:
+            keep = []
+            for entry in self._idle:
+                idle_too_long = (self.idle_timeout is not None
+                                 and now - entry.last_used > self.idle_timeout
+                                 and self._size - len(to_close) > self.min_size)
+                if idle_too_long or self._expired(entry, now):
+                    to_close.append(entry)
+                else:
+                    keep.append(entry)
+            self._idle = keep
+            self._size -= len(to_close)
+            self._counters['recycled'] += len(to_close)
+            if to_close:
+                self._cond.notify_all()
+        for entry in to_close:
+            self._close_raw(entry)
+        return len(to_close)
+
+    def close_all(self):
+        """Close idle connections and refuse new checkouts; busy ones close on release"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close_raw(entry)
+
+    def stats(self):
+        """Snapshot of pool usage for sizing under real traffic"""
+        with self._cond:
+            counters = dict(self._counters)
+            checkouts = counters['checkouts']
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'checked_out': self._checked_out,
+                'waiting': self._waiting,
+                'created': counters['created'],
+                'recycled': counters['recycled'],
+                'checkouts': checkouts,
+                'timeouts': counters['timeouts'],
+                'health_check_failures': counters['health_check_failures'],
+                'reclaimed': counters['reclaimed'],
+                'avg_wait_ms': round(counters['wait_time_total'] * 1000 / checkouts, 3) if checkouts else 0.0,
+            }
+
+    # ===== INTERNALS =====
+
+    def _pop_idle(self):
+        """Take the most recently used idle connection (LIFO keeps the hot set small)"""
+        now = time.monotonic()
+        while self._idle:
+            entry = self._idle.pop()
+            idle_too_long = (self.idle_timeout is not None
+                             and now - entry.last_used > self.idle_timeout
+                             and self._size > self.min_size)
+            if idle_too_long or self._expired(entry, now):
+                self._size -= 1
+                self._counters['recycled'] += 1
+                self._close_raw(entry)
+                continue
+            return entry
+        return None
+
+    def _expired(self, entry, now):
+        return self.max_lifetime is not None and now - entry.created_at > self.max_lifetime
+
+    def _create_entry(self):
+        raw = self._factory()
+        with self._cond:
+            self._counters['created'] += 1
+        return _PoolEntry(raw)
+
+    def _is_healthy(self, entry):
+        if self.health_check_interval is None:
+            return True
+        if time.monotonic() - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = entry.raw.cursor()
+            cursor.execute(self.health_check_query)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception as e:
+            logger.warning(f"Pooled connection failed health check, recycling: {str(e)}")
+            with self._cond:
+                self._counters['health_check_failures'] += 1
+            return False
+
+    def _discard(self, entry, reserve_slot=False):
+        """Close a broken connection; with reserve_slot the caller reuses its slot"""
+        with self._cond:
+            self._counters['recycled'] += 1
+            if not reserve_slot:
+                self._size -= 1
+                self._cond.notify()
+        self._close_raw(entry)
+
+    @staticmethod
+    def _close_raw(entry):
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
@@ -1,10 +1,206 @@
 """
 Raw SQL database connection and query execution
-Uses DATABASE.txt structure with Windows Authentication
+Uses DATABASE.txt structure with Windows Authentication (or the SQLite stand-in, see db_backends)
 """
-import pyodbc
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from django.conf import settings
 from typing import List, Dict, Any, Optional
+from .connection_pool import ConnectionPool
+from .db_backends import create_backend
+
+_backend = None
+_pool = None
+_pool_lock = threading.Lock()
+_request_scope = ContextVar('raw_sql_request_scope', default=None)
+
+POOL_DEFAULTS = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'IDLE_TIMEOUT': 300,
+    'MAX_LIFETIME': 3600,
+    'CHECKOUT_TIMEOUT': 30,
+    'HEALTH_CHECK_INTERVAL': 10,
+}
+
+
+def get_backend():
+    """Configured backend (SQL Server or SQLite), see settings.RAW_DB_BACKEND"""
+    global _backend
+    if _backend is None:
+        with _pool_lock:
+            if _backend is None:
+                _backend = create_backend()
+    return _backend
+
+
+def _open_raw_connection():
+    """Open a new physical connection (used by the pool only)"""
+    return get_backend().connect()
+
+
+def get_pool() -> ConnectionPool:
+    """Process-wide connection pool, configured from settings.RAW_DB_POOL"""
+    global _pool
+    if _pool is None:
+        get_backend()
+        with _pool_lock:
+            if _pool is None:
+                config = {**POOL_DEFAULTS, **getattr(settings, 'RAW_DB_POOL', {})}
+                pool = ConnectionPool(
+                    _open_raw_connection,
+                    min_size=config['MIN_SIZE'],
+                    max_size=config['MAX_SIZE'],
+                    idle_timeout=config['IDLE_TIMEOUT'],
+                    max_lifetime=config['MAX_LIFETIME'],
+                    checkout_timeout=config['CHECKOUT_TIMEOUT'],
+                    health_check_interval=config['HEALTH_CHECK_INTERVAL'],
+                )
+                pool.warm()
+                _pool = pool
+    return _pool
+
+
+class ScopedConnection:
+    """
+    Handle on the request's shared connection.
+    close() does not release the connection; when the outermost handle closes,
+    uncommitted work is rolled back exactly as closing a private connection would.
+    """
+
+    def __init__(self, scope):
+        self._scope = scope
+
+    @property
+    def raw(self):
+        if self._scope is None:
+            raise Exception("Connection has already been closed")
+        return self._scope.connection
+
+    def cursor(self):
+        return self.raw.cursor()
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        scope, self._scope = self._scope, None
+        if scope is not None:
+            scope._handle_closed()
+
+    @property
+    def closed(self):
+        return self._scope is None
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if self._scope is not None:
+                if exc_type is None:
+                    self.raw.commit()
+                else:
+                    self.raw.rollback()
+        finally:
+            self.close()
+        return False
+
+    def __del__(self):
+        if getattr(self, '_scope', None) is not None:
+            self.close()
+
+
+class RequestConnectionScope:
+    """One pooled connection shared by every raw SQL call made while the scope is active"""
+
+    def __init__(self):
+        self.connection = None
+        self.handles_opened = 0
+        self._depth = 0
+
+    def get_connection(self) -> ScopedConnection:
+        # Checked out lazily: requests that never touch raw SQL cost nothing
+        if self.connection is None:
+            self.connection = get_pool().acquire()
+        self.handles_opened += 1
+        self._depth += 1
+        return ScopedConnection(self)
+
+    @property
+    def in_use(self):
+        """True while a handle is open, i.e. the caller may have uncommitted work on the connection"""
+        return self._depth > 0
+
+    def _handle_closed(self):
+        self._depth -= 1
+        if self._depth == 0 and self.connection is not None:
+            try:
+                self.connection.rollback()
+            except Exception:
+                # Broken connection: hand it back so the pool can discard it
+                self.release()
+
+    def release(self):
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+            connection.close()
+
+
+@contextmanager
+def request_connection_scope():
+    """
+    Share a single connection across all get_db_connection() calls in this context.
+    Nested scopes reuse the outer one. Used by core.middleware for every HTTP request.
+    """
+    scope = _request_scope.get()
+    if scope is not None:
+        yield scope
+        return
+    scope = RequestConnectionScope()
+    token = _request_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _request_scope.reset(token)
+        scope.release()
+
+
+def get_current_scope() -> Optional[RequestConnectionScope]:
+    """Active request scope, or None outside a request (scripts, scraper, shell)"""
+    return _request_scope.get()
+
+
+def get_db_connection():
+    """
+    Get a database connection.
+    Inside a request scope this is the request's shared connection; otherwise a
+    connection checked out of the pool. Either way callers finish with connection.close().
+    """
+    scope = _request_scope.get()
+    if scope is not None:
+        return scope.get_connection()
+    return get_pool().acquire()
+
+
+def get_dedicated_connection():
+    """
+    Connection checked out of the pool even inside a request scope.
+    For work that outlives the request, e.g. streaming responses iterated after the view returns.
+    """
+    return get_pool().acquire()
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Pool counters: checked out, waiting, created, recycled, ..."""
+    return get_pool().stats()
 
 
 class DatabaseConnection:
@@ -12,16 +208,9 @@ class DatabaseConnection:
     
     @staticmethod
     def get_connection():
-        """Get raw database connection"""
+        """Get pooled database connection"""
         try:
-            # Windows Authentication connection string
-            connection_string = (
-                f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-                f"SERVER={settings.DATABASES['default']['HOST']};"
-                f"DATABASE={settings.DATABASES['default']['NAME']};"
-                f"Trusted_Connection=yes;"
-            )
-            return pyodbc.connect(connection_string)
+            return get_db_connection()
         except Exception as e:
             raise Exception(f"Database connection failed: {str(e)}")
 
@@ -0,0 +1,378 @@
+"""
+Database backends behind get_db_connection
+SQL Server (pyodbc, production) or an embedded SQLite file for tests and benchmarks
+"""
+import datetime
+import decimal
+import logging
+import os
+import re
+import sqlite3
+from django.conf import settings
+from .tsql import translate, TranslationError
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'DATABASE.txt')
+
+# Tables the code queries that are not part of DATABASE.txt (created by hand on the server)
+SUPPLEMENTAL_SCHEMA = """
+CREATE TABLE work_types (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    name NVARCHAR(100) NOT NULL,
+    base_price DECIMAL(10,2) NOT NULL DEFAULT 0,
+    description NVARCHAR(500),
+    category NVARCHAR(50),
+    estimated_duration INT DEFAULT 30,
+    is_active BIT DEFAULT 1,
+    created_date DATETIME2 DEFAULT GETDATE(),
+    updated_date DATETIME2 DEFAULT GETDATE()
+);
+
+CREATE TABLE service_work_items (
+    id INT IDENTITY(1,1) PRIMARY KEY,
+    service_record_id INT NOT NULL,
+    work_type_id INT NOT NULL,
+    quantity INT NOT NULL DEFAULT 1,
+    unit_price DECIMAL(10,2) NOT NULL,
+    line_total DECIMAL(10,2) NOT NULL,
+    notes NVARCHAR(MAX) NULL,
+    created_date DATETIME2 DEFAULT GETDATE(),
+    FOREIGN KEY (service_record_id) REFERENCES service_records(id) ON DELETE CASCADE,
+    FOREIGN KEY (work_type_id) REFERENCES work_types(id)
+);
+"""
+
+
+class SqlServerBackend:
+    """Production backend: ODBC Driver 17 with Windows Authentication"""
+    vendor = 'mssql'
+
+    def __init__(self, config):
+        self.config = config
+
+    @property
+    def Error(self):
+        import pyodbc
+        return pyodbc.Error
+
+    def connection_string(self):
+        return (
+            f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+            f"SERVER={settings.DATABASES['default']['HOST']};"
+            f"DATABASE={settings.DATABASES['default']['NAME']};"
+            f"Trusted_Connection=yes;"
+        )
+
+    def connect(self):
+        # Imported lazily so the SQLite backend works on machines without an ODBC driver
+        import pyodbc
+        return pyodbc.connect(self.connection_string())
+
+    def is_integrity_error(self, error):
+        sqlstate = error.args[0] if error.args else 'Unknown'
+        return sqlstate == '23000'
+
+
+class SqliteBackend:
+    """Embedded SQLite file; T-SQL is translated on the fly by core.tsql"""
+    vendor = 'sqlite'
+    Error = sqlite3.Error
+
+    def __init__(self, config):
+        self.config = config
+        path = config.get('SQLITE_PATH') or ':memory:'
+        if path == ':memory:':
+            # Pooled connections must all see the same in-memory database
+            self.database, self.uri = 'file:vespa_raw_sql?mode=memory&cache=shared', True
+        else:
+            self.database, self.uri = str(path), False
+
+    def connect(self):
+        raw = sqlite3.connect(
+            self.database,
+            uri=self.uri,
+            timeout=self.config.get('SQLITE_TIMEOUT', 30),
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+        )
+        raw.execute('PRAGMA foreign_keys = ON')
+        if not self.uri:
+            raw.execute('PRAGMA journal_mode = WAL')
+        return SqliteConnection(raw)
+
+    def is_integrity_error(self, error):
+        return isinstance(error, sqlite3.IntegrityError)
+
+
+# ===== SQLITE TYPE MAPPING =====
+
+def _parse_datetime(value):
+    text = value.decode() if isinstance(value, bytes) else str(value)
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _parse_date(value):
+    text = value.decode() if isinstance(value, bytes) else str(value)
+    try:
+        return datetime.date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+
+def _parse_time(value):
+    text = value.decode() if isinstance(value, bytes) else str(value)
+    try:
+        return datetime.time.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+sqlite3.register_adapter(decimal.Decimal, str)
+sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(datetime.time, lambda value: value.isoformat())
+# Same result types as Django's sqlite converters, but DATE also accepts a full timestamp
+# (SQL Server silently truncates GETDATE() stored into DATE columns)
+sqlite3.register_converter('DATE', _parse_date)
+sqlite3.register_converter('TIME', _parse_time)
+sqlite3.register_converter('DATETIME', _parse_datetime)
+sqlite3.register_converter('DATETIME2', _parse_datetime)
+sqlite3.register_converter('SMALLDATETIME', _parse_datetime)
+sqlite3.register_converter('BIT', lambda value: value not in (b'0', b''))
+
+
+# ===== SQLITE CONNECTION (pyodbc-compatible surface) =====
+
+class _ResultSet:
+    """Buffered rows of one statement in a multi-statement batch"""
+
+    def __init__(self, description, rows, rowcount):
+        self.description = description
+        self.rows = rows
+        self.rowcount = rowcount
+        self.position = 0
+
+    def fetchone(self):
+        if self.position >= len(self.rows):
+            return None
+        row = self.rows[self.position]
+        self.position += 1
+        return row
+
+    def fetchmany(self, size):
+        rows = self.rows[self.position:self.position + size]
+        self.position += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self.rows[self.position:]
+        self.position = len(self.rows)
+        return rows
+
+
+class SqliteCursor:
+    """Cursor that accepts T-SQL and pyodbc-style parameters"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection.raw.cursor()
+        self._results = []
+        self._current = None
+        self.rowcount = -1
+        self.arraysize = 1
+        self.fast_executemany = False
+
+    @staticmethod
+    def _normalize_params(params):
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            return tuple(params[0])
+        return tuple(params)
+
+    def execute(self, sql, *params):
+        params = self._normalize_params(params)
+        try:
+            steps = translate(sql)
+        except TranslationError as e:
+            raise sqlite3.OperationalError(f"Cannot translate statement for SQLite: {str(e)}")
+        self._results = []
+        self._current = None
+        self.rowcount = -1
+
+        if len(steps) == 1 and steps[0].kind == 'exec':
+            # Common case: stream straight from the SQLite cursor
+            self._cursor.execute(steps[0].sql, steps[0].bind(params))
+            self._current = self._cursor
+            self.rowcount = self._cursor.rowcount
+            return self
+
+        self._run_steps(steps, params)
+        self._current = self._results.pop(0) if self._results else None
+        return self
+
+    def _run_steps(self, steps, params):
+        for step in steps:
+            if step.kind == 'if':
+                self._cursor.execute(step.sql, step.bind(params))
+                branch = step.then_steps if self._cursor.fetchone()[0] else step.else_steps
+                self._run_steps(branch, params)
+                continue
+            if step.kind == 'exec_if_no_rows' and self.rowcount > 0:
+                continue
+            self._cursor.execute(step.sql, step.bind(params))
+            if self._cursor.description is not None:
+                rows = self._cursor.fetchall()
+                self._results.append(_ResultSet(self._cursor.description, rows, self._cursor.rowcount))
+            self.rowcount = self._cursor.rowcount
+
+    def executemany(self, sql, seq_of_params):
+        steps = translate(sql)
+        if len(steps) == 1 and steps[0].kind == 'exec':
+            self._cursor.executemany(steps[0].sql, [steps[0].bind(tuple(p)) for p in seq_of_params])
+            self._current = None
+            self.rowcount = self._cursor.rowcount
+            return
+        total = 0
+        for params in seq_of_params:
+            self.execute(sql, tuple(params))
+            total += max(self.rowcount, 0)
+        self.rowcount = total
+
+    @property
+    def description(self):
+        return self._current.description if self._current is not None else None
+
+    def fetchone(self):
+        return self._current.fetchone() if self._current is not None else None
+
+    def fetchmany(self, size=None):
+        if self._current is None:
+            return []
+        return self._current.fetchmany(size or self.arraysize)
+
+    def fetchall(self):
+        return self._current.fetchall() if self._current is not None else []
+
+    def fetchval(self):
+        row = self.fetchone()
+        return row[0] if row else None
+
+    def nextset(self):
+        """Advance to the next result set of a multi-statement batch (pyodbc semantics)"""
+        if not self._results:
+            self._current = None
+            return False
+        self._current = self._results.pop(0)
+        return True
+
+    def close(self):
+        self._cursor.close()
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class SqliteConnection:
+    """sqlite3 connection exposing the subset of the pyodbc API the helpers use"""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def cursor(self):
+        return SqliteCursor(self)
+
+    def execute(self, sql, *params):
+        return self.cursor().execute(sql, *params)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+
+# ===== SCHEMA BOOTSTRAP =====
+
+_TRIGGER_NAME = re.compile(r'^\s*CREATE\s+TRIGGER\s+(?:dbo\.)?\[?(\w+)', re.I)
+
+
+def _schema_batches(text):
+    """Statements of DATABASE.txt (GO batches, then ';' inside plain batches)"""
+    for batch in re.split(r'^\s*GO\s*$', text, flags=re.M | re.I):
+        if re.search(r'CREATE\s+(TRIGGER|PROCEDURE|FUNCTION|VIEW)\b', batch, re.I):
+            yield batch
+            continue
+        yield from (stmt for stmt in batch.split(';') if re.sub(r'--[^\n]*', '', stmt).strip())
+
+
+def bootstrap_schema(connection, schema_path=SCHEMA_PATH):
+    """
+    Create the DATABASE.txt schema (plus SUPPLEMENTAL_SCHEMA) on a SQLite connection.
+    Triggers are skipped (with a warning: their side effects never happen on SQLite, so code
+    that relies on one is not exercised here); returns (applied, skipped) where skipped lists
+    (statement, reason).
+    """
+    with open(schema_path, encoding='utf-8') as handle:
+        text = handle.read()
+
+    applied, skipped = 0, []
+    cursor = connection.cursor()
+    for statement in list(_schema_batches(text)) + list(_schema_batches(SUPPLEMENTAL_SCHEMA)):
+        head = re.sub(r'--[^\n]*', '', statement).strip()
+        try:
+            cursor.execute(statement)
+            applied += 1
+        except Exception as e:
+            skipped.append((head.splitlines()[0] if head else '', str(e)))
+            trigger = _TRIGGER_NAME.search(head)
+            if trigger:
+                logger.warning(
+                    "SQLite stand-in: trigger %s skipped; its writes do not happen here, so behaviour "
+                    "that depends on it differs from SQL Server", trigger.group(1)
+                )
+    connection.commit()
+    return applied, skipped
+
+
+# ===== SELECTION =====
+
+BACKENDS = {
+    'mssql': SqlServerBackend,
+    'sqlite': SqliteBackend,
+}
+
+
+def create_backend(config=None):
+    """Backend configured by settings.RAW_DB_BACKEND (defaults to SQL Server)"""
+    config = dict(config if config is not None else getattr(settings, 'RAW_DB_BACKEND', {}))
+    engine = config.get('ENGINE', 'mssql')
+    if engine not in BACKENDS:
+        raise ValueError(f"Unknown RAW_DB_BACKEND engine: {engine}")
+    return BACKENDS[engine](config)
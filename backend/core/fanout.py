@@ -0,0 +1,98 @@
+"""
+Parallel fan-out of independent read queries
+Each task runs on a worker of one bounded, process-wide thread pool and therefore on its own
+pooled connection (workers are outside the request connection scope). Latency becomes the
+slowest task instead of the sum.
+Workers cannot see uncommitted writes, so while the caller still holds an open handle on the
+request's connection the calls run inline on it instead. Otherwise the request's connection is
+handed back to the pool before fanning out, and the worker count stays below the pool size, so
+requests waiting on a fan-out never hold the connections their workers need.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from django.conf import settings
+from .database import get_current_scope, get_db_connection, get_pool
+from .instrumentation import bind_stats
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker = threading.local()
+
+
+def _get_executor() -> Optional[ThreadPoolExecutor]:
+    """Process-wide worker pool; None when the connection pool leaves no room for workers"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # At least one pooled connection stays available to requests that are not fanning out
+                workers = min(getattr(settings, 'RAW_DB_FANOUT_WORKERS', 4), get_pool().max_size - 1)
+                if workers < 1:
+                    return None
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='raw-sql-fanout',
+                                               initializer=_mark_worker)
+    return _executor
+
+
+def _mark_worker():
+    _worker.active = True
+
+
+def _release_caller_connection() -> bool:
+    """
+    Hand the request's connection back to the pool before fanning out.
+    False when the caller still has a handle open (possibly uncommitted writes): run inline then.
+    """
+    scope = get_current_scope()
+    if scope is None:
+        return True
+    if scope.in_use:
+        return False
+    # No open handle: the connection was rolled back when the last one closed, nothing is lost
+    scope.release()
+    return True
+
+
+def gather(calls: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Run independent callables concurrently and return {name: result}.
+    The first failure (in the given order) is re-raised after every task has finished.
+    The calls run serially instead when called from inside a fan-out worker (nested fan-outs
+    cannot starve the bounded pool) or while the caller has an open handle on the request's connection.
+    """
+    if len(calls) <= 1 or getattr(_worker, 'active', False):
+        return {name: call() for name, call in calls.items()}
+    executor = _get_executor()
+    if executor is None or not _release_caller_connection():
+        return {name: call() for name, call in calls.items()}
+
+    futures = {name: executor.submit(bind_stats(call)) for name, call in calls.items()}
+    results, error = {}, None
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            error = error or e
+    if error is not None:
+        raise error
+    return results
+
+
+def _fetch(query: str, params: Sequence, one: bool):
+    # On a worker this is a pooled connection; inline it is the caller's (request) connection
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchone() if one else cursor.fetchall()
+    finally:
+        connection.close()
+
+
+def fetch_parallel(queries: Dict[str, Tuple[str, Sequence]], one: bool = False) -> Dict[str, Any]:
+    """{name: (sql, params)} -> {name: rows} (or {name: first row} with one=True), see gather"""
+    return gather({
+        name: (lambda q=query, p=params: _fetch(q, p, one))
+        for name, (query, params) in queries.items()
+    })
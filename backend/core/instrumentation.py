@@ -0,0 +1,166 @@
+"""
+Per-request raw SQL instrumentation
+While a QueryStats collector is active (core.middleware.SqlInstrumentationMiddleware), cursors
+handed out by the connection pool are wrapped so every execute/executemany/fetch* is timed
+and counted: statements, driver round trips, rows fetched and time spent in the database.
+"""
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+_collector = ContextVar('raw_sql_query_stats', default=None)
+
+_STRING_LITERAL = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Statement text with literals and IN-lists collapsed, so repeats of one query group together"""
+    text = _STRING_LITERAL.sub('?', str(sql))
+    text = _NUMBER_LITERAL.sub('?', text)
+    text = _IN_LIST.sub('(...)', text)
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+class QueryStats:
+    """Counters for one request; shared with fan-out worker threads, hence the lock"""
+
+    def __init__(self, slow_query_ms=None):
+        self.slow_query_ms = slow_query_ms
+        self.queries = 0
+        self.round_trips = 0
+        self.rows = 0
+        self.db_seconds = 0.0
+        self.statements = {}  # normalized sql -> [count, seconds]
+        self.slow_queries = []  # (milliseconds, normalized sql)
+        self._lock = threading.Lock()
+
+    def record_statement(self, sql, seconds):
+        normalized = normalize_sql(sql)
+        with self._lock:
+            self.queries += 1
+            self.round_trips += 1
+            self.db_seconds += seconds
+            entry = self.statements.setdefault(normalized, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            if self.slow_query_ms is not None and seconds * 1000 >= self.slow_query_ms:
+                self.slow_queries.append((seconds * 1000, normalized))
+
+    def record_fetch(self, rows, seconds):
+        with self._lock:
+            self.round_trips += 1
+            self.rows += rows
+            self.db_seconds += seconds
+
+    def repeated_statements(self, threshold):
+        """[(count, seconds, sql)] for statements run more than `threshold` times (N+1 suspects)"""
+        with self._lock:
+            repeated = [(count, seconds, sql) for sql, (count, seconds) in self.statements.items() if count > threshold]
+        return sorted(repeated, reverse=True)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'queries': self.queries,
+                'round_trips': self.round_trips,
+                'rows': self.rows,
+                'db_ms': round(self.db_seconds * 1000, 2),
+                'distinct_statements': len(self.statements),
+            }
+
+
+class InstrumentedCursor:
+    """Cursor proxy that reports to a QueryStats; everything else passes through"""
+
+    def __init__(self, cursor, stats):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_stats', stats)
+
+    def execute(self, sql, *params):
+        started = time.perf_counter()
+        try:
+            self._cursor.execute(sql, *params)
+        finally:
+            self._stats.record_statement(sql, time.perf_counter() - started)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_of_params)
+        finally:
+            self._stats.record_statement(sql, time.perf_counter() - started)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = getattr(self._cursor, method)(*args)
+        if method in ('fetchone', 'fetchval'):
+            rows = 0 if result is None else 1
+        else:
+            rows = len(result)
+        self._stats.record_fetch(rows, time.perf_counter() - started)
+        return result
+
+    def fetchone(self):
+        return self._fetch('fetchone')
+
+    def fetchval(self):
+        return self._fetch('fetchval')
+
+    def fetchmany(self, *args):
+        return self._fetch('fetchmany', *args)
+
+    def fetchall(self):
+        return self._fetch('fetchall')
+
+    def __iter__(self):
+        row = self.fetchone()
+        while row is not None:
+            yield row
+            row = self.fetchone()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # e.g. cursor.fast_executemany = True must reach the driver cursor
+        setattr(self._cursor, name, value)
+
+
+def current_stats():
+    return _collector.get()
+
+
+def start_collecting(slow_query_ms=None):
+    """Activate a fresh QueryStats for this context; returns (stats, token for stop_collecting)"""
+    stats = QueryStats(slow_query_ms)
+    return stats, _collector.set(stats)
+
+
+def stop_collecting(token):
+    _collector.reset(token)
+
+
+def instrument_cursor(cursor):
+    """Wrap the cursor when a collector is active (used by the connection pool)"""
+    stats = _collector.get()
+    return InstrumentedCursor(cursor, stats) if stats is not None else cursor
+
+
+def bind_stats(fn):
+    """Carry the caller's collector into a worker thread (core.fanout)"""
+    stats = _collector.get()
+    if stats is None:
+        return fn
+
+    def run():
+        token = _collector.set(stats)
+        try:
+            return fn()
+        finally:
+            _collector.reset(token)
+    return run
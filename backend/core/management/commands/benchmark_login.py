@@ -0,0 +1,108 @@
+import json
+import os
+import statistics
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory
+from core.database import get_backend, get_db_connection, request_connection_scope
+from customers.auth_functions import hash_password
+from customers.last_login import last_login_buffer
+from customers.password_hasher import rounds, worker_count
+from customers.views import LoginView
+
+BENCHMARK_USERNAME = 'benchmark_login'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures LoginView throughput: concurrent clients log in for a fixed time and the result is '
+        'reported as logins/sec and logins/sec per core (JSON). Creates or updates the benchmark_login user, '
+        'so run it against a disposable database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=0, help='Concurrent clients (default: 2 x cores)')
+        parser.add_argument('--seconds', type=float, default=10.0, help='Duration of the timed run')
+        parser.add_argument('--password', default='Benchmark-123', help='Password of the benchmark user')
+        parser.add_argument('--output', help='Write the JSON results to this file (default: stdout)')
+
+    def handle(self, *args, **options):
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+        threads = options['threads'] or cores * 2
+        if options['seconds'] <= 0:
+            raise CommandError('--seconds must be positive')
+        self._ensure_user(options['password'])
+
+        factory = APIRequestFactory()
+        view = LoginView.as_view()
+        payload = {'username': BENCHMARK_USERNAME, 'password': options['password']}
+        deadline = time.perf_counter() + options['seconds']
+        latencies, statuses, lock = [], {}, threading.Lock()
+
+        def client():
+            while time.perf_counter() < deadline:
+                request = factory.post('/api/auth/login/', payload, format='json')
+                started = time.perf_counter()
+                with request_connection_scope():
+                    response = view(request)
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                    if response.status_code == 200:
+                        latencies.append(elapsed)
+
+        started = time.perf_counter()
+        workers = [threading.Thread(target=client, name=f'login-client-{i}') for i in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        wall = time.perf_counter() - started
+        last_login_buffer.flush()
+
+        if not latencies:
+            raise CommandError(f'No successful login (status counts: {statuses})')
+        ordered = sorted(latencies)
+        rate = len(ordered) / wall
+        report = {
+            'backend': get_backend().vendor,
+            'bcrypt_rounds': rounds(),
+            'bcrypt_workers': worker_count(),
+            'cores': cores,
+            'threads': threads,
+            'seconds': round(wall, 3),
+            'logins': len(ordered),
+            'statuses': {str(code): count for code, count in sorted(statuses.items())},
+            'logins_per_sec': round(rate, 2),
+            'logins_per_sec_per_core': round(rate / cores, 2),
+            'median_ms': round(statistics.median(ordered), 3),
+            'p95_ms': round(statistics.quantiles(ordered, n=20, method='inclusive')[18], 3) if len(ordered) > 1 else round(ordered[0], 3),
+            'last_login_flushes': last_login_buffer.flushes,
+        }
+        text = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+        else:
+            self.stdout.write(text)
+
+    @staticmethod
+    def _ensure_user(password):
+        """benchmark_login with the password hashed at the configured cost"""
+        connection = get_db_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT id FROM users WHERE username = ?", (BENCHMARK_USERNAME,))
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute("""
+                    INSERT INTO users (username, email, password_hash, full_name, role, is_active)
+                    VALUES (?, ?, ?, ?, 'ADMIN', 1)
+                """, (BENCHMARK_USERNAME, 'benchmark_login@localhost', hash_password(password), 'Login Benchmark'))
+            else:
+                cursor.execute("UPDATE users SET password_hash = ?, is_active = 1 WHERE id = ?",
+                               (hash_password(password), row[0]))
+            connection.commit()
+        finally:
+            connection.close()
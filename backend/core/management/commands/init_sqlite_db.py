@@ -0,0 +1,31 @@
+import os
+from django.core.management.base import BaseCommand, CommandError
+from core.database import get_backend, get_db_connection
+from core.db_backends import bootstrap_schema
+
+
+class Command(BaseCommand):
+    help = 'Creates the DATABASE.txt schema in the SQLite stand-in database (RAW_DB_BACKEND ENGINE=sqlite)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Delete the SQLite file first')
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if backend.vendor != 'sqlite':
+            raise CommandError('RAW_DB_BACKEND is not sqlite; set VESPA_DB_ENGINE=sqlite')
+
+        if options['reset'] and not backend.uri and os.path.exists(backend.database):
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(backend.database + suffix):
+                    os.remove(backend.database + suffix)
+
+        connection = get_db_connection()
+        try:
+            applied, skipped = bootstrap_schema(connection)
+        finally:
+            connection.close()
+
+        for statement, reason in skipped:
+            self.stdout.write(self.style.WARNING(f'skipped: {statement} ({reason})'))
+        self.stdout.write(self.style.SUCCESS(f'init_sqlite_db: {applied} statements applied, {len(skipped)} skipped'))
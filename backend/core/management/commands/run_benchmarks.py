@@ -0,0 +1,227 @@
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+from core.database import get_backend, get_db_connection, request_connection_scope
+from core.instrumentation import start_collecting, stop_collecting
+from core.synthetic_data import ensure_currency_rates, table_counts
+from accounting.accounting_functions import get_cash_summary_range
+from appointments.appointment_functions import get_available_slots
+from inventory.inventory_functions import get_all_parts_with_stock, search_parts
+from inventory.search_index import part_search_index
+from reports.report_functions import get_comprehensive_dashboard
+from sales.views import SalesView
+from services.service_functions import create_service_record
+
+RESULTS_FORMAT = 1
+
+SEARCH_TERMS = ('fren', 'kask siyah', 'debriyaj piaggio', 'BP-0001', 'filtre')
+
+
+class _BenchmarkUser:
+    is_authenticated = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Times the raw SQL hot paths against the current database (seed it with seed_benchmark_data) and '
+        'writes machine-readable JSON that can be diffed between commits. Write cases (create_service_record, '
+        'SalesView.post) commit their rows, so run it against a disposable database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per case')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed runs per case before timing')
+        parser.add_argument('--only', default='', help='Comma separated case names (default: all)')
+        parser.add_argument('--list', action='store_true', help='List the case names and exit')
+        parser.add_argument('--output', help='Write the JSON results to this file (default: stdout)')
+        parser.add_argument('--compare', help='Earlier results file; prints the median change per case')
+        parser.add_argument('--fail-over', type=float, default=None,
+                            help='With --compare, fail when a median grows by more than this factor (e.g. 1.25)')
+
+    def handle(self, *args, **options):
+        connection = get_db_connection()
+        try:
+            cursor = connection.cursor()
+            fixtures = self._fixtures(cursor)
+            ensure_currency_rates(cursor, date.today())
+            connection.commit()
+            rows = table_counts(cursor)
+        finally:
+            connection.close()
+
+        cases = self._cases(fixtures)
+        if options['list']:
+            for name in cases:
+                self.stdout.write(name)
+            return
+        selected = [name.strip() for name in options['only'].split(',') if name.strip()]
+        unknown = [name for name in selected if name not in cases]
+        if unknown:
+            raise CommandError(f"Unknown case(s): {', '.join(unknown)}. Use --list")
+
+        results = {}
+        for name, fn in cases.items():
+            if selected and name not in selected:
+                continue
+            results[name] = self._measure(fn, options['warmup'], options['repeat'])
+            self.stderr.write(f"{name:<40} median {results[name]['median_ms']:>9.2f} ms  "
+                              f"p95 {results[name]['p95_ms']:>9.2f} ms  {results[name]['queries']} queries")
+
+        report = {
+            'format': RESULTS_FORMAT,
+            'meta': self._meta(options, rows),
+            'results': results,
+        }
+        text = json.dumps(report, indent=2, sort_keys=True, default=str)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+        else:
+            self.stdout.write(text)
+
+        if options['compare']:
+            self._compare(options['compare'], results, options['fail_over'])
+
+    def _cases(self, fixtures):
+        """name -> zero-argument callable; read cases first, the write cases last"""
+        today = date.today()
+
+        def sale():
+            request = APIRequestFactory().post('/api/sales/', {
+                'customer_id': fixtures['customer_id'],
+                'items': [{'part_id': part_id, 'quantity': 1, 'unit_price': 100} for part_id in fixtures['part_ids'][:2]],
+            }, format='json')
+            force_authenticate(request, user=_BenchmarkUser())
+            response = SalesView.as_view()(request)
+            if response.status_code != 201:
+                raise CommandError(f"SalesView.post returned {response.status_code}: {response.data}")
+
+        def search_cold():
+            part_search_index.invalidate()
+            search_parts(SEARCH_TERMS[0])
+
+        return {
+            'get_all_parts_with_stock': lambda: get_all_parts_with_stock(limit=100),
+            'get_all_parts_with_stock:filtered': lambda: get_all_parts_with_stock(
+                category_id=fixtures['category_id'], stock_status='LOW', sort='-total_stock', limit=100),
+            'get_all_parts_with_stock:full': lambda: get_all_parts_with_stock(),
+            'search_parts': lambda: [search_parts(term) for term in SEARCH_TERMS],
+            'search_parts:index_build': search_cold,
+            'get_available_slots': lambda: [get_available_slots(today + timedelta(days=d)) for d in range(7)],
+            'get_cash_summary_range': lambda: get_cash_summary_range(today - timedelta(days=30), today),
+            'get_cash_summary_range:year': lambda: get_cash_summary_range(today - timedelta(days=365), today),
+            'get_comprehensive_dashboard': get_comprehensive_dashboard.uncached,
+            'create_service_record': lambda: create_service_record({
+                'customer_vespa_id': fixtures['customer_vespa_id'],
+                'service_type': 'PERIODIC',
+                'technician_name': 'Benchmark',
+                'labor_cost': 500,
+                'used_parts': [{'part_id': part_id, 'quantity': 1, 'unit_price': 100} for part_id in fixtures['part_ids'][2:4]],
+            }),
+            'SalesView.post': sale,
+        }
+
+    @staticmethod
+    def _fixtures(cursor):
+        """Stable inputs for the cases: the lowest ids that fit, so every run uses the same rows"""
+        cursor.execute("""
+            SELECT TOP 1 cv.id, cv.customer_id FROM customer_vespas cv
+            WHERE cv.is_active = 1 ORDER BY cv.id
+        """)
+        vespa = cursor.fetchone()
+        cursor.execute("""
+            SELECT TOP 4 pss.part_id FROM part_stock_summary pss
+            INNER JOIN parts p ON pss.part_id = p.id
+            WHERE p.is_active = 1 AND pss.available_stock >= 50
+            ORDER BY pss.part_id
+        """)
+        part_ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("""
+            SELECT TOP 1 category_id FROM parts GROUP BY category_id ORDER BY COUNT(*) DESC, category_id
+        """)
+        category = cursor.fetchone()
+        if not vespa or len(part_ids) < 4 or not category:
+            raise CommandError('Not enough data to benchmark; run seed_benchmark_data first')
+        return {'customer_vespa_id': vespa[0], 'customer_id': vespa[1], 'part_ids': part_ids, 'category_id': category[0]}
+
+    @staticmethod
+    def _measure(fn, warmup, repeat):
+        """Each run is one simulated request (own connection scope); SQL counters are from the last run"""
+        samples, stats = [], None
+        for i in range(max(0, warmup) + max(1, repeat)):
+            stats, token = start_collecting()
+            try:
+                with request_connection_scope():
+                    started = time.perf_counter()
+                    fn()
+                    elapsed = (time.perf_counter() - started) * 1000
+            finally:
+                stop_collecting(token)
+            if i >= warmup:
+                samples.append(elapsed)
+
+        ordered = sorted(samples)
+        p95 = statistics.quantiles(ordered, n=20, method='inclusive')[18] if len(ordered) > 1 else ordered[0]
+        return {
+            'runs': len(samples),
+            'min_ms': round(ordered[0], 3),
+            'median_ms': round(statistics.median(ordered), 3),
+            'p95_ms': round(p95, 3),
+            'max_ms': round(ordered[-1], 3),
+            'mean_ms': round(statistics.fmean(ordered), 3),
+            **stats.as_dict(),
+        }
+
+    @staticmethod
+    def _meta(options, rows):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=10
+            ).stdout.strip() or None
+            dirty = bool(subprocess.run(
+                ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, timeout=30
+            ).stdout.strip())
+        except (OSError, subprocess.SubprocessError):
+            commit, dirty = None, None
+        return {
+            'git_commit': commit,
+            'git_dirty': dirty,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'backend': get_backend().vendor,
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeat': options['repeat'],
+            'warmup': options['warmup'],
+            'row_counts': rows,
+        }
+
+    def _compare(self, path, results, fail_over):
+        try:
+            with open(path, encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+
+        regressions = []
+        old_commit = (baseline.get('meta') or {}).get('git_commit')
+        self.stderr.write(f'\ncompared with {path} ({old_commit or "unknown commit"})')
+        for name, current in results.items():
+            old = (baseline.get('results') or {}).get(name)
+            if not old:
+                self.stderr.write(f'{name:<40} new case')
+                continue
+            ratio = current['median_ms'] / max(old['median_ms'], 0.001)
+            self.stderr.write(f"{name:<40} {old['median_ms']:>9.2f} -> {current['median_ms']:>9.2f} ms  "
+                              f"x{ratio:.2f}  queries {old.get('queries')} -> {current['queries']}")
+            if fail_over is not None and ratio > fail_over:
+                regressions.append(f'{name} x{ratio:.2f}')
+        if regressions:
+            raise CommandError('Slower than baseline: ' + '; '.join(regressions))
@@ -0,0 +1,56 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from core.database import get_backend, get_db_connection
+from core.synthetic_data import SCALES, SyntheticDataGenerator, resolve_counts
+from inventory.stock_summary import rebuild_part_stock_summary
+
+
+class Command(BaseCommand):
+    help = (
+        'Fills the DATABASE.txt schema with deterministic synthetic rows for run_benchmarks. '
+        'Rows are committed; use a disposable database (e.g. init_sqlite_db --reset first).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', default='small', choices=sorted(SCALES),
+                            help='Preset row counts (large = 100k parts, 2M stock movements, 200k services, 500k cash)')
+        parser.add_argument('--parts', type=int, help='Override the number of parts')
+        parser.add_argument('--stock-movements', type=int, help='Override the number of stock_movements')
+        parser.add_argument('--service-records', type=int, help='Override the number of service_records')
+        parser.add_argument('--cash-transactions', type=int, help='Override the number of cash_transactions')
+        parser.add_argument('--customers', type=int, help='Override the number of customers (default services / 4)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; same seed and counts give the same rows')
+        parser.add_argument('--anchor-date', type=date.fromisoformat, default=None,
+                            help='Dates are spread backwards from this day (YYYY-MM-DD, default today)')
+        parser.add_argument('--allow-mssql', action='store_true',
+                            help='Also seed when RAW_DB_BACKEND is SQL Server (never point this at production)')
+
+    def handle(self, *args, **options):
+        if get_backend().vendor != 'sqlite' and not options['allow_mssql']:
+            raise CommandError('RAW_DB_BACKEND is not sqlite; pass --allow-mssql to seed a disposable SQL Server database')
+        counts = resolve_counts(
+            options['scale'],
+            parts=options['parts'],
+            stock_movements=options['stock_movements'],
+            service_records=options['service_records'],
+            cash_transactions=options['cash_transactions'],
+            customers=options['customers'],
+        )
+
+        connection = get_db_connection()
+        try:
+            generator = SyntheticDataGenerator(connection, counts, options['seed'], options['anchor_date'], self.stdout)
+            if generator.already_seeded():
+                raise CommandError('Benchmark rows already exist; reset the database before seeding again')
+            try:
+                generator.run()
+            except ValueError as e:
+                raise CommandError(str(e))
+        finally:
+            connection.close()
+
+        summary_rows = rebuild_part_stock_summary()
+        self.stdout.write(f'part_stock_summary: {summary_rows} rows')
+        self.stdout.write(self.style.SUCCESS(
+            'seed_benchmark_data: ' + ', '.join(f'{table}={n}' for table, n in counts.items())
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.reference_data import REFERENCE_TABLES, bump_data_version
+
+
+class Command(BaseCommand):
+    help = (
+        'Bumps the data_versions counters of reference tables so clients stop getting 304s. '
+        'Run it after editing vespa models, categories, locations, suppliers, work types or slots with SQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('tables', nargs='*', help=f"Tables to stamp (default: all of {', '.join(REFERENCE_TABLES)})")
+
+    def handle(self, *args, **options):
+        tables = options['tables'] or list(REFERENCE_TABLES)
+        unknown = [t for t in tables if t not in REFERENCE_TABLES]
+        if unknown:
+            raise CommandError(f"Unknown reference table(s): {', '.join(unknown)}")
+        bump_data_version(*tables)
+        self.stdout.write(self.style.SUCCESS(f"touch_reference_data: {', '.join(tables)}"))
@@ -0,0 +1,77 @@
+"""
+Core middleware
+"""
+import logging
+import time
+from django.conf import settings
+from .database import request_connection_scope
+from .instrumentation import start_collecting, stop_collecting
+
+sql_logger = logging.getLogger('core.sql')
+
+INSTRUMENTATION_DEFAULTS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    'SLOW_QUERY_MS': 200,
+    'N_PLUS_ONE_THRESHOLD': 10,
+}
+
+
+class RequestConnectionMiddleware:
+    """
+    Gives each HTTP request one raw SQL connection.
+    The *_functions.py modules pick it up implicitly through get_db_connection(),
+    so back-to-back calls in a view reuse the same connection instead of one each.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_connection_scope():
+            return self.get_response(request)
+
+
+class SqlInstrumentationMiddleware:
+    """
+    Counts raw SQL statements, round trips, rows and database time per request
+    (see core.instrumentation), reports them in a Server-Timing header, logs slow
+    statements and statements repeated often enough to suggest an N+1 loop.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = {**INSTRUMENTATION_DEFAULTS, **getattr(settings, 'RAW_SQL_INSTRUMENTATION', {})}
+
+    def __call__(self, request):
+        if not self.config['ENABLED']:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        stats, token = start_collecting(self.config['SLOW_QUERY_MS'])
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_collecting(token)
+        total_ms = (time.perf_counter() - started) * 1000
+        summary = stats.as_dict()
+
+        if self.config['SERVER_TIMING']:
+            timing = (
+                f'db;dur={summary["db_ms"]:.1f};desc="{summary["queries"]} queries, '
+                f'{summary["round_trips"]} round trips, {summary["rows"]} rows", '
+                f'app;dur={total_ms:.1f}'
+            )
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+
+        for ms, sql in stats.slow_queries:
+            sql_logger.warning('slow query %.1fms %s %s: %s', ms, request.method, request.path, sql)
+        threshold = self.config['N_PLUS_ONE_THRESHOLD']
+        if threshold:
+            for count, seconds, sql in stats.repeated_statements(threshold):
+                sql_logger.warning(
+                    'possible N+1: statement ran %d times (%.1fms) in %s %s: %s',
+                    count, seconds * 1000, request.method, request.path, sql
+                )
+        return response
@@ -0,0 +1,125 @@
+"""
+Opaque cursor tokens for keyset pagination
+A token carries the sort key of the last row of a page; clients pass it back unchanged.
+Keyset builds the seek condition and ORDER BY for a listing from its sort columns, and
+approximate_count() gives listings a total without counting the table on every page.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from django.conf import settings
+from .database import get_db_connection
+from .result_cache import result_cache
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded (tampered, truncated, or from another list)"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'n': str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        if 'n' in value:
+            return Decimal(value['n'])
+    return value
+
+
+def encode_cursor(kind, *values):
+    """Token for the sort key `values` of list `kind` (e.g. 'stock_movements')"""
+    payload = json.dumps([kind] + [_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(kind, token, size):
+    """Sort key values of a token produced by encode_cursor(kind, ...) with `size` values"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(payload, list) or payload[0] != kind or len(payload) != size + 1:
+            raise ValueError(kind)
+        return [_decode_value(v) for v in payload[1:]]
+    except Exception:
+        raise InvalidCursor("Invalid pagination cursor")
+
+
+class Keyset:
+    """
+    Seek pagination for one listing: rows after the cursor are selected with a WHERE on the
+    sort key instead of OFFSET, so every page costs the same however deep it is.
+    order: (sql expression, 'ASC' | 'DESC', row key) per ORDER BY column, the last one unique (the id).
+    The columns must be NOT NULL and compare exactly (DATE, INT, NVARCHAR; not DATETIME2).
+    """
+
+    def __init__(self, kind, *order):
+        self.kind = kind
+        self.order = [(expression, direction.upper(), key) for expression, direction, key in order]
+
+    def order_by(self):
+        return ', '.join(f'{expression} {direction}' for expression, direction, _ in self.order)
+
+    def seek(self, token):
+        """(condition, params) for the rows after the cursor; (None, []) for the first page"""
+        if not token:
+            return None, []
+        values = decode_cursor(self.kind, token, len(self.order))
+        # (a, b, id) after (x, y, z):  a > x  OR  (a = x AND b > y)  OR  (a = x AND b = y AND id > z)
+        branches, params = [], []
+        for position, (expression, direction, _) in enumerate(self.order):
+            terms = []
+            for (equal_expression, _, _), value in zip(self.order[:position], values[:position]):
+                terms.append(f'{equal_expression} = ?')
+                params.append(value)
+            terms.append(f"{expression} {'<' if direction == 'DESC' else '>'} ?")
+            params.append(values[position])
+            branches.append('(' + ' AND '.join(terms) + ')')
+        return '(' + ' OR '.join(branches) + ')', params
+
+    def page(self, rows, limit):
+        """(rows, next_cursor, has_more) for dict rows fetched with TOP (limit + 1)"""
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more and rows:
+            next_cursor = encode_cursor(self.kind, *(rows[-1][key] for _, _, key in self.order))
+        return rows, next_cursor, has_more
+
+
+def _count(query, params):
+    connection = get_db_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+
+def approximate_count(kind, query, params=(), tags=()):
+    """
+    Total of a listing (query is its SELECT COUNT(*)), kept in the result cache per filter.
+    The writers' invalidate_cache(*tags) drops it (in other workers within REFERENCE_DATA_VERSION_TTL
+    seconds); otherwise it is served for PAGINATION_COUNT_TTL seconds and then recounted in the
+    background, so writes made outside the API can lag.
+    """
+    params = tuple(params)
+    return result_cache.get(
+        ('approximate_count', kind, query, params),
+        lambda: _count(query, params),
+        tags,
+        ttl=getattr(settings, 'PAGINATION_COUNT_TTL', 60),
+        stale_ttl=getattr(settings, 'PAGINATION_COUNT_STALE_TTL', 600),
+    )
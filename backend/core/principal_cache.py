@@ -0,0 +1,81 @@
+"""
+Authenticated principal cache
+JWT authentication resolves the token's user_id to a users row on every request; the resolved
+principal is kept in-process for AUTH_PRINCIPAL_CACHE_TTL seconds instead. Changes that affect
+authentication (password, username, deactivation) call invalidate_principal(): the local entry
+is dropped and the 'users' data_versions counter is bumped, so other workers drop theirs within
+REFERENCE_DATA_VERSION_TTL seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from .reference_data import bump_data_version, data_changed_at, get_data_versions
+
+PRINCIPALS_TABLE = 'users'
+
+# Principals kept per process (least recently used first out)
+MAX_CACHED_PRINCIPALS = 1024
+
+
+class PrincipalCache:
+    """user_id -> principal, valid for a TTL and until the 'users' counter changes"""
+
+    def __init__(self, max_entries=MAX_CACHED_PRINCIPALS):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user_id -> (principal, users_version, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _users_version():
+        return get_data_versions((PRINCIPALS_TABLE,))[PRINCIPALS_TABLE][0]
+
+    def get(self, user_id):
+        version = self._users_version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] == version and now < entry[2]:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self._entries.pop(user_id, None)
+            self.misses += 1
+        return None
+
+    def put(self, user_id, principal):
+        version = self._users_version()
+        expires_at = time.monotonic() + getattr(settings, 'AUTH_PRINCIPAL_CACHE_TTL', 60)
+        with self._lock:
+            self._entries[user_id] = (principal, version, expires_at)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+principal_cache = PrincipalCache()
+
+
+def invalidate_principal(user_id):
+    """Call after a committed change to a user's password, username or active flag"""
+    principal_cache.discard(int(user_id))
+    bump_data_version(PRINCIPALS_TABLE)
+
+
+def users_changed_at():
+    """Epoch seconds of the last invalidate_principal (any user), None if there was none"""
+    return data_changed_at(PRINCIPALS_TABLE)
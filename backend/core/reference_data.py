@@ -0,0 +1,203 @@
+"""
+Version stamps for reference data (conditional GET)
+data_versions holds one change counter per table. Writers bump it (bump_data_version) and
+reference-data views are wrapped with @conditional_get(tables): responses carry an ETag and
+Last-Modified derived from the counters, and a revalidation that still matches gets a 304.
+The counters are cached in-process for REFERENCE_DATA_VERSION_TTL seconds and rendered
+data is kept per ETag, so neither a 304 nor a repeated 200 touches the database.
+Tables edited outside the API are stamped with `manage.py touch_reference_data <table>`.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from django.conf import settings
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+from .database import get_db_connection, get_dedicated_connection
+
+REFERENCE_TABLES = (
+    'vespa_models', 'part_categories', 'storage_locations', 'suppliers', 'work_types', 'appointment_slots',
+)
+
+DATA_VERSIONS_DDL = """
+CREATE TABLE data_versions (
+    table_name NVARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_date DATETIME2 DEFAULT GETDATE()
+)
+"""
+
+# Responses kept per ETag (path, query string and Accept are part of it)
+MAX_CACHED_RESPONSES = 256
+
+# Cache flag to avoid checking the table on every call
+_VERSIONS_TABLE_ENSURED = False
+
+_lock = threading.Lock()
+_versions = {}  # table -> (version, updated_date, loaded_at)
+_responses = OrderedDict()  # etag -> response data
+
+
+def ensure_data_versions():
+    """Create data_versions on databases that predate it (once per process)"""
+    global _VERSIONS_TABLE_ENSURED
+    if _VERSIONS_TABLE_ENSURED:
+        return
+    # Own connection: the DDL commit must not commit a caller's open transaction
+    connection = get_dedicated_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'data_versions'")
+        if not cursor.fetchone()[0]:
+            cursor.execute(DATA_VERSIONS_DDL)
+            connection.commit()
+        _VERSIONS_TABLE_ENSURED = True
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def _bump(cursor, tables):
+    for table in tables:
+        cursor.execute("""
+            UPDATE data_versions SET version = version + 1, updated_date = GETDATE()
+            WHERE table_name = ?
+        """, (table,))
+        if cursor.rowcount == 0:
+            cursor.execute("""
+                INSERT INTO data_versions (table_name, version, updated_date) VALUES (?, 1, GETDATE())
+            """, (table,))
+
+
+def bump_data_version(*tables, cursor=None):
+    """
+    Record a change to the tables. With `cursor` the bump commits or rolls back with the
+    caller's write; without it, it runs and commits on its own connection (call after committing).
+    """
+    ensure_data_versions()
+    if cursor is not None:
+        _bump(cursor, tables)
+    else:
+        connection = get_dedicated_connection()
+        try:
+            _bump(connection.cursor(), tables)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+    with _lock:
+        for table in tables:
+            _versions.pop(table, None)
+
+
+def get_data_versions(tables):
+    """{table: (version, updated_date)}; read from the database at most every REFERENCE_DATA_VERSION_TTL seconds"""
+    ttl = getattr(settings, 'REFERENCE_DATA_VERSION_TTL', 5)
+    now = time.monotonic()
+    with _lock:
+        known = {t: _versions[t][:2] for t in tables if t in _versions and now - _versions[t][2] < ttl}
+    missing = [t for t in tables if t not in known]
+    if missing:
+        ensure_data_versions()
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                f"SELECT table_name, version, updated_date FROM data_versions "
+                f"WHERE table_name IN ({', '.join('?' for _ in missing)})",
+                missing
+            )
+            loaded = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        finally:
+            connection.close()
+        with _lock:
+            for table in missing:
+                known[table] = loaded.get(table, (0, None))
+                _versions[table] = known[table] + (now,)
+    return {table: known[table] for table in tables}
+
+
+def data_changed_at(table):
+    """Epoch seconds of the table's last recorded change (None if never bumped)"""
+    return _last_modified(get_data_versions((table,)))
+
+
+def _etag(request, versions):
+    stamp = '|'.join(f'{table}:{version}' for table, (version, _) in sorted(versions.items()))
+    key = f"{request.get_full_path()}|{request.META.get('HTTP_ACCEPT', '')}|{stamp}"
+    return f'W/"{hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]}"'
+
+
+def _last_modified(versions):
+    stamps = [updated for _, updated in versions.values() if updated is not None]
+    if not stamps:
+        return None
+    latest = max(stamps)
+    # SQLite returns DATETIME2 values as text
+    if isinstance(latest, str):
+        latest = datetime.fromisoformat(latest)
+    return int(latest.timestamp())
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # Weak comparison: W/"x" and "x" match
+        candidates = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in candidates or etag.removeprefix('W/') in candidates
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return last_modified is not None and if_modified_since is not None and last_modified <= if_modified_since
+
+
+def _remember(etag, data):
+    with _lock:
+        _responses[etag] = data
+        _responses.move_to_end(etag)
+        while len(_responses) > MAX_CACHED_RESPONSES:
+            _responses.popitem(last=False)
+
+
+def conditional_get(*tables):
+    """
+    Wrap an APIView.get over reference tables with ETag/Last-Modified handling.
+    Only 200 responses are stamped and cached; errors pass through untouched.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            try:
+                versions = get_data_versions(tables)
+            except Exception:
+                return method(view, request, *args, **kwargs)
+            etag = _etag(request, versions)
+            last_modified = _last_modified(versions)
+
+            if _not_modified(request, etag, last_modified):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                with _lock:
+                    data = _responses.get(etag)
+                if data is not None:
+                    response = Response(data, status=status.HTTP_200_OK)
+                else:
+                    response = method(view, request, *args, **kwargs)
+                    if response.status_code != status.HTTP_200_OK:
+                        return response
+                    _remember(etag, response.data)
+
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Always revalidate; the revalidation itself is cheap
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,181 @@
+"""
+In-process registry of small reference tables
+vespa_models, part_categories, storage_locations and work_types are loaded whole, once per
+process, and served from memory: rows in the API's order plus O(1) lookup by id (inactive rows
+included, so ids referenced by old records still resolve). A table is reloaded when its
+data_versions counter changes (bump_data_version / touch_reference_data, see
+core/reference_data.py) and, as a safety net, every REFERENCE_REGISTRY_TTL seconds.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Generic, Iterable, NamedTuple, Optional, Tuple, Type, TypeVar
+from django.conf import settings
+from .database import get_db_connection
+from .reference_data import get_data_versions
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class VespaModel(NamedTuple):
+    id: int
+    model_code: str
+    model_name: str
+    model_year: Optional[int]
+    engine_size: Optional[str]
+    category: Optional[str]
+    image_path: Optional[str]
+    is_active: bool
+    created_date: Optional[datetime]
+    updated_date: Optional[datetime]
+
+
+class PartCategory(NamedTuple):
+    id: int
+    category_name: str
+    parent_category_id: Optional[int]
+    category_type: str
+    sort_order: Optional[int]
+    is_active: bool
+
+
+class StorageLocation(NamedTuple):
+    id: int
+    location_code: str
+    location_name: Optional[str]
+    location_type: str
+    shelf_code: Optional[str]
+    rack_number: Optional[int]
+    level_number: Optional[int]
+    description: Optional[str]
+    is_active: bool
+
+
+class WorkType(NamedTuple):
+    id: int
+    name: str
+    base_price: Optional[Decimal]
+    description: Optional[str]
+    category: Optional[str]
+    estimated_duration: Optional[int]
+    is_active: bool
+    created_date: Optional[datetime]
+    updated_date: Optional[datetime]
+
+
+class _Snapshot:
+    __slots__ = ('version', 'loaded_at', 'rows', 'active', 'by_id')
+
+    def __init__(self, version, loaded_at, rows):
+        self.version = version
+        self.loaded_at = loaded_at
+        self.rows = rows
+        self.active = tuple(row for row in rows if row.is_active)
+        self.by_id = {row.id: row for row in rows}
+
+
+class ReferenceTable(Generic[T]):
+    """One table held in memory; rows keep the ORDER BY the API lists use"""
+
+    def __init__(self, table: str, record_type: Type[T], order_by: str):
+        self.table = table
+        self.record_type = record_type
+        self.query = f"SELECT {', '.join(record_type._fields)} FROM {table} ORDER BY {order_by}"
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _load(self, version, now) -> _Snapshot:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(self.query)
+            make = self.record_type._make
+            rows = tuple(make(row) for row in cursor.fetchall())
+        finally:
+            connection.close()
+        return _Snapshot(version, now, rows)
+
+    def _current(self) -> _Snapshot:
+        ttl = getattr(settings, 'REFERENCE_REGISTRY_TTL', 60)
+        now = time.monotonic()
+        # The counter is read before loading, so a change racing the load only causes one more reload
+        version = get_data_versions((self.table,))[self.table][0]
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version and now - snapshot.loaded_at < ttl:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version or now - snapshot.loaded_at >= ttl:
+                snapshot = self._snapshot = self._load(version, now)
+        return snapshot
+
+    def all(self) -> Tuple[T, ...]:
+        """Every row, inactive ones included"""
+        return self._current().rows
+
+    def active(self) -> Tuple[T, ...]:
+        return self._current().active
+
+    def get(self, row_id) -> Optional[T]:
+        if row_id is None:
+            return None
+        return self._current().by_id.get(int(row_id))
+
+    def get_many(self, ids: Iterable) -> Dict[int, T]:
+        """{id: row} for the ids that exist"""
+        by_id = self._current().by_id
+        found = {}
+        for row_id in ids:
+            if row_id is not None and int(row_id) in by_id:
+                found[int(row_id)] = by_id[int(row_id)]
+        return found
+
+    def refresh(self):
+        """Reload now (e.g. after a lookup missed a row another process just inserted)"""
+        version = get_data_versions((self.table,))[self.table][0]
+        with self._lock:
+            self._snapshot = self._load(version, time.monotonic())
+
+    def invalidate(self):
+        self._snapshot = None
+
+
+class ReferenceRegistry:
+    """The registered reference tables, as attributes"""
+
+    def __init__(self):
+        self.vespa_models = ReferenceTable('vespa_models', VespaModel, 'model_name, id')
+        self.part_categories = ReferenceTable('part_categories', PartCategory, 'sort_order, category_name, id')
+        self.storage_locations = ReferenceTable(
+            'storage_locations', StorageLocation, 'location_type, shelf_code, rack_number, level_number, id'
+        )
+        self.work_types = ReferenceTable('work_types', WorkType, 'category, name, id')
+
+    @property
+    def tables(self):
+        return (self.vespa_models, self.part_categories, self.storage_locations, self.work_types)
+
+    def preload(self):
+        """Load every table (process startup); failures are logged and the tables load on first use"""
+        for table in self.tables:
+            try:
+                table.refresh()
+            except Exception as e:
+                logger.warning("Reference registry could not preload %s: %s", table.table, e)
+
+    def invalidate(self):
+        for table in self.tables:
+            table.invalidate()
+
+
+reference_registry = ReferenceRegistry()
+
+
+def preload_reference_registry():
+    """Called from wsgi/asgi when REFERENCE_REGISTRY_PRELOAD is on"""
+    if getattr(settings, 'REFERENCE_REGISTRY_PRELOAD', True):
+        reference_registry.preload()
@@ -0,0 +1,107 @@
+"""
+Fast JSON rendering for large raw SQL responses
+Decimal, date, datetime and time values from pyodbc rows are encoded natively (orjson when
+installed, the standard library otherwise), so views no longer pre-convert them. Aware UTC
+datetimes end in 'Z' with either encoder, as DRF's own JSON encoder renders them.
+Opt a view in with `renderer_classes = FAST_JSON_RENDERERS`; long lists can be streamed
+with StreamingJSONResponse instead of being rendered as one body.
+"""
+import datetime
+import decimal
+import json
+import uuid
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer, BrowsableAPIRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Items serialized per chunk written to a streaming response
+STREAM_CHUNK_ITEMS = 500
+
+
+def _default(obj):
+    """Types neither encoder handles natively: Decimal as a number (like DRF), iterables as lists"""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, datetime.datetime):
+        representation = obj.isoformat()
+        return representation[:-6] + 'Z' if representation.endswith('+00:00') else representation
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode('utf-8', errors='replace')
+    if hasattr(obj, '_asdict'):
+        return obj._asdict()
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def dumps(data):
+        """JSON bytes for data"""
+        return orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(data):
+        """JSON bytes for data"""
+        return json.dumps(data, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data)
+
+
+# The browsable API stays available after the fast renderer (content negotiation picks the first match)
+FAST_JSON_RENDERERS = [FastJSONRenderer, BrowsableAPIRenderer]
+
+
+def iter_json_object(items, key, envelope=None, trailer=None, chunk_items=STREAM_CHUNK_ITEMS):
+    """
+    Yield {..envelope, key: [items...], ..trailer(count)} as JSON byte chunks.
+    `items` is consumed lazily; trailer(count) adds fields computed after the list (e.g. a count).
+    """
+    head = dumps(envelope or {})[:-1]
+    yield head + (b',' if len(head) > 1 else b'') + dumps(key) + b':['
+
+    count = 0
+    chunk = []
+    for item in items:
+        chunk.append(dumps(item))
+        count += 1
+        if len(chunk) >= chunk_items:
+            yield (b',' if count > len(chunk) else b'') + b','.join(chunk)
+            chunk = []
+    if chunk:
+        yield (b',' if count > len(chunk) else b'') + b','.join(chunk)
+
+    tail = dumps(trailer(count)) if trailer else b'{}'
+    yield b']' + (b',' + tail[1:] if len(tail) > 2 else b'}')
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    Streams a JSON object holding one long list, serialized chunk by chunk.
+    The iterable is consumed after the view returns (outside the request connection scope),
+    so pass rows already fetched or a generator on its own connection (get_dedicated_connection).
+    """
+
+    def __init__(self, items, key, envelope=None, trailer=None, status=200, chunk_items=STREAM_CHUNK_ITEMS):
+        super().__init__(
+            iter_json_object(items, key, envelope, trailer, chunk_items),
+            content_type='application/json',
+            status=status,
+        )
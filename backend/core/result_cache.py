@@ -0,0 +1,165 @@
+"""
+In-process cache for dashboard/summary results
+Entries are keyed by function and arguments and carry tags (table groups such as 'inventory').
+Fresh entries are served for `ttl` seconds; after that the stale value keeps being served
+for up to `stale_ttl` seconds while a single background thread recomputes it.
+Writers call invalidate_cache(*tags) after committing, which drops the tagged entries and bumps
+a 'result_cache:<tag>' data_versions counter per tag. Entries remember the counters they were
+computed under, so other workers drop them within REFERENCE_DATA_VERSION_TTL seconds.
+"""
+import copy
+import functools
+import threading
+import time
+from django.conf import settings
+from .reference_data import bump_data_version, get_data_versions
+
+# data_versions row of a tag (table_name column)
+SHARED_TAG_PREFIX = 'result_cache:'
+
+
+class _Entry:
+    __slots__ = ('value', 'fresh_until', 'stale_until', 'tags', 'shared', 'refreshing')
+
+    def __init__(self, value, ttl, stale_ttl, tags, shared):
+        now = time.monotonic()
+        self.value = value
+        self.fresh_until = now + ttl
+        self.stale_until = now + ttl + stale_ttl
+        self.tags = tags
+        self.shared = shared
+        self.refreshing = False
+
+
+class ResultCache:
+    def __init__(self, ttl=30, stale_ttl=300):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        # Bumped by invalidate(); a computation started before a bump is not stored
+        self._tag_versions = {}
+        self.counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_errors': 0, 'invalidations': 0}
+
+    def _versions(self, tags):
+        return tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    @staticmethod
+    def _shared_versions(tags):
+        """Cross-process counters of the tags (cached in-process by get_data_versions)"""
+        if not tags:
+            return ()
+        versions = get_data_versions([SHARED_TAG_PREFIX + tag for tag in tags])
+        return tuple(version for version, _ in versions.values())
+
+    def get(self, key, compute, tags=(), ttl=None, stale_ttl=None):
+        """Cached value for key, computing it with compute() on a miss"""
+        ttl = self.ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        shared = self._shared_versions(tags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.shared != shared:
+                # Invalidated by another worker
+                del self._entries[key]
+                entry = None
+            if entry is not None and now < entry.fresh_until:
+                self.counters['hits'] += 1
+                return copy.deepcopy(entry.value)
+            if entry is not None and now < entry.stale_until:
+                self.counters['stale_hits'] += 1
+                if not entry.refreshing:
+                    entry.refreshing = True
+                    threading.Thread(
+                        target=self._refresh, args=(key, entry, compute, tags, shared, ttl, stale_ttl),
+                        name='result-cache-refresh', daemon=True
+                    ).start()
+                return copy.deepcopy(entry.value)
+            self.counters['misses'] += 1
+            versions = self._versions(tags)
+
+        value = compute()
+        self._store(key, value, tags, versions, shared, ttl, stale_ttl)
+        return copy.deepcopy(value)
+
+    def _store(self, key, value, tags, versions, shared, ttl, stale_ttl):
+        with self._lock:
+            if self._versions(tags) == versions:
+                self._entries[key] = _Entry(value, ttl, stale_ttl, tags, shared)
+
+    def _refresh(self, key, entry, compute, tags, shared, ttl, stale_ttl):
+        # Runs on its own thread, so outside any request connection scope (own pooled connection)
+        with self._lock:
+            versions = self._versions(tags)
+        try:
+            value = compute()
+        except Exception:
+            with self._lock:
+                self.counters['refresh_errors'] += 1
+                entry.refreshing = False
+            return
+        with self._lock:
+            self.counters['refreshes'] += 1
+            entry.refreshing = False
+        self._store(key, value, tags, versions, shared, ttl, stale_ttl)
+
+    def invalidate(self, *tags):
+        """Drop every entry of this process carrying any of the tags (all entries when no tag is given)"""
+        with self._lock:
+            self.counters['invalidations'] += 1
+            if not tags:
+                tags = {tag for entry in self._entries.values() for tag in entry.tags}
+                self._entries.clear()
+            else:
+                for key in [k for k, e in self._entries.items() if set(e.tags) & set(tags)]:
+                    del self._entries[key]
+            for tag in tags:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['stale_hits'] + self.counters['misses']
+            return {
+                **self.counters,
+                'entries': len(self._entries),
+                'hit_ratio': round((self.counters['hits'] + self.counters['stale_hits']) / lookups, 3) if lookups else None,
+            }
+
+
+result_cache = ResultCache(
+    ttl=getattr(settings, 'DASHBOARD_CACHE_TTL', 30),
+    stale_ttl=getattr(settings, 'DASHBOARD_CACHE_STALE_TTL', 300),
+)
+
+
+def cached_result(*tags, ttl=None, stale_ttl=None):
+    """
+    Cache a summary function's result by (function, args, kwargs) under the given tags.
+    The undecorated function stays available as fn.uncached.
+    """
+    def decorator(fn):
+        name = f'{fn.__module__}.{fn.__qualname__}'
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            return result_cache.get(key, lambda: fn(*args, **kwargs), tags, ttl, stale_ttl)
+
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
+
+
+def invalidate_cache(*tags):
+    """
+    Call after committing writes to tables behind the tagged summaries.
+    Without tags only this process is cleared (nothing to bump for the other workers).
+    """
+    result_cache.invalidate(*tags)
+    if tags:
+        bump_data_version(*(SHARED_TAG_PREFIX + tag for tag in tags))
+
+
+def get_cache_stats():
+    return result_cache.stats()
@@ -0,0 +1,131 @@
+"""
+Compiled row mappers for raw SQL results
+A RowShape declares per-column converters (and renames) once. For each distinct
+cursor.description it generates a single mapping function, so building a row costs one
+dict/tuple/record expression instead of per-field indexing and branching.
+Keys come from the column names (SELECT aliases) in cursor.description.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+# Compiled variants kept per shape (dynamic SELECT lists, e.g. ?fields= on the parts catalogue)
+MAX_COMPILED_VARIANTS = 64
+
+
+def to_float(value):
+    """DECIMAL/MONEY -> float, with NULL and zero as 0 (the `float(x) if x else 0` used across the API)"""
+    return float(value) if value else 0
+
+
+def to_float_or_none(value):
+    return float(value) if value is not None else None
+
+
+def or_empty(value):
+    return value or ''
+
+
+def or_zero(value):
+    return value or 0
+
+
+class _Compiled:
+    __slots__ = ('names', 'to_dict', 'to_tuple', 'record_type', 'to_record')
+
+
+class RowShape:
+    """
+    Result shape of one query.
+    converters: {column: callable} applied to that column's value
+    rename: {column: key} for API keys that differ from the SQL column name
+    """
+
+    def __init__(self, name='Row', converters=None, rename=None):
+        self.name = name
+        self.converters = dict(converters or {})
+        self.rename = dict(rename or {})
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _names(self, description):
+        names = []
+        for position, column in enumerate(description):
+            name = self.rename.get(column[0], column[0]) or f'column{position}'
+            names.append(name)
+        return tuple(names)
+
+    def compile(self, description):
+        """Mapper for a cursor.description (cached by its column names)"""
+        columns = tuple(column[0] for column in description)
+        compiled = self._compiled.get(columns)
+        if compiled is not None:
+            return compiled
+
+        names = self._names(description)
+        namespace = {}
+        values = []
+        for position, column in enumerate(columns):
+            converter = self.converters.get(column)
+            if converter is None:
+                values.append(f'row[{position}]')
+            else:
+                namespace[f'_c{position}'] = converter
+                values.append(f'_c{position}(row[{position}])')
+
+        # namedtuple: __slots__ = (), tuple storage, attribute access and _asdict();
+        # rename=True turns duplicate or non-identifier column names into _0, _1, ...
+        namespace['_Record'] = record_type = namedtuple(self.name, names, rename=True)
+        namespace['_new'] = tuple.__new__
+        row_values = f"({''.join(f'{value}, ' for value in values)})"
+        source = (
+            'def to_dict(row):\n'
+            f"    return {{{', '.join(f'{name!r}: {value}' for name, value in zip(names, values))}}}\n"
+            'def to_tuple(row):\n'
+            f'    return {row_values}\n'
+            'def to_record(row):\n'
+            f'    return _new(_Record, {row_values})\n'
+        )
+        exec(compile(source, f'<row shape {self.name}>', 'exec'), namespace)
+
+        compiled = _Compiled()
+        compiled.names = names
+        compiled.to_dict = namespace['to_dict']
+        compiled.to_tuple = namespace['to_tuple']
+        compiled.record_type = record_type
+        compiled.to_record = namespace['to_record']
+        with self._lock:
+            self._compiled[columns] = compiled
+            while len(self._compiled) > MAX_COMPILED_VARIANTS:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def dicts(self, cursor, rows=None):
+        """[dict] for rows (fetched from the cursor when not given)"""
+        to_dict = self.compile(cursor.description).to_dict
+        return [to_dict(row) for row in (cursor.fetchall() if rows is None else rows)]
+
+    def tuples(self, cursor, rows=None):
+        """[tuple] with converters applied; column order as in the SELECT"""
+        to_tuple = self.compile(cursor.description).to_tuple
+        return [to_tuple(row) for row in (cursor.fetchall() if rows is None else rows)]
+
+    def records(self, cursor, rows=None):
+        """[record]: namedtuples with attribute access (record._asdict() for JSON)"""
+        to_record = self.compile(cursor.description).to_record
+        return [to_record(row) for row in (cursor.fetchall() if rows is None else rows)]
+
+    def one(self, cursor):
+        """dict for the next row, or None"""
+        row = cursor.fetchone()
+        return None if row is None else self.compile(cursor.description).to_dict(row)
+
+    def iterate(self, cursor, batch_size=1000, as_='dict'):
+        """Stream the remaining rows with fetchmany, mapped as dict, tuple or record"""
+        compiled = self.compile(cursor.description)
+        mapper = {'dict': compiled.to_dict, 'tuple': compiled.to_tuple, 'record': compiled.to_record}[as_]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield mapper(row)
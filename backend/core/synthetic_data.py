@@ -0,0 +1,368 @@
+"""
+Deterministic synthetic data for benchmarks
+Fills the DATABASE.txt schema (created by init_sqlite_db or the SQL Server script) with
+realistic volumes. Every table draws from its own Random(seed:table), so the same seed,
+anchor date and counts always produce the same rows, and changing one count does not
+reshuffle the other tables. Benchmark rows use BP-/BC-/BS-/BI-/BA- codes.
+"""
+import random
+from datetime import date, datetime, time, timedelta
+from core.bulk import bulk_insert
+
+INSERT_BATCH = 10000
+
+# Row counts per preset; the `large` preset is the production-sized target
+SCALES = {
+    'tiny': {'parts': 500, 'stock_movements': 10000, 'service_records': 1000, 'cash_transactions': 2500},
+    'small': {'parts': 5000, 'stock_movements': 100000, 'service_records': 10000, 'cash_transactions': 25000},
+    'medium': {'parts': 20000, 'stock_movements': 500000, 'service_records': 50000, 'cash_transactions': 125000},
+    'large': {'parts': 100000, 'stock_movements': 2000000, 'service_records': 200000, 'cash_transactions': 500000},
+}
+
+_PART_NAMES = (
+    'Fren Balatası', 'Fren Diski', 'Debriyaj Seti', 'Varyatör Kayışı', 'Yağ Filtresi', 'Hava Filtresi',
+    'Buji', 'Akü', 'Ön Amortisör', 'Arka Amortisör', 'Silindir Kiti', 'Piston Segmanı', 'Conta Takımı',
+    'Egzoz Susturucu', 'Karbüratör', 'Gaz Teli', 'Fren Teli', 'Far Ampulü', 'Stop Lambası', 'Sinyal Lambası',
+    'Ayna Seti', 'Yan Kapak', 'Ön Çamurluk', 'Sele', 'Jant', 'Lastik', 'Zincir', 'Rulman', 'Manet', 'Kontak',
+)
+_ACCESSORY_NAMES = (
+    'Kask', 'Jet Kask', 'Eldiven', 'Mont', 'Çanta', 'Arka Çanta', 'Disk Kilidi', 'Zincir Kilit',
+    'Sırt Dayama', 'Rüzgar Camı', 'Çanta Demiri', 'Telefon Tutucu', 'Branda',
+)
+_BRANDS = ('Piaggio', 'Vespa', 'Malossi', 'Polini', 'Brembo', 'NGK', 'Bosch', 'Givi', 'Shad', 'LS2', 'Nolan')
+_COLORS = ('Siyah', 'Beyaz', 'Kırmızı', 'Mavi', 'Gri', 'Yeşil', None)
+_SIZES = ('S', 'M', 'L', 'XL', None)
+_FIRST_NAMES = ('Ahmet', 'Mehmet', 'Ayşe', 'Fatma', 'Mustafa', 'Emine', 'Ali', 'Zeynep', 'Hüseyin', 'Elif',
+                'İbrahim', 'Şule', 'Gökhan', 'Özlem', 'Çağla', 'Ümit', 'Burak', 'Deniz', 'Ece', 'Kerem')
+_LAST_NAMES = ('Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Yıldırım', 'Öztürk', 'Aydın', 'Özdemir',
+               'Arslan', 'Doğan', 'Kılıç', 'Aslan', 'Çetin', 'Kara', 'Koç', 'Kurt', 'Özkan', 'Şimşek')
+_CITIES = (('İstanbul', 'Kadıköy'), ('İstanbul', 'Beşiktaş'), ('Ankara', 'Çankaya'), ('İzmir', 'Karşıyaka'),
+           ('Bursa', 'Nilüfer'), ('Antalya', 'Muratpaşa'))
+_SERVICE_TYPES = ('PERIODIC', 'REPAIR', 'MAINTENANCE', 'INSPECTION', 'WARRANTY')
+_SERVICE_STATUSES = (('COMPLETED', 70), ('IN_PROGRESS', 10), ('PENDING', 15), ('CANCELLED', 5))
+_APPOINTMENT_STATUSES = (('SCHEDULED', 40), ('CONFIRMED', 20), ('COMPLETED', 30), ('CANCELLED', 7), ('NO_SHOW', 3))
+_TECHNICIANS = ('Usta Hasan', 'Usta Murat', 'Usta Serkan', 'Usta Emre')
+_PAYMENT_METHODS = ('CASH', 'CARD', 'TRANSFER', 'CHECK')
+_CURRENCIES = (('TRY', 70), ('EUR', 20), ('USD', 10))
+
+
+def resolve_counts(scale='small', **overrides):
+    """Row counts for a preset, with per-table overrides and the derived tables filled in"""
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale '{scale}'. Allowed: {', '.join(SCALES)}")
+    counts = dict(SCALES[scale])
+    counts.update({table: int(n) for table, n in overrides.items() if n is not None})
+    services = counts['service_records']
+    counts.setdefault('customers', max(1, services // 4))
+    counts.setdefault('customer_vespas', max(1, counts['customers'] * 6 // 5))
+    counts.setdefault('invoices', max(1, services // 2))
+    counts.setdefault('appointments', max(1, services // 4))
+    return counts
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def _batches(rows, size=INSERT_BATCH):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class SyntheticDataGenerator:
+    """
+    Seeds benchmark rows table by table, committing after every batch so a large run
+    does not hold one huge transaction. Reference rows (users, categories, suppliers,
+    storage locations, vespa models, appointment slots) come from the DATABASE.txt seed data.
+    """
+
+    def __init__(self, connection, counts, seed=1, anchor=None, stdout=None):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.counts = counts
+        self.seed = seed
+        self.anchor = anchor or date.today()
+        self.stdout = stdout
+
+    def _rng(self, table):
+        return random.Random(f'{self.seed}:{table}')
+
+    def _ids(self, query, params=()):
+        self.cursor.execute(query, params)
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def _log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def _insert(self, table, columns, rows):
+        written = 0
+        for batch in _batches(rows):
+            written += bulk_insert(self.cursor, table, columns, batch)
+            self.connection.commit()
+        self._log(f'{table}: {written} rows')
+        return written
+
+    def _day(self, rng, days_back=730):
+        return self.anchor - timedelta(days=rng.randrange(days_back))
+
+    def _moment(self, rng, days_back=730):
+        return datetime.combine(self._day(rng, days_back), time(rng.randrange(8, 19), rng.randrange(60)))
+
+    def already_seeded(self):
+        self.cursor.execute("SELECT COUNT(*) FROM parts WHERE part_code LIKE 'BP-%'")
+        return self.cursor.fetchone()[0] > 0
+
+    def run(self):
+        users = self._ids("SELECT id FROM users ORDER BY id")
+        if not users:
+            raise ValueError('A users row is required (created_by columns)')
+        self.user_id = users[0]
+        self.cursor.execute("SELECT id, category_type FROM part_categories WHERE is_active = 1 ORDER BY id")
+        self.categories = [tuple(row) for row in self.cursor.fetchall()]
+        self.suppliers = self._ids("SELECT id FROM suppliers ORDER BY id")
+        self.locations = self._ids("SELECT id FROM storage_locations WHERE is_active = 1 ORDER BY id")
+        self.models = self._ids("SELECT id FROM vespa_models ORDER BY id")
+        self.cursor.execute("SELECT day_of_week, start_time FROM appointment_slots WHERE is_active = 1")
+        self.slots = {}
+        for day_of_week, start_time in self.cursor.fetchall():
+            self.slots.setdefault(day_of_week, []).append(start_time)
+        if not (self.categories and self.suppliers and self.locations and self.models):
+            raise ValueError('DATABASE.txt seed data (categories, suppliers, locations, vespa models) is missing')
+
+        self.seed_currency_rates()
+        part_ids = self.seed_parts()
+        self.seed_part_prices(part_ids)
+        self.seed_part_stock(part_ids)
+        self.seed_stock_movements(part_ids)
+        customer_ids = self.seed_customers()
+        vespas = self.seed_customer_vespas(customer_ids)
+        service_ids = self.seed_service_records(vespas)
+        self.seed_service_parts(service_ids, part_ids)
+        self.seed_invoices(customer_ids, service_ids)
+        self.seed_cash_transactions()
+        self.seed_appointments(vespas)
+
+    def seed_currency_rates(self, day=None):
+        ensure_currency_rates(self.cursor, day or self.anchor)
+        self.connection.commit()
+
+    def seed_parts(self):
+        rng = self._rng('parts')
+
+        def rows():
+            for n in range(1, self.counts['parts'] + 1):
+                category_id, category_type = rng.choice(self.categories)
+                accessory = category_type == 'ACCESSORY'
+                name = rng.choice(_ACCESSORY_NAMES if accessory else _PART_NAMES)
+                brand = rng.choice(_BRANDS)
+                yield (
+                    f'BP-{n:06d}', f'{name} {brand} {rng.randrange(100, 999)}', category_id,
+                    'ACCESSORY' if accessory else 'PART', f'{name} ({brand})', rng.randrange(2, 10),
+                    rng.randrange(50, 200), brand, f'M{rng.randrange(1, 60)}',
+                    rng.choice(_COLORS) if accessory else None, rng.choice(_SIZES) if accessory else None,
+                    1 if rng.random() < 0.97 else 0, self._moment(rng),
+                )
+        self._insert('parts', (
+            'part_code', 'part_name', 'category_id', 'part_type', 'description', 'min_stock_level',
+            'max_stock_level', 'brand', 'model', 'color', 'size', 'is_active', 'created_date'
+        ), rows())
+        return self._ids("SELECT id FROM parts WHERE part_code LIKE 'BP-%' ORDER BY part_code")
+
+    def seed_part_prices(self, part_ids):
+        rng = self._rng('part_prices')
+
+        def rows():
+            for part_id in part_ids:
+                purchase = round(rng.uniform(5, 4000), 2)
+                yield (
+                    part_id, rng.choice(self.suppliers), _weighted(rng, _CURRENCIES), purchase,
+                    round(purchase * rng.uniform(1.2, 1.8), 2), self._day(rng, 365), 1,
+                )
+        self._insert('part_prices', (
+            'part_id', 'supplier_id', 'currency_type', 'purchase_price', 'sale_price', 'effective_date', 'is_current'
+        ), rows())
+
+    def seed_part_stock(self, part_ids):
+        rng = self._rng('part_stock_locations')
+
+        def rows():
+            for part_id in part_ids:
+                for location_id in rng.sample(self.locations, min(len(self.locations), rng.randrange(1, 3))):
+                    stock = 0 if rng.random() < 0.1 else rng.randrange(1, 120)
+                    yield part_id, location_id, stock, rng.randrange(0, 3) if stock > 5 else 0
+        self._insert('part_stock_locations', (
+            'part_id', 'storage_location_id', 'current_stock', 'reserved_stock'
+        ), rows())
+
+    def seed_stock_movements(self, part_ids):
+        rng = self._rng('stock_movements')
+
+        def rows():
+            for _ in range(self.counts['stock_movements']):
+                movement_type = rng.choice(('IN', 'IN', 'OUT', 'OUT', 'OUT', 'ADJUSTMENT'))
+                reference_type = {'IN': 'PURCHASE', 'OUT': rng.choice(('SERVICE', 'SALE'))}.get(movement_type, 'ADJUSTMENT')
+                yield (
+                    rng.choice(part_ids), rng.choice(self.locations), movement_type, rng.randrange(1, 20),
+                    reference_type, rng.randrange(1, 100000), 'Benchmark', self.user_id, self._moment(rng),
+                )
+        self._insert('stock_movements', (
+            'part_id', 'storage_location_id', 'movement_type', 'quantity', 'reference_type', 'reference_id',
+            'notes', 'created_by', 'created_date'
+        ), rows())
+
+    def seed_customers(self):
+        rng = self._rng('customers')
+
+        def rows():
+            for n in range(1, self.counts['customers'] + 1):
+                first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+                city, district = rng.choice(_CITIES)
+                corporate = rng.random() < 0.1
+                yield (
+                    f'BC-{n:07d}', first, last, f'bc{n}@example.com', f'05{rng.randrange(30, 56)}{n:07d}',
+                    f'{district} Mah. No:{rng.randrange(1, 200)}', city, district,
+                    f'{rng.randrange(10 ** 9, 10 ** 10)}' if corporate else f'{rng.randrange(10 ** 10, 10 ** 11)}',
+                    'ACTIVE' if rng.random() < 0.95 else 'INACTIVE', 'CORPORATE' if corporate else 'INDIVIDUAL',
+                    self._moment(rng),
+                )
+        self._insert('customers', (
+            'customer_code', 'first_name', 'last_name', 'email', 'phone', 'address', 'city', 'district',
+            'tax_number', 'status', 'customer_type', 'created_date'
+        ), rows())
+        return self._ids("SELECT id FROM customers WHERE customer_code LIKE 'BC-%' ORDER BY customer_code")
+
+    def seed_customer_vespas(self, customer_ids):
+        rng = self._rng('customer_vespas')
+
+        def rows():
+            for n in range(1, self.counts['customer_vespas'] + 1):
+                # Every customer gets one vespa first, the rest go to random owners
+                customer_id = customer_ids[n - 1] if n <= len(customer_ids) else rng.choice(customer_ids)
+                yield (
+                    customer_id, rng.choice(self.models), f'{rng.randrange(1, 82):02d} BV {n:06d}',
+                    f'ZAPM{n:013d}', self._day(rng, 3650), rng.randrange(0, 60000), self._day(rng, 365),
+                )
+        self._insert('customer_vespas', (
+            'customer_id', 'vespa_model_id', 'license_plate', 'chassis_number', 'purchase_date',
+            'current_mileage', 'last_service_date'
+        ), rows())
+        self.cursor.execute("""
+            SELECT cv.id, cv.customer_id FROM customer_vespas cv
+            WHERE cv.license_plate LIKE '% BV %' ORDER BY cv.id
+        """)
+        return [tuple(row) for row in self.cursor.fetchall()]
+
+    def seed_service_records(self, vespas):
+        rng = self._rng('service_records')
+
+        def rows():
+            for n in range(1, self.counts['service_records'] + 1):
+                service_date = self._day(rng)
+                status = _weighted(rng, _SERVICE_STATUSES)
+                started = datetime.combine(service_date, time(rng.randrange(8, 17)))
+                yield (
+                    f'BS-{n:08d}', rng.choice(vespas)[0], rng.choice(_SERVICE_TYPES), service_date,
+                    rng.randrange(0, 60000), rng.choice(_TECHNICIANS), status, 'Benchmark servis kaydı',
+                    round(rng.uniform(0, 3000), 2), started,
+                    started + timedelta(hours=rng.randrange(1, 48)) if status == 'COMPLETED' else None,
+                )
+        self._insert('service_records', (
+            'service_number', 'customer_vespa_id', 'service_type', 'service_date', 'mileage_at_service',
+            'technician_name', 'status', 'description', 'labor_cost', 'start_date', 'completion_date'
+        ), rows())
+        return self._ids("SELECT id FROM service_records WHERE service_number LIKE 'BS-%' ORDER BY service_number")
+
+    def seed_service_parts(self, service_ids, part_ids):
+        rng = self._rng('service_parts')
+
+        def rows():
+            for service_id in service_ids:
+                for part_id in rng.sample(part_ids, min(len(part_ids), rng.randrange(0, 4))):
+                    yield service_id, part_id, rng.randrange(1, 4), round(rng.uniform(10, 2500), 2)
+        self._insert('service_parts', ('service_record_id', 'part_id', 'quantity', 'unit_price'), rows())
+
+    def seed_invoices(self, customer_ids, service_ids):
+        rng = self._rng('invoices')
+
+        def rows():
+            for n in range(1, self.counts['invoices'] + 1):
+                service = rng.random() < 0.6
+                subtotal = round(rng.uniform(100, 8000), 2)
+                tax = round(subtotal * 0.2, 2)
+                total = round(subtotal + tax, 2)
+                paid = total if rng.random() < 0.7 else round(total * rng.random(), 2)
+                invoice_date = self._day(rng)
+                yield (
+                    f'BI-{n:08d}', 'SERVICE' if service else 'SALE', rng.choice(customer_ids),
+                    rng.choice(service_ids) if service and service_ids else None, invoice_date,
+                    invoice_date + timedelta(days=30), subtotal, tax, total, paid,
+                    'PAID' if paid >= total else 'PENDING',
+                )
+        self._insert('invoices', (
+            'invoice_number', 'invoice_type', 'customer_id', 'service_record_id', 'invoice_date', 'due_date',
+            'subtotal', 'tax_amount', 'total_amount', 'paid_amount', 'status'
+        ), rows())
+
+    def seed_cash_transactions(self):
+        rng = self._rng('cash_transactions')
+
+        def rows():
+            for _ in range(self.counts['cash_transactions']):
+                income = rng.random() < 0.65
+                yield (
+                    self._day(rng), 'INCOME' if income else 'EXPENSE', rng.choice(_PAYMENT_METHODS),
+                    round(rng.uniform(20, 6000), 2), 'INVOICE' if income else rng.choice(('EXPENSE', 'SALARY', 'RENT')),
+                    'Benchmark', self.user_id,
+                )
+        self._insert('cash_transactions', (
+            'transaction_date', 'transaction_type', 'payment_method', 'amount', 'reference_type',
+            'description', 'created_by'
+        ), rows())
+
+    def seed_appointments(self, vespas):
+        rng = self._rng('appointments')
+        default_times = [time(hour) for hour in range(9, 18)]
+
+        def rows():
+            for n in range(1, self.counts['appointments'] + 1):
+                # Mostly around the anchor date: the past quarter and the coming month
+                appointment_date = self.anchor + timedelta(days=rng.randrange(-90, 31))
+                vespa_id, customer_id = rng.choice(vespas)
+                start_times = self.slots.get(appointment_date.weekday() + 1) or default_times
+                yield (
+                    f'BA-{n:08d}', customer_id, vespa_id, appointment_date, rng.choice(start_times),
+                    rng.choice(_SERVICE_TYPES), _weighted(rng, _APPOINTMENT_STATUSES), self.user_id,
+                )
+        self._insert('appointments', (
+            'appointment_number', 'customer_id', 'customer_vespa_id', 'appointment_date', 'appointment_time',
+            'service_type', 'status', 'created_by'
+        ), rows())
+
+
+def ensure_currency_rates(cursor, day):
+    """EUR/USD rows for `day`, so update_currency_rates_auto() does not go to the network"""
+    for code, buy, sell in (('EUR', 34.50, 34.80), ('USD', 32.10, 32.40)):
+        cursor.execute("SELECT COUNT(*) FROM currency_rates WHERE currency_code = ? AND rate_date = ?", (code, day))
+        if not cursor.fetchone()[0]:
+            cursor.execute(
+                "INSERT INTO currency_rates (currency_code, rate_date, buy_rate, sell_rate) VALUES (?, ?, ?, ?)",
+                (code, day, buy, sell)
+            )
+
+
+def table_counts(cursor, tables=('parts', 'part_stock_locations', 'stock_movements', 'customers', 'customer_vespas',
+                                 'service_records', 'service_parts', 'invoices', 'cash_transactions', 'appointments')):
+    """{table: COUNT(*)} recorded alongside benchmark results"""
+    counts = {}
+    for table in tables:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cursor.fetchone()[0]
+    return counts
@@ -1,3 +1,375 @@
-from django.test import TestCase
+import datetime
+import json
+import logging
+import os
+import shutil
+import tempfile
+from django.test import SimpleTestCase
+from core import database, fanout
+from core.db_backends import SqliteBackend, bootstrap_schema
+from core.fanout import fetch_parallel, gather
+from core.pagination import InvalidCursor, Keyset, encode_cursor
+from core.renderers import _default, dumps
+from core.reference_registry import reference_registry
+from core.result_cache import ResultCache, invalidate_cache
+from core.tsql import TranslationError, translate
 
-# Create your tests here.
+
+class RawSqliteTestCase(SimpleTestCase):
+    """
+    Runs against a fresh SQLite stand-in database built from DATABASE.txt.
+    The raw SQL backend and pool are swapped for the duration of the class, so get_db_connection()
+    and everything built on it (registries, caches) use the test database.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._tmpdir = tempfile.mkdtemp(prefix='vespa-test-')
+        cls._saved = (database._backend, database._pool)
+        database._backend = SqliteBackend({'ENGINE': 'sqlite', 'SQLITE_PATH': os.path.join(cls._tmpdir, 'raw.sqlite3')})
+        database._pool = None
+        connection = database.get_db_connection()
+        # The skipped-trigger warnings are covered by BootstrapSchemaTests
+        logging.disable(logging.WARNING)
+        try:
+            bootstrap_schema(connection)
+        finally:
+            logging.disable(logging.NOTSET)
+            connection.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        if database._pool is not None:
+            database._pool.close_all()
+        database._backend, database._pool = cls._saved
+        shutil.rmtree(cls._tmpdir, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        invalidate_cache()
+        for table in (reference_registry.storage_locations, reference_registry.vespa_models,
+                      reference_registry.part_categories, reference_registry.work_types):
+            table.invalidate()
+
+    @staticmethod
+    def insert(cursor, sql, params):
+        """Run an INSERT ... VALUES and return the new row's id"""
+        cursor.execute(sql.replace(' VALUES', ' OUTPUT INSERTED.id VALUES', 1), params)
+        return cursor.fetchone()[0]
+
+    @classmethod
+    def seed_stock(cls, cursor, stock):
+        """
+        A user (stock_movements.created_by), a STORE and a WAREHOUSE location, and one part per
+        (store quantity, warehouse quantity) entry of `stock` (None: no stock row there).
+        The warehouse rows are the older ones, so FIFO alone would pick them first.
+        Sets cls.store, cls.warehouse and cls.parts (part ids in `stock` order).
+        """
+        cls.insert(cursor, "INSERT INTO users (username, email, password_hash, full_name) VALUES (?, ?, ?, ?)",
+                   ('test-user', 'test-user@example.com', 'x', 'Test User'))
+        cls.store = cls.insert(
+            cursor, "INSERT INTO storage_locations (location_code, location_name, location_type) VALUES (?, ?, ?)",
+            ('T-STORE', 'Test Mağaza', 'STORE')
+        )
+        cls.warehouse = cls.insert(
+            cursor, "INSERT INTO storage_locations (location_code, location_name, location_type) VALUES (?, ?, ?)",
+            ('T-DEPO', 'Test Depo', 'WAREHOUSE')
+        )
+        category = cls.insert(cursor, "INSERT INTO part_categories (category_name) VALUES (?)", ('Test Kategori',))
+        cls.parts = []
+        for number, quantities in enumerate(stock, 1):
+            part_id = cls.insert(cursor, "INSERT INTO parts (part_code, part_name, category_id) VALUES (?, ?, ?)",
+                                 (f'T-PART-{number}', f'Test Parça {number}', category))
+            for location_id, quantity, created in zip((cls.store, cls.warehouse), quantities,
+                                                      ('2025-06-01 00:00:00', '2025-01-01 00:00:00')):
+                if quantity is not None:
+                    cursor.execute(
+                        """
+                        INSERT INTO part_stock_locations (part_id, storage_location_id, current_stock, created_date)
+                        VALUES (?, ?, ?, ?)
+                        """,
+                        (part_id, location_id, quantity, created)
+                    )
+            cls.parts.append(part_id)
+
+    def execute(self, sql, params=()):
+        """Run one statement on a committed connection; returns fetched rows for SELECTs"""
+        connection = database.get_db_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall() if cursor.description else None
+            connection.commit()
+            return rows
+        finally:
+            connection.close()
+
+
+class TsqlTranslationTests(SimpleTestCase):
+    """core.tsql: the T-SQL idioms the raw SQL code relies on"""
+
+    def single(self, sql):
+        steps = translate(sql)
+        self.assertEqual(len(steps), 1)
+        return steps[0]
+
+    def test_top_literal_becomes_limit(self):
+        step = self.single("SELECT TOP 5 id FROM parts ORDER BY id")
+        self.assertEqual(step.sql, 'SELECT id FROM parts ORDER BY id LIMIT 5')
+
+    def test_top_parameter_moves_to_the_end(self):
+        step = self.single("SELECT TOP (?) id FROM parts WHERE id > ?")
+        self.assertEqual(step.sql, 'SELECT id FROM parts WHERE id > ? LIMIT ?')
+        # Parameters are rebound in SQLite order
+        self.assertEqual(step.bind((10, 3)), (3, 10))
+
+    def test_offset_fetch_becomes_limit_offset(self):
+        step = self.single("SELECT id FROM parts ORDER BY id OFFSET ? ROWS FETCH NEXT ? ROWS ONLY")
+        self.assertEqual(step.sql, 'SELECT id FROM parts ORDER BY id LIMIT ? OFFSET ?')
+        self.assertEqual(step.bind((40, 20)), (20, 40))
+
+    def test_isnull_getdate_dateadd(self):
+        step = self.single("SELECT ISNULL(x, 0), GETDATE(), DATEADD(day, 1, CAST(? AS DATE)) FROM t")
+        self.assertIn('IFNULL(x, 0)', step.sql)
+        self.assertIn("datetime('now', 'localtime')", step.sql)
+        self.assertIn("datetime(date(?), (1) || ' days')", step.sql)
+
+    def test_output_inserted_becomes_returning(self):
+        step = self.single("INSERT INTO t (a) OUTPUT INSERTED.id VALUES (?)")
+        self.assertEqual(step.sql, 'INSERT INTO t(a) VALUES (?) RETURNING id')
+
+    def test_string_concatenation_brackets_schema_and_hints(self):
+        self.assertEqual(
+            self.single("SELECT c.first_name + ' ' + c.last_name FROM customers c").sql,
+            "SELECT c.first_name || ' ' || c.last_name FROM customers c"
+        )
+        self.assertEqual(self.single("SELECT [name] FROM dbo.parts").sql, 'SELECT "name" FROM parts')
+        self.assertEqual(self.single("SELECT a FROM t WITH (NOLOCK)").sql, 'SELECT a FROM t')
+        self.assertEqual(
+            self.single("UPDATE t WITH (ROWLOCK) SET a = ? WHERE id = ?").sql,
+            'UPDATE t SET a = ? WHERE id = ?'
+        )
+
+    def test_multi_statement_batch_splits_parameters(self):
+        first, second = translate("SELECT ? as a; SELECT ? as b, ? as c")
+        self.assertEqual(first.bind((1, 2, 3)), (1,))
+        self.assertEqual(second.bind((1, 2, 3)), (2, 3))
+
+    def test_if_not_exists_becomes_conditional_step(self):
+        step = self.single("IF NOT EXISTS (SELECT 1 FROM t WHERE id = ?) INSERT INTO t (id) VALUES (?)")
+        self.assertEqual(step.kind, 'if')
+        self.assertEqual(len(step.then_steps), 1)
+
+    def test_alter_table_add_computed_column_is_virtual(self):
+        step = self.single("ALTER TABLE invoices ADD balance_due AS (total_amount - paid_amount) PERSISTED")
+        self.assertEqual(
+            step.sql,
+            'ALTER TABLE invoices ADD COLUMN balance_due GENERATED ALWAYS AS (total_amount - paid_amount) VIRTUAL'
+        )
+
+    def test_triggers_are_rejected(self):
+        with self.assertRaises(TranslationError):
+            translate("CREATE TRIGGER tr_x ON t AFTER INSERT AS BEGIN UPDATE t SET a = 1; END")
+
+
+class SqliteCursorTests(SimpleTestCase):
+    """SqliteCursor: pyodbc behaviour of translated statements"""
+
+    def setUp(self):
+        self._tmpdir = tempfile.mkdtemp(prefix='vespa-test-')
+        self.connection = SqliteBackend({'SQLITE_PATH': os.path.join(self._tmpdir, 'raw.sqlite3')}).connect()
+        self.connection.execute("CREATE TABLE t (id INT IDENTITY(1,1) PRIMARY KEY, a NVARCHAR(10))")
+
+    def tearDown(self):
+        self.connection.close()
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def test_output_inserted_returns_the_new_id(self):
+        cursor = self.connection.cursor()
+        cursor.execute("INSERT INTO t (a) OUTPUT INSERTED.id VALUES (?)", ('x',))
+        self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_nextset_walks_result_sets_of_a_batch(self):
+        cursor = self.connection.cursor()
+        cursor.execute("INSERT INTO t (a) VALUES (?), (?)", ('x', 'y'))
+        cursor.execute("SELECT COUNT(*) FROM t; SELECT TOP (?) a FROM t ORDER BY id DESC", (1,))
+        self.assertEqual(cursor.fetchone()[0], 2)
+        self.assertTrue(cursor.nextset())
+        self.assertEqual([row[0] for row in cursor.fetchall()], ['y'])
+        self.assertFalse(cursor.nextset())
+
+
+class BootstrapSchemaTests(RawSqliteTestCase):
+    """DATABASE.txt on SQLite: tables exist, triggers are skipped with a warning"""
+
+    def test_schema_tables_exist(self):
+        rows = self.execute("SELECT COUNT(*) FROM sys.tables WHERE name IN ('customers', 'service_records', 'parts')")
+        self.assertEqual(rows[0][0], 3)
+
+    def test_information_schema_columns_lists_computed_columns(self):
+        rows = self.execute(
+            "SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = 'invoices' AND COLUMN_NAME = 'balance_due'"
+        )
+        self.assertEqual(rows[0][0], 1)
+
+    def test_skipped_trigger_is_logged(self):
+        connection = database.get_db_connection()
+        try:
+            with self.assertLogs('core.db_backends', 'WARNING') as logs:
+                bootstrap_schema(connection)
+        finally:
+            connection.close()
+        self.assertTrue(any('tr_part_prices_update' in line for line in logs.output))
+
+    def test_only_triggers_are_skipped(self):
+        # A fresh database: on this class's one every CREATE fails as already existing
+        backend = SqliteBackend({'ENGINE': 'sqlite', 'SQLITE_PATH': os.path.join(self._tmpdir, 'fresh.sqlite3')})
+        connection = backend.connect()
+        try:
+            with self.assertLogs('core.db_backends', 'WARNING'):
+                applied, skipped = bootstrap_schema(connection)
+            self.assertEqual([(head, reason) for head, reason in skipped if 'CREATE TRIGGER' not in head.upper()], [])
+            cursor = connection.cursor()
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name = 'IX_invoices_balance_due'")
+            self.assertEqual(cursor.fetchone()[0], 1)
+        finally:
+            connection.close()
+
+
+class ResultCacheTests(RawSqliteTestCase):
+    """core.result_cache: invalidate_cache reaches the caches of other workers"""
+
+    def test_invalidation_is_shared_through_data_versions(self):
+        # A second cache stands in for another worker's process
+        other_worker = ResultCache(ttl=60, stale_ttl=60)
+        self.assertEqual(other_worker.get('key', lambda: 1, tags=('test',)), 1)
+        self.assertEqual(other_worker.get('key', lambda: 2, tags=('test',)), 1)
+
+        invalidate_cache('test')
+        self.assertEqual(other_worker.get('key', lambda: 3, tags=('test',)), 3)
+        self.assertEqual(
+            self.execute("SELECT version FROM data_versions WHERE table_name = 'result_cache:test'")[0][0], 1
+        )
+
+    def test_other_tags_are_kept(self):
+        other_worker = ResultCache(ttl=60, stale_ttl=60)
+        other_worker.get('key', lambda: 1, tags=('kept',))
+        invalidate_cache('unrelated')
+        self.assertEqual(other_worker.get('key', lambda: 2, tags=('kept',)), 1)
+
+
+class FanoutTests(RawSqliteTestCase):
+    """core.fanout: caller transactions stay visible, workers stay under the pool size"""
+
+    COUNT_TEST_SUPPLIERS = ("SELECT COUNT(*) FROM suppliers WHERE supplier_name LIKE 'Fanout%'", ())
+
+    def test_open_handle_runs_inline_and_sees_uncommitted_rows(self):
+        with database.request_connection_scope():
+            connection = database.get_db_connection()
+            try:
+                connection.cursor().execute("INSERT INTO suppliers (supplier_name) VALUES ('Fanout Uncommitted')")
+                rows = fetch_parallel({'a': self.COUNT_TEST_SUPPLIERS, 'b': self.COUNT_TEST_SUPPLIERS}, one=True)
+            finally:
+                connection.rollback()
+                connection.close()
+        self.assertEqual((rows['a'][0], rows['b'][0]), (1, 1))
+
+    def test_request_connection_is_released_before_fanning_out(self):
+        with database.request_connection_scope() as scope:
+            connection = database.get_db_connection()
+            connection.close()
+            self.assertIsNotNone(scope.connection)
+            results = gather({
+                'a': lambda: database.get_current_scope(),
+                'b': lambda: database.get_current_scope(),
+            })
+            self.assertIsNone(scope.connection)
+        # The calls ran on workers, outside the request scope
+        self.assertEqual(results, {'a': None, 'b': None})
+
+    def test_workers_stay_below_the_pool_size(self):
+        gather({'a': lambda: 1, 'b': lambda: 2})
+        self.assertLess(fanout._executor._max_workers, database.get_pool().max_size)
+
+
+class RenderersTests(SimpleTestCase):
+    """core.renderers: aware UTC datetimes end in 'Z' with orjson and with the stdlib fallback"""
+
+    UTC = datetime.datetime(2026, 1, 5, 9, 30, tzinfo=datetime.timezone.utc)
+    ISTANBUL = datetime.datetime(2026, 1, 5, 12, 30, tzinfo=datetime.timezone(datetime.timedelta(hours=3)))
+
+    def test_dumps_renders_utc_as_z(self):
+        self.assertEqual(dumps({'at': self.UTC}), b'{"at":"2026-01-05T09:30:00Z"}')
+        self.assertEqual(dumps({'at': self.ISTANBUL}), b'{"at":"2026-01-05T12:30:00+03:00"}')
+
+    @staticmethod
+    def stdlib_dumps(value):
+        return json.dumps(value, default=_default, separators=(',', ':'))
+
+    def test_stdlib_fallback_renders_utc_as_z(self):
+        self.assertEqual(self.stdlib_dumps({'at': self.UTC}), '{"at":"2026-01-05T09:30:00Z"}')
+        self.assertEqual(self.stdlib_dumps({'at': self.ISTANBUL}), '{"at":"2026-01-05T12:30:00+03:00"}')
+        self.assertEqual(self.stdlib_dumps({'on': datetime.date(2026, 1, 5)}), '{"on":"2026-01-05"}')
+
+
+class KeysetPaginationTests(RawSqliteTestCase):
+    """core.pagination: pages over equal sort keys, tampered cursors, the last page"""
+
+    KEYSET = Keyset('pagination_items', ('name', 'ASC', 'name'), ('id', 'ASC', 'id'))
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        connection = database.get_db_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("CREATE TABLE pagination_items (id INT IDENTITY(1,1) PRIMARY KEY, name NVARCHAR(20) NOT NULL)")
+            # Mostly equal names: only the id tells the rows apart
+            for name in ('b', 'a', 'b', 'b', 'a', 'b', 'c'):
+                cursor.execute("INSERT INTO pagination_items (name) VALUES (?)", (name,))
+            connection.commit()
+        finally:
+            connection.close()
+
+    def fetch_page(self, token, limit):
+        seek, params = self.KEYSET.seek(token)
+        where = f"WHERE {seek}" if seek else ""
+        rows = self.execute(
+            f"SELECT TOP (?) id, name FROM pagination_items {where} ORDER BY {self.KEYSET.order_by()}",
+            [limit + 1] + params
+        )
+        return self.KEYSET.page([{'id': row[0], 'name': row[1]} for row in rows], limit)
+
+    def test_pages_break_ties_on_id_without_gaps_or_repeats(self):
+        seen, token, pages = [], None, 0
+        while True:
+            rows, token, has_more = self.fetch_page(token, 2)
+            seen.extend((row['name'], row['id']) for row in rows)
+            pages += 1
+            if not has_more:
+                break
+        self.assertEqual(seen, [('a', 2), ('a', 5), ('b', 1), ('b', 3), ('b', 4), ('b', 6), ('c', 7)])
+        self.assertEqual(pages, 4)
+
+    def test_last_page_has_no_cursor(self):
+        rows, token, has_more = self.fetch_page(None, 7)
+        self.assertEqual((len(rows), token, has_more), (7, None, False))
+        # A full page that happens to end exactly at the last row
+        _, token, _ = self.fetch_page(None, 5)
+        rows, token, has_more = self.fetch_page(token, 2)
+        self.assertEqual(([row['id'] for row in rows], token, has_more), ([6, 7], None, False))
+
+    def test_tampered_cursors_are_rejected(self):
+        valid = encode_cursor('pagination_items', 'b', 3)
+        for token in (
+            'not-a-cursor',
+            valid[:-3],
+            encode_cursor('customers', 'b', 3),  # another listing's cursor
+            encode_cursor('pagination_items', 'b'),  # wrong number of values
+            'W10',  # an empty list
+        ):
+            with self.subTest(token=token):
+                with self.assertRaises(InvalidCursor):
+                    self.KEYSET.seek(token)
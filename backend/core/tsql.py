@@ -0,0 +1,938 @@
+"""
+T-SQL -> SQLite translation for the raw SQL helpers
+Covers the idioms this codebase relies on (TOP, OUTPUT INSERTED, ISNULL, GETDATE, MERGE,
+OFFSET/FETCH, STRING_AGG, ...). Anything not recognised passes through unchanged.
+"""
+import re
+from functools import lru_cache
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>[Nn]?'(?:[^']|'')*')
+  | (?P<bracket>\[[^\]]*\])
+  | (?P<ident>"[^"]*")
+  | (?P<number>\d+(?:\.\d+)?)
+  | (?P<param>\?)
+  | (?P<word>[@#]*[A-Za-z_][A-Za-z0-9_$#@]*)
+  | (?P<op><>|<=|>=|!=|\|\||[-+*/%=<>(),.;!&|^~])
+  | (?P<other>.)
+""", re.S | re.X)
+
+STATEMENT_KEYWORDS = {
+    'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'MERGE', 'CREATE', 'DROP', 'ALTER',
+    'BEGIN', 'WITH', 'IF', 'SET', 'DECLARE', 'PRINT', 'RETURN', 'EXEC', 'EXECUTE',
+}
+TABLE_HINTS = {
+    'NOLOCK', 'UPDLOCK', 'ROWLOCK', 'HOLDLOCK', 'READPAST', 'XLOCK', 'TABLOCK',
+    'TABLOCKX', 'PAGLOCK', 'READCOMMITTED', 'REPEATABLEREAD', 'SERIALIZABLE', 'NOWAIT',
+}
+STRING_FUNCTIONS = {
+    'FORMAT', 'RIGHT', 'LEFT', 'SUBSTRING', 'DATENAME', 'UPPER', 'LOWER', 'LTRIM',
+    'RTRIM', 'TRIM', 'REPLACE', 'CONCAT', 'STRING_AGG', 'REPLICATE', 'STUFF',
+}
+TEXT_TYPES = {'VARCHAR', 'NVARCHAR', 'CHAR', 'NCHAR', 'TEXT', 'NTEXT', 'SYSNAME'}
+INTEGER_TYPES = {'INT', 'INTEGER', 'BIGINT', 'SMALLINT', 'TINYINT', 'BIT'}
+REAL_TYPES = {'DECIMAL', 'NUMERIC', 'MONEY', 'SMALLMONEY', 'FLOAT', 'REAL'}
+DATETIME_TYPES = {'DATETIME', 'DATETIME2', 'SMALLDATETIME', 'DATETIMEOFFSET'}
+
+_DATE_UNITS = {
+    'YEAR': ('years', 1), 'YY': ('years', 1), 'YYYY': ('years', 1),
+    'QUARTER': ('months', 3), 'QQ': ('months', 3), 'Q': ('months', 3),
+    'MONTH': ('months', 1), 'MM': ('months', 1), 'M': ('months', 1),
+    'WEEK': ('days', 7), 'WK': ('days', 7), 'WW': ('days', 7),
+    'DAY': ('days', 1), 'DD': ('days', 1), 'D': ('days', 1), 'DAYOFYEAR': ('days', 1), 'DY': ('days', 1),
+    'HOUR': ('hours', 1), 'HH': ('hours', 1),
+    'MINUTE': ('minutes', 1), 'MI': ('minutes', 1), 'N': ('minutes', 1),
+    'SECOND': ('seconds', 1), 'SS': ('seconds', 1), 'S': ('seconds', 1),
+}
+_DATEPART_FORMATS = {
+    'years': '%Y', 'months': '%m', 'days': '%d', 'hours': '%H', 'minutes': '%M', 'seconds': '%S',
+}
+_NET_DATE_FORMAT = re.compile(r'yyyy|yy|MM|dd|HH|hh|mm|ss')
+_NET_DATE_CODES = {'yyyy': '%Y', 'yy': '%y', 'MM': '%m', 'dd': '%d', 'HH': '%H', 'hh': '%I', 'mm': '%M', 'ss': '%S'}
+_MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+                'August', 'September', 'October', 'November', 'December']
+_DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
+
+class TranslationError(Exception):
+    """Raised for T-SQL constructs that have no SQLite equivalent here"""
+
+
+class Token:
+    __slots__ = ('kind', 'text', 'param')
+
+    def __init__(self, kind, text, param=None):
+        self.kind = kind
+        self.text = text
+        self.param = param
+
+    @property
+    def upper(self):
+        return self.text.upper() if self.kind == 'word' else None
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.text!r})"
+
+
+class Step:
+    """One SQLite statement plus the positions of the original parameters it consumes"""
+    __slots__ = ('kind', 'sql', 'params', 'then_steps', 'else_steps')
+
+    def __init__(self, kind, sql=None, params=(), then_steps=(), else_steps=()):
+        self.kind = kind  # exec | exec_if_no_rows | if
+        self.sql = sql
+        self.params = params
+        self.then_steps = then_steps
+        self.else_steps = else_steps
+
+    def bind(self, params):
+        return tuple(params[i] for i in self.params)
+
+    def __repr__(self):
+        return f"Step({self.kind}, {self.sql!r}, {self.params})"
+
+
+# ===== TOKENS =====
+
+def tokenize(sql):
+    """Significant tokens only; '?' tokens remember their position in the original statement"""
+    tokens = []
+    param_index = 0
+    for match in _TOKEN_RE.finditer(sql):
+        kind = match.lastgroup
+        text = match.group()
+        if kind in ('ws', 'comment'):
+            continue
+        if kind == 'string' and text[0] in 'Nn':
+            text = text[1:]
+        elif kind == 'bracket':
+            kind, text = 'ident', '"' + text[1:-1] + '"'
+        elif kind == 'param':
+            tokens.append(Token('param', '?', param_index))
+            param_index += 1
+            continue
+        tokens.append(Token(kind, text))
+
+    # Drop schema prefixes: dbo.table / "dbo"."table"
+    cleaned = []
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+        if (tok.text.lower() in ('dbo', '"dbo"') and i + 1 < len(tokens)
+                and tokens[i + 1].text == '.' and (not cleaned or cleaned[-1].text != '.')):
+            i += 2
+            continue
+        cleaned.append(tok)
+        i += 1
+    return cleaned
+
+
+def _fragment(sql):
+    """Tokens for a literal SQLite snippet (never contains parameters)"""
+    return tokenize(sql)
+
+
+_SPACED_KEYWORDS = {
+    'SELECT', 'DISTINCT', 'FROM', 'WHERE', 'AND', 'OR', 'NOT', 'IN', 'AS', 'ON', 'JOIN', 'BY',
+    'VALUES', 'EXISTS', 'CASE', 'WHEN', 'THEN', 'ELSE', 'SET', 'UNION', 'ALL', 'RETURNING',
+    'LIMIT', 'OFFSET', 'HAVING', 'DEFAULT', 'CHECK', 'KEY', 'REFERENCES', 'USING', 'IS', 'LIKE',
+}
+
+
+def render(tokens):
+    parts = []
+    prev = None
+    for tok in tokens:
+        text = tok.text
+        if prev is not None:
+            no_space = (
+                text in (')', ',', '.')
+                or prev.text in ('(', '.')
+                or (text == '(' and prev.kind in ('word', 'ident') and prev.upper not in _SPACED_KEYWORDS)
+            )
+            if not no_space:
+                parts.append(' ')
+        parts.append(text)
+        prev = tok
+    return ''.join(parts)
+
+
+def _param_order(tokens):
+    return tuple(tok.param for tok in tokens if tok.kind == 'param')
+
+
+def _match(tokens, i):
+    """Index of the ')' closing the '(' at position i"""
+    depth = 0
+    for j in range(i, len(tokens)):
+        text = tokens[j].text
+        if tokens[j].kind != 'op':
+            continue
+        if text == '(':
+            depth += 1
+        elif text == ')':
+            depth -= 1
+            if depth == 0:
+                return j
+    raise TranslationError("Unbalanced parentheses")
+
+
+def _split_top(tokens, separator=','):
+    """Split on a separator at paren depth 0"""
+    parts, current, depth = [], [], 0
+    for tok in tokens:
+        if tok.kind == 'op' and tok.text == '(':
+            depth += 1
+        elif tok.kind == 'op' and tok.text == ')':
+            depth -= 1
+        if depth == 0 and tok.kind == 'op' and tok.text == separator:
+            parts.append(current)
+            current = []
+            continue
+        current.append(tok)
+    parts.append(current)
+    return parts
+
+
+def _find_top(tokens, words, start=0):
+    """First depth-0 index of any keyword in words, or -1"""
+    depth = 0
+    for j in range(start, len(tokens)):
+        tok = tokens[j]
+        if tok.kind == 'op' and tok.text == '(':
+            depth += 1
+        elif tok.kind == 'op' and tok.text == ')':
+            depth -= 1
+        elif depth == 0 and tok.upper in words:
+            return j
+    return -1
+
+
+def _is_call(tokens, i):
+    return (tokens[i].kind == 'word' and i + 1 < len(tokens)
+            and tokens[i + 1].kind == 'op' and tokens[i + 1].text == '(')
+
+
+def _string_literal(text):
+    return Token('string', "'" + text.replace("'", "''") + "'")
+
+
+def _literal_value(tokens):
+    if len(tokens) == 1 and tokens[0].kind == 'string':
+        return tokens[0].text[1:-1].replace("''", "'")
+    return None
+
+
+# ===== EXPRESSIONS =====
+
+def _is_stringy_call(tokens, i):
+    """tokens[i] starts a call that yields text (FORMAT(...), CAST(x AS VARCHAR), ...)"""
+    if not _is_call(tokens, i):
+        return False
+    name = tokens[i].upper
+    if name in STRING_FUNCTIONS:
+        return True
+    end = _match(tokens, i + 1)
+    inner = tokens[i + 2:end]
+    if name in ('CAST', 'CONVERT'):
+        return any(tok.upper in TEXT_TYPES for tok in inner)
+    if name in ('ISNULL', 'COALESCE'):
+        return any(tok.kind == 'string' for tok in inner)
+    return False
+
+
+def _concat_operators(tokens):
+    """Positions of depth-0 '+' operators that concatenate strings"""
+    positions = set()
+    opener = {}
+    stack = []
+    for j, tok in enumerate(tokens):
+        if tok.kind == 'op' and tok.text == '(':
+            stack.append(j)
+        elif tok.kind == 'op' and tok.text == ')' and stack:
+            opener[j] = stack.pop()
+    depth = 0
+    for j, tok in enumerate(tokens):
+        if tok.kind == 'op' and tok.text == '(':
+            depth += 1
+        elif tok.kind == 'op' and tok.text == ')':
+            depth -= 1
+        elif depth == 0 and tok.kind == 'op' and tok.text == '+' and 0 < j < len(tokens) - 1:
+            left, right = tokens[j - 1], tokens[j + 1]
+            stringy = left.kind == 'string' or right.kind == 'string'
+            if not stringy and left.text == ')' and j - 1 in opener:
+                start = opener[j - 1] - 1
+                stringy = start >= 0 and _is_stringy_call(tokens, start)
+            if not stringy:
+                stringy = _is_stringy_call(tokens, j + 1)
+            if stringy:
+                positions.add(j)
+    return positions
+
+
+def _wrap(tokens):
+    return [Token('op', '(')] + tokens + [Token('op', ')')]
+
+
+def _date_unit(tokens):
+    unit = tokens[0].text.strip('"\'').upper() if tokens else ''
+    if unit not in _DATE_UNITS:
+        raise TranslationError(f"Unsupported date part: {unit}")
+    return _DATE_UNITS[unit]
+
+
+def _call(name, *args):
+    out = [Token('word', name), Token('op', '(')]
+    for k, arg in enumerate(args):
+        if k:
+            out.append(Token('op', ','))
+        out.extend(arg)
+    out.append(Token('op', ')'))
+    return out
+
+
+def _fn_dateadd(args):
+    unit, factor = _date_unit(args[0])
+    amount = _wrap(args[1]) if factor == 1 else _wrap(_wrap(args[1]) + [Token('op', '*'), Token('number', str(factor))])
+    modifier = amount + [Token('op', '||'), _string_literal(' ' + unit)]
+    if unit in ('hours', 'minutes', 'seconds'):
+        # DATEADD on a TIME value stays a TIME
+        return _fragment('(CASE WHEN length(') + args[2] + _fragment(') <= 8 THEN') + \
+            _call('time', args[2], modifier) + [Token('word', 'ELSE')] + _call('datetime', args[2], modifier) + \
+            _fragment('END)')
+    return _call('datetime', args[2], modifier)
+
+
+def _fn_datediff(args):
+    unit, factor = _date_unit(args[0])
+    start, end = args[1], args[2]
+    if unit == 'years':
+        return _fragment("(CAST(strftime('%Y',") + end + _fragment(") AS INTEGER) - CAST(strftime('%Y',") + start + _fragment(") AS INTEGER))")
+    if unit == 'months':
+        return (_fragment("((CAST(strftime('%Y',") + end + _fragment(") AS INTEGER) - CAST(strftime('%Y',") + start
+                + _fragment(") AS INTEGER)) * 12 + CAST(strftime('%m',") + end + _fragment(") AS INTEGER) - CAST(strftime('%m',")
+                + start + _fragment(") AS INTEGER))"))
+    multiplier = {'days': '1', 'hours': '24', 'minutes': '1440', 'seconds': '86400'}[unit]
+    if unit == 'days':
+        diff = _fragment("(julianday(date(") + end + _fragment(")) - julianday(date(") + start + _fragment(")))")
+    else:
+        diff = _fragment("(julianday(") + end + _fragment(") - julianday(") + start + _fragment("))")
+    expr = diff + _fragment(f"* {multiplier}") if factor == 1 else diff + _fragment(f"/ {factor}")
+    return _fragment("CAST(") + expr + _fragment("AS INTEGER)")
+
+
+def _fn_datepart(args):
+    unit_name = args[0][0].text.upper() if args[0] else ''
+    if unit_name in ('WEEKDAY', 'DW', 'W'):
+        return _fragment("(CAST(strftime('%w',") + args[1] + _fragment(") AS INTEGER) + 1)")
+    unit, _ = _date_unit(args[0])
+    return _strftime_int(_DATEPART_FORMATS[unit], args[1])
+
+
+def _fn_datename(args):
+    unit_name = args[0][0].text.upper() if args[0] else ''
+    if unit_name in ('MONTH', 'MM', 'M'):
+        whens = ' '.join(f"WHEN '{k + 1:02d}' THEN '{name}'" for k, name in enumerate(_MONTH_NAMES))
+        return _fragment("(CASE strftime('%m',") + args[1] + _fragment(f") {whens} END)")
+    if unit_name in ('WEEKDAY', 'DW'):
+        whens = ' '.join(f"WHEN '{k}' THEN '{name}'" for k, name in enumerate(_DAY_NAMES))
+        return _fragment("(CASE strftime('%w',") + args[1] + _fragment(f") {whens} END)")
+    return _fragment("CAST(") + _fn_datepart(args) + _fragment("AS TEXT)")
+
+
+def _strftime_int(fmt, expr):
+    return _fragment(f"CAST(strftime('{fmt}',") + expr + _fragment(") AS INTEGER)")
+
+
+def _fn_format(args):
+    pattern = _literal_value(args[1]) if len(args) > 1 else None
+    if pattern is None:
+        raise TranslationError("FORMAT needs a literal pattern")
+    if re.fullmatch(r'0+', pattern):
+        return _call('printf', [_string_literal(f'%0{len(pattern)}d')], args[0])
+    if re.fullmatch(r'#*0*(\.0+)?', pattern):
+        decimals = len(pattern.split('.')[1]) if '.' in pattern else 0
+        return _call('printf', [_string_literal(f'%.{decimals}f')], args[0])
+    converted = _NET_DATE_FORMAT.sub(lambda m: _NET_DATE_CODES[m.group()], pattern)
+    return _call('strftime', [_string_literal(converted)], args[0])
+
+
+def _cast(expr, type_tokens):
+    type_name = type_tokens[0].upper if type_tokens else None
+    if type_name == 'DATE':
+        return _call('date', expr)
+    if type_name in DATETIME_TYPES:
+        return _call('datetime', expr)
+    if type_name == 'TIME':
+        return _call('time', expr)
+    if type_name in TEXT_TYPES:
+        return _fragment('CAST(') + expr + _fragment('AS TEXT)')
+    if type_name in INTEGER_TYPES:
+        return _fragment('CAST(') + expr + _fragment('AS INTEGER)')
+    if type_name in REAL_TYPES:
+        return _fragment('CAST(') + expr + _fragment('AS REAL)')
+    return _fragment('CAST(') + expr + [Token('word', 'AS')] + type_tokens + [Token('op', ')')]
+
+
+def _fn_cast(raw_inner):
+    pos = len(raw_inner) - 1
+    while pos >= 0 and raw_inner[pos].upper != 'AS':
+        pos -= 1
+    if pos < 0:
+        raise TranslationError("CAST without AS")
+    return _cast(_rewrite(raw_inner[:pos]), raw_inner[pos + 1:])
+
+
+def _fn_convert(raw_inner):
+    parts = _split_top(raw_inner)
+    return _cast(_rewrite(parts[1]), parts[0])
+
+
+def _fn_object_id(args):
+    name = _literal_value(args[0]) or ''
+    name = name.replace('[', '').replace(']', '').split('.')[-1]
+    return _fragment("(SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name =") + \
+        [_string_literal(name)] + _fragment(")")
+
+
+def _fn_right(args):
+    return _call('substr', args[0], [Token('op', '-')] + _wrap(args[1]))
+
+
+def _fn_left(args):
+    return _call('substr', args[0], [Token('number', '1')], args[1])
+
+
+def _fn_iif(args):
+    return [Token('word', 'CASE'), Token('word', 'WHEN')] + args[0] + [Token('word', 'THEN')] + args[1] + \
+        [Token('word', 'ELSE')] + args[2] + [Token('word', 'END')]
+
+
+def _fn_concat(args):
+    out = [Token('op', '(')]
+    for k, arg in enumerate(args):
+        if k:
+            out.append(Token('op', '||'))
+        out.extend(_call('IFNULL', arg, [_string_literal('')]))
+    out.append(Token('op', ')'))
+    return out
+
+
+def _fn_checksum(args):
+    if any('randomblob' in tok.text for tok in args[0]):
+        return _fragment('random()')
+    return _call('abs', _fragment("CAST(('0x' ||") + _call('hex', args[0]) + _fragment(") AS INTEGER)"))
+
+
+def _renamed(name):
+    return lambda args: _call(name, *args)
+
+
+_NOW_LOCAL = "datetime('now', 'localtime')"
+
+_FUNCTIONS = {
+    'ISNULL': _renamed('IFNULL'),
+    'LEN': _renamed('LENGTH'),
+    'SUBSTRING': _renamed('substr'),
+    'STRING_AGG': _renamed('group_concat'),
+    'GETDATE': lambda args: _fragment(_NOW_LOCAL),
+    'SYSDATETIME': lambda args: _fragment(_NOW_LOCAL),
+    'GETUTCDATE': lambda args: _fragment("datetime('now')"),
+    'SYSUTCDATETIME': lambda args: _fragment("datetime('now')"),
+    'NEWID': lambda args: _fragment('lower(hex(randomblob(16)))'),
+    'SCOPE_IDENTITY': lambda args: _fragment('last_insert_rowid()'),
+    'CHECKSUM': _fn_checksum,
+    'RIGHT': _fn_right,
+    'LEFT': _fn_left,
+    'YEAR': lambda args: _strftime_int('%Y', args[0]),
+    'MONTH': lambda args: _strftime_int('%m', args[0]),
+    'DAY': lambda args: _strftime_int('%d', args[0]),
+    'DATEADD': _fn_dateadd,
+    'DATEDIFF': _fn_datediff,
+    'DATEPART': _fn_datepart,
+    'DATENAME': _fn_datename,
+    'FORMAT': _fn_format,
+    'OBJECT_ID': _fn_object_id,
+    'IIF': _fn_iif,
+    'CONCAT': _fn_concat,
+}
+# Handlers that need the raw (un-split) argument tokens
+_RAW_FUNCTIONS = {
+    'CAST': _fn_cast,
+    'TRY_CAST': _fn_cast,
+    'CONVERT': _fn_convert,
+    'TRY_CONVERT': _fn_convert,
+}
+
+_CATALOG_VIEWS = {
+    ('SYS', 'TABLES'): "(SELECT name, name AS object_id, 'U' AS type FROM sqlite_master WHERE type = 'table')",
+    ('SYS', 'OBJECTS'): "(SELECT name, name AS object_id, CASE type WHEN 'table' THEN 'U' WHEN 'view' THEN 'V' ELSE type END AS type FROM sqlite_master)",
+    ('INFORMATION_SCHEMA', 'TABLES'): "(SELECT name AS TABLE_NAME, 'dbo' AS TABLE_SCHEMA, CASE type WHEN 'table' THEN 'BASE TABLE' ELSE 'VIEW' END AS TABLE_TYPE FROM sqlite_master WHERE type IN ('table', 'view'))",
+    ('INFORMATION_SCHEMA', 'COLUMNS'): "(SELECT m.name AS TABLE_NAME, 'dbo' AS TABLE_SCHEMA, c.name AS COLUMN_NAME, c.type AS DATA_TYPE FROM sqlite_master m JOIN pragma_table_xinfo(m.name) c WHERE m.type IN ('table', 'view'))",
+}
+
+
+def _rewrite(tokens):
+    """Rewrite one scope (a statement or parenthesised group) and everything nested in it"""
+    concat = _concat_operators(tokens)
+    out = []
+    i = 0
+    n = len(tokens)
+    while i < n:
+        tok = tokens[i]
+        upper = tok.upper
+
+        if (upper in ('SYS', 'INFORMATION_SCHEMA') and i + 2 < n and tokens[i + 1].text == '.'
+                and (upper, tokens[i + 2].text.upper()) in _CATALOG_VIEWS):
+            out.extend(_fragment(_CATALOG_VIEWS[(upper, tokens[i + 2].text.upper())]))
+            i += 3
+            continue
+
+        if upper in ('CURRENT_TIMESTAMP',) and not _is_call(tokens, i):
+            out.extend(_fragment(_NOW_LOCAL))
+            i += 1
+            continue
+
+        if upper == 'WITH' and _is_call(tokens, i) and i + 2 < n and tokens[i + 2].upper in TABLE_HINTS:
+            # Table hints: WITH (NOLOCK), WITH (UPDLOCK, ROWLOCK)
+            i = _match(tokens, i + 1) + 1
+            continue
+
+        if _is_call(tokens, i):
+            end = _match(tokens, i + 1)
+            inner = tokens[i + 2:end]
+            if upper in _RAW_FUNCTIONS:
+                out.extend(_RAW_FUNCTIONS[upper](inner))
+            elif upper in _FUNCTIONS:
+                args = [_rewrite(arg) for arg in _split_top(inner)] if inner else []
+                out.extend(_FUNCTIONS[upper](args))
+            else:
+                out.append(tok)
+                out.append(tokens[i + 1])
+                out.extend(_rewrite(inner))
+                out.append(tokens[end])
+            i = end + 1
+            # STRING_AGG(...) WITHIN GROUP (ORDER BY ...): SQLite has no ordered group_concat here
+            if upper == 'STRING_AGG' and i + 2 < n and tokens[i].upper == 'WITHIN' and tokens[i + 1].upper == 'GROUP':
+                i = _match(tokens, i + 2) + 1
+            continue
+
+        if tok.kind == 'op' and tok.text == '(':
+            end = _match(tokens, i)
+            out.append(tok)
+            out.extend(_rewrite(tokens[i + 1:end]))
+            out.append(tokens[end])
+            i = end + 1
+            continue
+
+        if i in concat:
+            out.append(Token('op', '||'))
+            i += 1
+            continue
+
+        out.append(tok)
+        i += 1
+
+    return _rewrite_clauses(out)
+
+
+def _rewrite_clauses(tokens):
+    """Scope-level clauses: TOP, OFFSET/FETCH, OUTPUT INSERTED"""
+    tokens = list(tokens)
+    suffix = []
+
+    # SELECT [DISTINCT] TOP n / TOP (expr)
+    top = _find_top(tokens, {'TOP'})
+    if top > 0 and tokens[top - 1].upper in ('SELECT', 'DISTINCT', 'ALL'):
+        nxt = tokens[top + 1]
+        if nxt.kind == 'op' and nxt.text == '(':
+            end = _match(tokens, top + 1)
+            limit = tokens[top + 2:end]
+        else:
+            end = top + 1
+            limit = [nxt]
+        del tokens[top:end + 1]
+        suffix = [Token('word', 'LIMIT')] + limit
+
+    # OFFSET x ROWS FETCH NEXT y ROWS ONLY
+    offset = _find_top(tokens, {'OFFSET'})
+    if offset >= 0:
+        rows = _find_top(tokens, {'ROWS', 'ROW'}, offset)
+        fetch = _find_top(tokens, {'FETCH'}, offset)
+        if rows > offset and (fetch == -1 or fetch == rows + 1):
+            skip = tokens[offset + 1:rows]
+            if fetch == -1:
+                take, end = _fragment('-1'), rows
+            else:
+                rows2 = _find_top(tokens, {'ROWS', 'ROW'}, fetch)
+                take, end = tokens[fetch + 2:rows2], rows2 + 1  # ... ROWS ONLY
+            tokens[offset:end + 1] = [Token('word', 'LIMIT')] + take + [Token('word', 'OFFSET')] + skip
+
+    # OUTPUT INSERTED.col, ... -> RETURNING col, ...
+    output = _find_top(tokens, {'OUTPUT'})
+    if output >= 0:
+        end = _find_top(tokens, {'VALUES', 'SELECT', 'WHERE', 'FROM', 'DEFAULT'}, output + 1)
+        end = len(tokens) if end == -1 else end
+        returning = [tok for k, tok in enumerate(tokens[output + 1:end])
+                     if not (tok.upper in ('INSERTED', 'DELETED')
+                             or (tok.text == '.' and k > 0 and tokens[output + k].upper in ('INSERTED', 'DELETED')))]
+        del tokens[output:end]
+        suffix = suffix + [Token('word', 'RETURNING')] + returning
+
+    return tokens + suffix
+
+
+# ===== STATEMENTS =====
+
+def _opens_block(tokens, j):
+    if tokens[j].upper == 'CASE':
+        return True
+    return tokens[j].upper == 'BEGIN' and not (j + 1 < len(tokens) and tokens[j + 1].upper in ('TRAN', 'TRANSACTION'))
+
+
+def _split_statements(tokens):
+    """Split a batch on ';' and GO, keeping BEGIN ... END / CASE ... END blocks together"""
+    statements, current, depth, block = [], [], 0, 0
+    for j, tok in enumerate(tokens):
+        if tok.kind == 'op' and tok.text == '(':
+            depth += 1
+        elif tok.kind == 'op' and tok.text == ')':
+            depth -= 1
+        elif _opens_block(tokens, j):
+            block += 1
+        elif tok.upper == 'END':
+            block -= 1
+        if depth == 0 and block == 0 and ((tok.kind == 'op' and tok.text == ';') or tok.upper == 'GO'):
+            if current:
+                statements.append(current)
+            current = []
+            continue
+        current.append(tok)
+    if current:
+        statements.append(current)
+    return statements
+
+
+def _block_end(tokens, begin):
+    """Index of the END matching BEGIN at position begin"""
+    block = 0
+    for j in range(begin, len(tokens)):
+        if _opens_block(tokens, j):
+            block += 1
+        elif tokens[j].upper == 'END':
+            block -= 1
+            if block == 0:
+                return j
+    raise TranslationError("BEGIN without END")
+
+
+def _statement_start(tokens, start):
+    """First depth-0 token at/after start that begins a new statement"""
+    depth = 0
+    for j in range(start, len(tokens)):
+        tok = tokens[j]
+        if tok.kind == 'op' and tok.text == '(':
+            depth += 1
+        elif tok.kind == 'op' and tok.text == ')':
+            depth -= 1
+        elif depth == 0 and tok.upper in STATEMENT_KEYWORDS:
+            return j
+    return len(tokens)
+
+
+def _branch_split(tokens):
+    """Split 'stmt ELSE stmt' on the first ELSE that is not part of a CASE"""
+    case = 0
+    depth = 0
+    for j, tok in enumerate(tokens):
+        if tok.kind == 'op' and tok.text == '(':
+            depth += 1
+        elif tok.kind == 'op' and tok.text == ')':
+            depth -= 1
+        elif tok.upper in ('CASE', 'BEGIN'):
+            case += 1
+        elif tok.upper == 'END':
+            case -= 1
+        elif tok.upper == 'ELSE' and case == 0 and depth == 0:
+            return tokens[:j], tokens[j + 1:]
+    return tokens, []
+
+
+def _translate_branch(tokens):
+    if tokens and tokens[0].upper == 'BEGIN':
+        end = _block_end(tokens, 0)
+        steps = []
+        for statement in _split_statements(tokens[1:end]):
+            steps.extend(_translate_statement(statement))
+        return steps, tokens[end + 1:]
+    return None, tokens
+
+
+def _translate_if(tokens):
+    body_start = _statement_start(tokens, 1)
+    condition = _rewrite(tokens[1:body_start])
+    body = tokens[body_start:]
+
+    then_steps, rest = _translate_branch(body)
+    if then_steps is None:
+        then_tokens, else_tokens = _branch_split(body)
+        then_steps = _translate_statement(then_tokens)
+    else:
+        else_tokens = rest[1:] if rest and rest[0].upper == 'ELSE' else []
+    else_steps = []
+    if else_tokens:
+        branch, _ = _translate_branch(else_tokens)
+        else_steps = branch if branch is not None else _translate_statement(else_tokens)
+
+    cond_tokens = _fragment('SELECT CASE WHEN') + condition + _fragment('THEN 1 ELSE 0 END')
+    return [Step('if', render(cond_tokens), _param_order(cond_tokens), tuple(then_steps), tuple(else_steps))]
+
+
+def _substitute(tokens, source_alias, source_columns, target_alias):
+    """Inline source.column values and drop the target alias from target.column"""
+    out = []
+    j = 0
+    while j < len(tokens):
+        tok = tokens[j]
+        if j + 2 < len(tokens) and tokens[j + 1].text == '.':
+            alias = tok.text.lower()
+            column = tokens[j + 2].text.lower()
+            if alias == source_alias and column in source_columns:
+                out.extend(_wrap(source_columns[column]))
+                j += 3
+                continue
+            if target_alias and alias == target_alias:
+                out.append(tokens[j + 2])
+                j += 3
+                continue
+        out.append(tok)
+        j += 1
+    return out
+
+
+def _translate_merge(tokens):
+    i = 1
+    if tokens[i].upper == 'INTO':
+        i += 1
+    target = tokens[i]
+    i += 1
+    target_alias = None
+    if tokens[i].upper == 'AS':
+        i += 1
+    if tokens[i].upper != 'USING':
+        target_alias = tokens[i].text.lower()
+        i += 1
+    if tokens[i].upper != 'USING' or tokens[i + 1].text != '(':
+        raise TranslationError("MERGE ... USING (SELECT ...) expected")
+    source_end = _match(tokens, i + 1)
+    source_select = tokens[i + 2:source_end]
+    i = source_end + 1
+    if tokens[i].upper == 'AS':
+        i += 1
+    source_alias = tokens[i].text.lower()
+    i += 1
+    if tokens[i].upper != 'ON':
+        raise TranslationError("MERGE ... ON expected")
+
+    if not source_select or source_select[0].upper != 'SELECT':
+        raise TranslationError("MERGE source must be a SELECT of values")
+    source_columns = {}
+    for item in _split_top(source_select[1:]):
+        if len(item) >= 3 and item[-2].upper == 'AS':
+            source_columns[item[-1].text.lower()] = _rewrite(item[:-2])
+        else:
+            source_columns[item[-1].text.lower()] = _rewrite(item[-1:])
+
+    clauses = []
+    when = _find_top(tokens, {'WHEN'}, i)
+    condition = tokens[i + 1:when]
+    while when != -1:
+        nxt = _find_top(tokens, {'WHEN'}, when + 1)
+        clauses.append(tokens[when + 1:nxt if nxt != -1 else len(tokens)])
+        when = nxt
+
+    condition = _rewrite(_substitute(condition, source_alias, source_columns, target_alias))
+    update_steps, insert_tokens = [], None
+    for clause in clauses:
+        then = _find_top(clause, {'THEN'})
+        head, action = clause[:then], clause[then + 1:]
+        if head and head[0].upper == 'MATCHED':
+            if len(head) > 1:
+                raise TranslationError("WHEN MATCHED AND ... is not supported")
+            if action[0].upper == 'DELETE':
+                sql_tokens = [Token('word', 'DELETE'), Token('word', 'FROM'), target, Token('word', 'WHERE')] + condition
+            else:
+                assignments = _rewrite(_substitute(action[2:], source_alias, source_columns, target_alias))
+                sql_tokens = [Token('word', 'UPDATE'), target, Token('word', 'SET')] + assignments + \
+                    [Token('word', 'WHERE')] + condition
+            update_steps.append(Step('exec', render(sql_tokens), _param_order(sql_tokens)))
+        elif head and head[0].upper == 'NOT' and (len(head) == 2 or [t.upper for t in head[2:]] == ['BY', 'TARGET']):
+            cols_end = _match(action, 1)
+            columns = action[1:cols_end + 1]
+            values_start = cols_end + 2
+            values = _substitute(action[values_start:], source_alias, source_columns, target_alias)
+            insert_tokens = ([Token('word', 'INSERT'), Token('word', 'INTO'), target] + columns, _rewrite(values))
+        else:
+            raise TranslationError("Unsupported MERGE clause")
+
+    steps = list(update_steps)
+    if insert_tokens is not None:
+        insert_head, insert_values = insert_tokens
+        if steps:
+            # UPDATE first; INSERT only when nothing matched
+            sql_tokens = insert_head + [Token('word', 'VALUES')] + insert_values
+            steps.append(Step('exec_if_no_rows', render(sql_tokens), _param_order(sql_tokens)))
+        else:
+            sql_tokens = insert_head + [Token('word', 'SELECT')] + insert_values[1:-1] + \
+                _fragment('WHERE NOT EXISTS (SELECT 1 FROM') + [target, Token('word', 'WHERE')] + condition + _fragment(')')
+            steps.append(Step('exec', render(sql_tokens), _param_order(sql_tokens)))
+    return steps
+
+
+def _translate_column(tokens):
+    """One column definition / table constraint inside CREATE TABLE"""
+    # Computed column: name AS (expr) [PERSISTED]
+    if len(tokens) >= 3 and tokens[1].upper == 'AS' and tokens[2].text == '(':
+        end = _match(tokens, 2)
+        stored = any(tok.upper == 'PERSISTED' for tok in tokens[end + 1:])
+        return [tokens[0]] + _fragment('GENERATED ALWAYS AS') + _wrap(_rewrite(tokens[3:end])) + \
+            [Token('word', 'STORED' if stored else 'VIRTUAL')]
+
+    out = []
+    identity = False
+    i = 0
+    while i < len(tokens):
+        tok = tokens[i]
+        upper = tok.upper
+        if upper == 'IDENTITY':
+            identity = True
+            i = _match(tokens, i + 1) + 1 if i + 1 < len(tokens) and tokens[i + 1].text == '(' else i + 1
+            continue
+        if upper in ('CLUSTERED', 'NONCLUSTERED'):
+            i += 1
+            continue
+        if upper == 'DEFAULT' and i + 1 < len(tokens):
+            nxt = i + 1
+            if _is_call(tokens, nxt):
+                end = _match(tokens, nxt + 1)
+                out.append(tok)
+                out.extend(_wrap(_rewrite(tokens[nxt:end + 1])))
+                i = end + 1
+                continue
+        if (upper in ('NVARCHAR', 'VARCHAR', 'VARBINARY') and i + 3 < len(tokens)
+                and tokens[i + 1].text == '(' and tokens[i + 2].upper == 'MAX'):
+            out.append(Token('word', 'BLOB' if upper == 'VARBINARY' else 'TEXT'))
+            i += 4
+            continue
+        if upper == 'CHECK' and i + 1 < len(tokens) and tokens[i + 1].text == '(':
+            end = _match(tokens, i + 1)
+            out.append(tok)
+            out.extend(_wrap(_rewrite(tokens[i + 2:end])))
+            i = end + 1
+            continue
+        out.append(tok)
+        i += 1
+
+    if identity:
+        uppers = [tok.upper for tok in out]
+        if 'PRIMARY' in uppers:
+            out[1] = Token('word', 'INTEGER')
+            key = uppers.index('PRIMARY') + 1
+            out.insert(key + 1, Token('word', 'AUTOINCREMENT'))
+    return out
+
+
+def _translate_create_table(tokens):
+    open_paren = next(j for j, tok in enumerate(tokens) if tok.text == '(')
+    end = _match(tokens, open_paren)
+    columns = [_translate_column(col) for col in _split_top(tokens[open_paren + 1:end]) if col]
+    out = tokens[:open_paren] + [Token('op', '(')]
+    for k, col in enumerate(columns):
+        if k:
+            out.append(Token('op', ','))
+        out.extend(col)
+    out.append(Token('op', ')'))
+    return [Step('exec', render(out), ())]
+
+
+def _translate_create_index(tokens):
+    out = []
+    i = 0
+    while i < len(tokens):
+        upper = tokens[i].upper
+        if upper in ('CLUSTERED', 'NONCLUSTERED'):
+            i += 1
+            continue
+        if upper in ('INCLUDE', 'WITH') and i + 1 < len(tokens) and tokens[i + 1].text == '(':
+            i = _match(tokens, i + 1) + 1
+            continue
+        if upper == 'WHERE':
+            out.append(tokens[i])
+            out.extend(_rewrite(tokens[i + 1:]))
+            break
+        out.append(tokens[i])
+        i += 1
+    return [Step('exec', render(out), ())]
+
+
+def _translate_alter_table(tokens):
+    """ALTER TABLE t ADD <column>; SQLite can only add computed columns as VIRTUAL"""
+    add = _find_top(tokens, {'ADD'})
+    column = _translate_column(tokens[add + 1:])
+    if column[-1].upper == 'STORED':
+        column[-1] = Token('word', 'VIRTUAL')
+    out = tokens[:add] + _fragment('ADD COLUMN') + column
+    return [Step('exec', render(out), ())]
+
+
+def _translate_statement(tokens):
+    if not tokens:
+        return []
+    first = tokens[0].upper
+    second = tokens[1].upper if len(tokens) > 1 else None
+
+    if first in ('GO', 'USE', 'PRINT') or (first == 'SET' and second in ('NOCOUNT', 'ANSI_NULLS', 'QUOTED_IDENTIFIER')):
+        return []
+    if first == 'BEGIN' and second not in ('TRAN', 'TRANSACTION'):
+        steps = []
+        for statement in _split_statements(tokens[1:_block_end(tokens, 0)]):
+            steps.extend(_translate_statement(statement))
+        return steps
+    if first == 'IF':
+        return _translate_if(tokens)
+    if first == 'MERGE':
+        return _translate_merge(tokens)
+    if first == 'ALTER' and second == 'TABLE' and _find_top(tokens, {'ADD'}) != -1:
+        return _translate_alter_table(tokens)
+    if first == 'CREATE':
+        kinds = [tok.upper for tok in tokens[1:4]]
+        if second == 'TABLE':
+            return _translate_create_table(tokens)
+        if 'INDEX' in kinds:
+            return _translate_create_index(tokens)
+        if second in ('TRIGGER', 'PROCEDURE', 'PROC', 'FUNCTION'):
+            raise TranslationError(f"CREATE {second} is not supported on SQLite")
+        if second == 'VIEW':
+            as_pos = _find_top(tokens, {'AS'})
+            body = _rewrite(tokens[as_pos + 1:])
+            if body and body[0].upper == 'WITH' and len(body) > 1 and body[1].upper != 'RECURSIVE':
+                body.insert(1, Token('word', 'RECURSIVE'))
+            out = tokens[:as_pos + 1] + body
+            return [Step('exec', render(out), _param_order(out))]
+
+    out = _rewrite(tokens)
+    # Recursive CTEs need the RECURSIVE keyword in SQLite (harmless for plain CTEs)
+    if out and out[0].upper == 'WITH' and len(out) > 1 and out[1].kind in ('word', 'ident') and out[1].upper != 'RECURSIVE':
+        out.insert(1, Token('word', 'RECURSIVE'))
+    return [Step('exec', render(out), _param_order(out))]
+
+
+@lru_cache(maxsize=2048)
+def translate(sql):
+    """Translate a T-SQL statement/batch into SQLite steps (cached per SQL text)"""
+    steps = []
+    for statement in _split_statements(tokenize(sql)):
+        steps.extend(_translate_statement(statement))
+    return tuple(steps)
@@ -13,4 +13,7 @@ urlpatterns = [
     path('settings/email/test/', views.EmailSettingsTestView.as_view(), name='email-settings-test'),
     path('settings/company/', views.CompanySettingsView.as_view(), name='company-settings'),
     path('settings/stock/', views.StockSettingsView.as_view(), name='stock-settings'),
+    # Diagnostics
+    path('db/pool-stats/', views.PoolStatsView.as_view(), name='db-pool-stats'),
+    path('cache/stats/', views.CacheStatsView.as_view(), name='cache-stats'),
 ]
\ No newline at end of file
@@ -7,7 +7,9 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.http import JsonResponse
 from .auth_service import AuthService
-from .database import DatabaseConnection
+from .database import DatabaseConnection, get_pool_stats
+from .result_cache import get_cache_stats
+from .principal_cache import invalidate_principal
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from rest_framework.permissions import IsAuthenticated
@@ -160,6 +162,7 @@ class ChangeUsernameView(APIView):
                 return Response({'error': 'Username already exists'}, status=status.HTTP_400_BAD_REQUEST)
             affected = DatabaseConnection.execute_command("UPDATE users SET username = ? WHERE id = ?", (new_username, user_id))
             if affected:
+                invalidate_principal(user_id)
                 request.session['username'] = new_username
                 return Response({'message': 'Username changed successfully'}, status=status.HTTP_200_OK)
             return Response({'error': 'Failed to change username'}, status=status.HTTP_400_BAD_REQUEST)
@@ -255,4 +258,26 @@ class StockSettingsView(APIView):
         for key in ['LOW_STOCK_THRESHOLD', 'CRITICAL_STOCK_THRESHOLD', 'AUTO_STOCK_UPDATE']:
             if key in payload:
                 _upsert_setting(key, payload[key], 'GENERAL')
-        return Response({'message': 'Stock settings updated'}, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response({'message': 'Stock settings updated'}, status=status.HTTP_200_OK)
+
+
+class PoolStatsView(APIView):
+    """Raw SQL connection pool counters (checked out, waiting, created, recycled)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            return Response({'pool': get_pool_stats()}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': f'Failed to get pool stats: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class CacheStatsView(APIView):
+    """Dashboard result cache counters (hits, stale hits, misses, refreshes, invalidations)"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            return Response({'cache': get_cache_stats()}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({'error': f'Failed to get cache stats: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -3,12 +3,17 @@ JWT Authentication functions using raw SQL
 Uses DATABASE.txt users table
 """
 import hashlib
+import logging
 import secrets
-import bcrypt
 from datetime import datetime, timedelta
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import AnonymousUser
 from .database import get_db_connection
+from .last_login import last_login_buffer
+from . import password_hasher
+from .password_hasher import PasswordHasherBusy
+
+logger = logging.getLogger(__name__)
 
 
 class CustomUser:
@@ -32,24 +37,40 @@ class CustomUser:
 
 
 def hash_password(password):
-    """Hash password with bcrypt"""
-    password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+    """Hash password with bcrypt (AUTH_BCRYPT_ROUNDS, on the bcrypt worker pool)"""
+    return password_hasher.hash_password(password)
 
 
 def verify_password(password, stored_hash):
-    """Verify password against bcrypt hash"""
+    """Verify password against bcrypt hash (on the bcrypt worker pool)"""
     try:
-        password_bytes = password.encode('utf-8')
-        stored_hash_bytes = stored_hash.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, stored_hash_bytes)
+        return password_hasher.check_password(password, stored_hash)
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
         print(f"Password verification error: {e}")
         return False
 
 
+def _rehash_password(user_id, password, stored_hash):
+    """Store the password again at the configured cost (only if the hash is still the one just verified)"""
+    try:
+        new_hash = password_hasher.hash_password(password)
+        connection = get_db_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                (new_hash, user_id, stored_hash)
+            )
+            connection.commit()
+        finally:
+            connection.close()
+    except Exception as e:
+        # The login itself succeeded; the next one retries the rehash
+        logger.warning("Password rehash skipped for user %s: %s", user_id, e)
+
+
 def generate_jwt_tokens(user_data):
     """Generate JWT tokens for user"""
     custom_user = CustomUser(user_data)
@@ -87,25 +108,25 @@ def authenticate_user_with_jwt(username, password):
         
         user = users[0]  # Get first user
         
-        # Debug: Log hash format
-        print(f"Database hash for {username}: {user['password_hash']}")
-        print(f"Hash starts with: {user['password_hash'][:10]}...")
-        
         # Verify password
         if not verify_password(password, user['password_hash']):
             print(f"Password verification failed for user: {username}")
             return None
         
-        # Update last login
-        update_query = "UPDATE users SET last_login = GETDATE() WHERE id = ?"
-        execute_query(update_query, (user['id'],))
+        # Cost factor changed since the hash was stored (AUTH_BCRYPT_ROUNDS)
+        if password_hasher.needs_rehash(user['password_hash']):
+            _rehash_password(user['id'], password, user['password_hash'])
+        
+        # Update last login (buffered, written in batches)
+        last_login_buffer.record(user['id'])
         
         # Remove password from response
         user_clean = {k: v for k, v in user.items() if k != 'password_hash'}
         
-        print(f"Authentication successful for user: {username}")
         return generate_jwt_tokens(user_clean)
         
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
         print(f"Authentication error for {username}: {str(e)}")
         return None
@@ -4,49 +4,91 @@ Uses our custom users table instead of Django's auth_user
 """
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from core.principal_cache import principal_cache, users_changed_at
 from .auth_functions import get_user_by_id
 
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class CustomUser:
+    """Authenticated principal handed to DRF (request.user)"""
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_data):
+        self.id = user_data['id']
+        self.username = user_data['username']
+        self.email = user_data.get('email')
+        self.full_name = user_data.get('full_name')
+        self.role = user_data.get('role')
+        self.is_active = user_data.get('is_active', True)
+
+    @classmethod
+    def from_claims(cls, validated_token):
+        """Principal built from the signed token claims alone (no email: it is not a claim)"""
+        return cls({
+            'id': validated_token['user_id'],
+            'username': validated_token.get('username'),
+            'full_name': validated_token.get('full_name'),
+            'role': validated_token.get('role'),
+        })
+
+    def __str__(self):
+        return self.username
+
 
 class CustomJWTAuthentication(JWTAuthentication):
     """
     Custom JWT Authentication that uses our users table
+    The principal is cached per user (core.principal_cache), so a warm worker authenticates
+    without a query. With AUTH_TRUST_TOKEN_CLAIMS on, read-only requests that miss the cache
+    are authorized by the token claims, unless a user change was recorded after the token was issued.
     """
-    
+
+    def authenticate(self, request):
+        self._method = request.method
+        return super().authenticate(request)
+
+    def _can_trust_claims(self, validated_token):
+        if not getattr(settings, 'AUTH_TRUST_TOKEN_CLAIMS', False):
+            return False
+        if getattr(self, '_method', None) not in SAFE_METHODS or 'username' not in validated_token:
+            return False
+        changed_at = users_changed_at()
+        issued_at = validated_token.get('iat')
+        return changed_at is None or (issued_at is not None and issued_at > changed_at)
+
     def get_user(self, validated_token):
         """
         Get user from our custom users table instead of auth_user
         """
         try:
             user_id = validated_token.get('user_id')
-            
+
             if user_id is None:
                 return AnonymousUser()
-            
+            user_id = int(user_id)
+
+            user = principal_cache.get(user_id)
+            if user is not None:
+                return user
+
+            if self._can_trust_claims(validated_token):
+                return CustomUser.from_claims(validated_token)
+
             user_data = get_user_by_id(user_id)
-            
+
             if user_data is None:
                 return AnonymousUser()
-            
-            # Create a simple user object for DRF
-            class CustomUser:
-                def __init__(self, user_data):
-                    self.id = user_data['id']
-                    self.username = user_data['username']
-                    self.email = user_data['email']
-                    self.full_name = user_data['full_name']
-                    self.role = user_data['role']
-                    self.is_active = user_data.get('is_active', True)
-                    self.is_authenticated = True
-                    self.is_anonymous = False
-                
-                def __str__(self):
-                    return self.username
-            
-            return CustomUser(user_data)
-            
+
+            user = CustomUser(user_data)
+            principal_cache.put(user_id, user)
+            return user
+
         except Exception as e:
             print(f"JWT Authentication error: {e}")
             import traceback
             traceback.print_exc()
-            return AnonymousUser()
\ No newline at end of file
+            return AnonymousUser()
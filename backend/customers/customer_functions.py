@@ -2,13 +2,47 @@
 Simple customer functions using raw SQL
 """
 from .database import execute_query, get_db_connection
+from core.result_cache import invalidate_cache
+from core.reference_registry import reference_registry
+from core.bulk import ID_CHUNK_SIZE
+from core.row_mapping import RowShape, to_float
+from core.pagination import Keyset, approximate_count
+from .search_index import refresh_customers_search, search_customer_ids
 
 
-def get_all_customers(limit=100, offset=0):
-    """Get all customers with pagination"""
+_CUSTOMER_COLUMNS = """
+        c.id, c.customer_code, c.first_name, c.last_name,
+        c.email, c.phone, c.address, c.city, c.district,
+        c.tax_number, c.status, c.customer_type, c.notes,
+        c.created_date, c.updated_date"""
+
+_CUSTOMER_VESPA_COLUMNS = """
+        cv.id, cv.license_plate, cv.chassis_number, cv.purchase_date,
+        cv.current_mileage, cv.last_service_date, cv.next_service_date,
+        cv.service_interval_km, cv.notes, cv.is_active,
+        cv.vespa_model_id, vm.model_name, vm.model_year, vm.engine_size"""
+
+# 'notes' is sent as 'vespa_notes' to match the frontend
+_CUSTOMER_VESPA_ROW = RowShape('CustomerVespaRow', rename={'notes': 'vespa_notes'})
+
+
+_CUSTOMERS_KEYSET = Keyset(
+    'customers',
+    ('c.first_name', 'ASC', 'first_name'),
+    ('c.last_name', 'ASC', 'last_name'),
+    ('c.id', 'ASC', 'id'),
+)
+
+
+def get_all_customers(limit=100, cursor_token=None, with_total=False):
+    """
+    One page of active customers by name, keyset-paginated on (first_name, last_name, id).
+    Returns {'customers', 'next_cursor', 'has_more', 'total'}; total (approximate) only with with_total.
+    """
+    seek, params = _CUSTOMERS_KEYSET.seek(cursor_token)
     try:
-        query = """
-        SELECT 
+        query = f"""
+        SELECT TOP (?)
             c.id, c.customer_code, c.first_name, c.last_name,
             c.first_name + ' ' + c.last_name as full_name,
             c.email, c.phone, c.address, c.city, c.district,
@@ -17,17 +51,29 @@ def get_all_customers(limit=100, offset=0):
             COUNT(cv.id) as vespa_count
         FROM customers c
         LEFT JOIN customer_vespas cv ON c.id = cv.customer_id AND cv.is_active = 1
-        WHERE c.status = 'ACTIVE'
+        WHERE c.status = 'ACTIVE' {'AND ' + seek if seek else ''}
         GROUP BY c.id, c.customer_code, c.first_name, c.last_name, c.email, c.phone, 
                  c.address, c.city, c.district, c.tax_number, c.status, c.customer_type, c.created_date
-        ORDER BY c.first_name, c.last_name
-        OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
+        ORDER BY {_CUSTOMERS_KEYSET.order_by()}
         """
         
-        return execute_query(query, (offset, limit))
+        rows = execute_query(query, [int(limit) + 1] + params)
     except Exception as e:
         print(f"Error in get_all_customers: {e}")
-        return []
+        rows = []
+    
+    customers, next_cursor, has_more = _CUSTOMERS_KEYSET.page(rows, limit)
+    total = None
+    if with_total:
+        total = approximate_count(
+            'customers', "SELECT COUNT(*) FROM customers WHERE status = 'ACTIVE'", tags=('customers',)
+        )
+    return {
+        'customers': customers,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'total': total
+    }
 
 
 def get_customer_by_id(customer_id):
@@ -35,12 +81,8 @@ def get_customer_by_id(customer_id):
     connection = get_db_connection()
     cursor = connection.cursor()
     
-    query = """
-    SELECT 
-        c.id, c.customer_code, c.first_name, c.last_name,
-        c.email, c.phone, c.address, c.city, c.district,
-        c.tax_number, c.status, c.customer_type, c.notes,
-        c.created_date, c.updated_date
+    query = f"""
+    SELECT {_CUSTOMER_COLUMNS}
     FROM customers c
     WHERE c.id = ?
     """
@@ -52,6 +94,11 @@ def get_customer_by_id(customer_id):
     if not row:
         return None
     
+    return _customer_dict(row)
+
+
+def _customer_dict(row):
+    """API dict of a customers row selected with _CUSTOMER_COLUMNS"""
     return {
         'id': row[0],
         'customer_code': row[1],
@@ -112,7 +159,9 @@ def create_customer(data):
     
     customer_id = cursor.fetchone()[0]
     connection.commit()
+    invalidate_cache('customers')
     connection.close()
+    refresh_customers_search([customer_id])
     
     return customer_id
 
@@ -148,35 +197,32 @@ def update_customer(customer_id, data):
     ))
     
     connection.commit()
+    invalidate_cache('customers')
     connection.close()
+    refresh_customers_search([customer_id])
     
     return customer_id
 
 
 def search_customers(search_term):
-    """Search customers by name, phone, or license plate"""
+    """Search customers by name, phone, tax number, email or license plate (prefix match via the customer search index)"""
+    ids = search_customer_ids(search_term, limit=ID_CHUNK_SIZE)
+    if not ids:
+        return []
+    
     connection = get_db_connection()
     cursor = connection.cursor()
     
-    query = """
-    SELECT DISTINCT
+    query = f"""
+    SELECT 
         c.id, c.customer_code, c.first_name, c.last_name,
         c.phone, c.email, c.tax_number, c.status
     FROM customers c
-    LEFT JOIN customer_vespas cv ON c.id = cv.customer_id
-    WHERE (
-        c.first_name LIKE ? OR 
-        c.last_name LIKE ? OR 
-        c.phone LIKE ? OR
-        c.email LIKE ? OR
-        c.tax_number LIKE ? OR
-        cv.license_plate LIKE ?
-    ) AND c.status = 'ACTIVE'
+    WHERE c.id IN ({', '.join('?' for _ in ids)}) AND c.status = 'ACTIVE'
     ORDER BY c.first_name, c.last_name
     """
     
-    search_pattern = f"%{search_term}%"
-    cursor.execute(query, (search_pattern, search_pattern, search_pattern, search_pattern, search_pattern, search_pattern))
+    cursor.execute(query, ids)
     rows = cursor.fetchall()
     connection.close()
     
@@ -226,35 +272,22 @@ def create_customer_vespa(customer_id, vespa_data):
     vespa_id = cursor.fetchone()[0]
     connection.commit()
     connection.close()
+    refresh_customers_search([customer_id])
     
     return vespa_id
 
 
 def get_vespa_models():
-    """Get all available Vespa models"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
-    
-    query = """
-    SELECT id, model_code, model_name, model_year, engine_size, category
-    FROM vespa_models 
-    WHERE is_active = 1
-    ORDER BY model_name
-    """
-    
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    connection.close()
-    
+    """Get all available Vespa models (from the in-process reference registry)"""
     models = []
-    for row in rows:
+    for model in reference_registry.vespa_models.active():
         models.append({
-            'id': row[0],
-            'model_code': row[1],
-            'model_name': row[2],
-            'model_year': row[3],
-            'engine_size': row[4],
-            'category': row[5]
+            'id': model.id,
+            'model_code': model.model_code,
+            'model_name': model.model_name,
+            'model_year': model.model_year,
+            'engine_size': model.engine_size,
+            'category': model.category
         })
     
     return models
@@ -265,12 +298,8 @@ def get_customer_vespas(customer_id):
     connection = get_db_connection()
     cursor = connection.cursor()
     
-    query = """
-    SELECT 
-        cv.id, cv.license_plate, cv.chassis_number, cv.purchase_date,
-        cv.current_mileage, cv.last_service_date, cv.next_service_date,
-        cv.service_interval_km, cv.notes, cv.is_active,
-        cv.vespa_model_id, vm.model_name, vm.model_year, vm.engine_size
+    query = f"""
+    SELECT {_CUSTOMER_VESPA_COLUMNS}
     FROM customer_vespas cv
     INNER JOIN vespa_models vm ON cv.vespa_model_id = vm.id
     WHERE cv.customer_id = ? AND cv.is_active = 1
@@ -278,26 +307,158 @@ def get_customer_vespas(customer_id):
     """
     
     cursor.execute(query, (customer_id,))
-    rows = cursor.fetchall()
+    vespas = _CUSTOMER_VESPA_ROW.dicts(cursor)
     connection.close()
     
-    vespas = []
-    for row in rows:
-        vespas.append({
-            'id': row[0],
-            'license_plate': row[1],
-            'chassis_number': row[2],
-            'purchase_date': row[3],
-            'current_mileage': row[4],
-            'last_service_date': row[5],
-            'next_service_date': row[6],
-            'service_interval_km': row[7],
-            'vespa_notes': row[8],  # Changed from 'notes' to 'vespa_notes' to match frontend
-            'is_active': row[9],
-            'vespa_model_id': row[10],  # Added vespa_model_id
-            'model_name': row[11],
-            'model_year': row[12],
-            'engine_size': row[13]
-        })
-    
-    return vespas
\ No newline at end of file
+    return vespas
+
+
+# ===== CUSTOMER OVERVIEW =====
+
+OVERVIEW_DEFAULT_LIMIT = 10
+OVERVIEW_MAX_LIMIT = 50
+OVERVIEW_SECTIONS = ('vespas', 'service_records', 'invoices', 'appointments')
+
+_OVERVIEW_SERVICE_ROW = RowShape('OverviewServiceRow', converters={
+    'labor_cost': to_float,
+    'parts_cost': to_float,
+    'work_items_cost': to_float,
+    'total_cost': to_float,
+})
+_OVERVIEW_INVOICE_ROW = RowShape('OverviewInvoiceRow', converters={
+    name: to_float for name in (
+        'subtotal', 'tax_amount', 'total_amount', 'paid_amount', 'remaining_amount'
+    )
+})
+_OVERVIEW_APPOINTMENT_ROW = RowShape('OverviewAppointmentRow', rename={'customer_notes': 'notes'})
+
+# One batch, one round trip: customer, section totals, then one page per section.
+# Cost subqueries are restricted to the customer's records instead of summing every service;
+# invoices.paid_amount is kept in sync with cash_transactions by the accounting writers.
+_OVERVIEW_BATCH = f"""
+    SELECT {_CUSTOMER_COLUMNS}
+    FROM customers c
+    WHERE c.id = ?;
+
+    SELECT
+        (SELECT COUNT(*) FROM customer_vespas cv
+         WHERE cv.customer_id = ? AND cv.is_active = 1) as vespas,
+        (SELECT COUNT(*) FROM service_records sr
+         INNER JOIN customer_vespas cv ON sr.customer_vespa_id = cv.id
+         WHERE cv.customer_id = ?) as service_records,
+        (SELECT COUNT(*) FROM invoices i WHERE i.customer_id = ?) as invoices,
+        (SELECT COUNT(*) FROM appointments a WHERE a.customer_id = ?) as appointments;
+
+    SELECT {_CUSTOMER_VESPA_COLUMNS}
+    FROM customer_vespas cv
+    INNER JOIN vespa_models vm ON cv.vespa_model_id = vm.id
+    WHERE cv.customer_id = ? AND cv.is_active = 1
+    ORDER BY cv.created_date DESC, cv.id DESC
+    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
+
+    SELECT
+        sr.id, sr.service_number, sr.service_type, sr.service_date,
+        sr.status, sr.description, sr.customer_complaints, sr.work_done,
+        sr.labor_cost, sr.start_date, sr.completion_date,
+        sr.technician_name, sr.mileage_at_service,
+        cv.license_plate, vm.model_name,
+        ISNULL(parts_total.total_parts_cost, 0) as parts_cost,
+        ISNULL(wi_total.total_work_items_cost, 0) as work_items_cost,
+        (sr.labor_cost + ISNULL(parts_total.total_parts_cost, 0) + ISNULL(wi_total.total_work_items_cost, 0)) as total_cost,
+        cv.id as customer_vespa_id
+    FROM service_records sr
+    INNER JOIN customer_vespas cv ON sr.customer_vespa_id = cv.id
+    INNER JOIN vespa_models vm ON cv.vespa_model_id = vm.id
+    LEFT JOIN (
+        SELECT sp.service_record_id, SUM(sp.quantity * sp.unit_price) as total_parts_cost
+        FROM service_parts sp
+        INNER JOIN service_records spr ON sp.service_record_id = spr.id
+        INNER JOIN customer_vespas spv ON spr.customer_vespa_id = spv.id
+        WHERE spv.customer_id = ?
+        GROUP BY sp.service_record_id
+    ) parts_total ON sr.id = parts_total.service_record_id
+    LEFT JOIN (
+        SELECT wi.service_record_id, SUM(wi.line_total) as total_work_items_cost
+        FROM service_work_items wi
+        INNER JOIN service_records wir ON wi.service_record_id = wir.id
+        INNER JOIN customer_vespas wiv ON wir.customer_vespa_id = wiv.id
+        WHERE wiv.customer_id = ?
+        GROUP BY wi.service_record_id
+    ) wi_total ON sr.id = wi_total.service_record_id
+    WHERE cv.customer_id = ?
+    ORDER BY sr.service_date DESC, sr.created_date DESC, sr.id DESC
+    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
+
+    SELECT
+        i.id, i.invoice_number, i.invoice_type, i.invoice_date, i.due_date,
+        i.status as invoice_status, i.payment_date,
+        i.subtotal, i.tax_amount, i.total_amount,
+        ISNULL(i.paid_amount, 0) as paid_amount,
+        (i.total_amount - ISNULL(i.paid_amount, 0)) as remaining_amount,
+        i.service_record_id
+    FROM invoices i
+    WHERE i.customer_id = ?
+    ORDER BY i.invoice_date DESC, i.created_date DESC, i.id DESC
+    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;
+
+    SELECT
+        a.id, a.appointment_date, a.appointment_time, a.estimated_duration,
+        a.service_type, a.status, a.customer_notes, a.created_date,
+        cv.id as customer_vespa_id,
+        COALESCE(cv.license_plate, '') as license_plate,
+        COALESCE(vm.model_name, '') as model_name
+    FROM appointments a
+    LEFT JOIN customer_vespas cv ON a.customer_vespa_id = cv.id
+    LEFT JOIN vespa_models vm ON cv.vespa_model_id = vm.id
+    WHERE a.customer_id = ?
+    ORDER BY a.appointment_date DESC, a.appointment_time DESC, a.id DESC
+    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
+"""
+
+
+def get_customer_overview(customer_id, limit=OVERVIEW_DEFAULT_LIMIT, offsets=None):
+    """
+    Customer 360: customer, vespas, service records, invoices and appointments in one round trip.
+    Every section is a page of at most `limit` rows (capped at OVERVIEW_MAX_LIMIT) starting at
+    offsets[section], returned as {'items', 'total', 'limit', 'offset', 'has_more'}.
+    Returns None when the customer does not exist.
+    """
+    limit = min(max(int(limit), 1), OVERVIEW_MAX_LIMIT)
+    offsets = {section: max(int((offsets or {}).get(section) or 0), 0) for section in OVERVIEW_SECTIONS}
+
+    params = [customer_id] * 5
+    params += [customer_id, offsets['vespas'], limit]
+    params += [customer_id] * 3 + [offsets['service_records'], limit]
+    params += [customer_id, offsets['invoices'], limit]
+    params += [customer_id, offsets['appointments'], limit]
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute(_OVERVIEW_BATCH, params)
+        row = cursor.fetchone()
+        if not row:
+            return None
+        customer = _customer_dict(row)
+
+        cursor.nextset()
+        totals = dict(zip(OVERVIEW_SECTIONS, cursor.fetchone()))
+
+        pages = {}
+        for section, shape in zip(OVERVIEW_SECTIONS, (
+            _CUSTOMER_VESPA_ROW, _OVERVIEW_SERVICE_ROW, _OVERVIEW_INVOICE_ROW, _OVERVIEW_APPOINTMENT_ROW
+        )):
+            cursor.nextset()
+            items = shape.dicts(cursor)
+            total = totals[section] or 0
+            pages[section] = {
+                'items': items,
+                'total': total,
+                'limit': limit,
+                'offset': offsets[section],
+                'has_more': offsets[section] + len(items) < total,
+            }
+    finally:
+        connection.close()
+
+    return {'customer': customer, **pages}
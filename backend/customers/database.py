@@ -1,19 +1,7 @@
 """
 Simple database connection helper
 """
-import pyodbc
-from django.conf import settings
-
-
-def get_db_connection():
-    """Get raw database connection using Windows Authentication"""
-    connection_string = (
-        f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-        f"SERVER={settings.DATABASES['default']['HOST']};"
-        f"DATABASE={settings.DATABASES['default']['NAME']};"
-        f"Trusted_Connection=yes;"
-    )
-    return pyodbc.connect(connection_string)
+from core.database import get_db_connection, get_backend
 
 
 def execute_query(query, params=None):
@@ -31,9 +19,8 @@ def execute_query(query, params=None):
         conn.commit()
         return cursor.rowcount
         
-    except pyodbc.Error as ex:
-        sqlstate = ex.args[0] if ex.args else 'Unknown'
-        if sqlstate == '23000':
+    except get_backend().Error as ex:
+        if get_backend().is_integrity_error(ex):
             raise ValueError("Database integrity error: Duplicate entry or foreign key violation.")
         raise Exception(f"Database error: {str(ex)}")
     finally:
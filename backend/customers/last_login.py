@@ -0,0 +1,82 @@
+"""
+Buffered users.last_login writes
+A login records its timestamp in memory instead of running an UPDATE in the request. The
+buffer is written with one executemany when it holds AUTH_LAST_LOGIN_BATCH users, after
+AUTH_LAST_LOGIN_FLUSH_INTERVAL seconds, or at process exit. A crash loses at most one interval
+of last_login values, which are informational only.
+"""
+import atexit
+import logging
+import threading
+from datetime import datetime
+from django.conf import settings
+from core.database import get_dedicated_connection
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """user_id -> last login time, flushed in batches"""
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        self.flushes = 0
+        self.rows_written = 0
+
+    def record(self, user_id, when=None):
+        when = when or datetime.now()
+        with self._lock:
+            self._pending[int(user_id)] = when
+            full = len(self._pending) >= getattr(settings, 'AUTH_LAST_LOGIN_BATCH', 100)
+            if not full:
+                self._arm_timer()
+        if full:
+            self.flush()
+
+    def _arm_timer(self):
+        """Schedule a flush after the interval unless one is scheduled already (caller holds _lock)"""
+        if self._timer is None:
+            self._timer = threading.Timer(getattr(settings, 'AUTH_LAST_LOGIN_FLUSH_INTERVAL', 10), self.flush)
+            self._timer.daemon = True
+            self._timer.name = 'last-login-flush'
+            self._timer.start()
+
+    def flush(self):
+        """Write every buffered timestamp; returns the number of users written"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not pending:
+                return 0
+            rows = [(when, user_id) for user_id, when in sorted(pending.items())]
+            try:
+                connection = get_dedicated_connection()
+                try:
+                    cursor = connection.cursor()
+                    cursor.fast_executemany = True
+                    cursor.executemany("UPDATE users SET last_login = ? WHERE id = ?", rows)
+                    connection.commit()
+                finally:
+                    connection.close()
+            except Exception as e:
+                # Keep the values for the next flush unless a newer login replaced them, and retry
+                # after the interval even if no other login arrives
+                with self._lock:
+                    for user_id, when in pending.items():
+                        self._pending.setdefault(user_id, when)
+                    self._arm_timer()
+                logger.warning("last_login flush failed for %d users: %s", len(rows), e)
+                return 0
+            self.flushes += 1
+            self.rows_written += len(rows)
+            return len(rows)
+
+
+last_login_buffer = LastLoginBuffer()
+atexit.register(last_login_buffer.flush)
@@ -0,0 +1,80 @@
+"""
+bcrypt hashing on a bounded worker pool
+Password checks run on AUTH_BCRYPT_WORKERS threads (bcrypt releases the GIL), so a burst of
+logins uses at most that many cores and leaves the request threads for other work. At most
+AUTH_BCRYPT_MAX_PENDING checks wait or run at once; beyond that PasswordHasherBusy is raised
+and the login view answers 503 instead of queueing without bound.
+New hashes use AUTH_BCRYPT_ROUNDS; needs_rehash() tells when a stored hash has another cost.
+"""
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from django.conf import settings
+
+DEFAULT_ROUNDS = 12
+
+_COST_RE = re.compile(r'^\$2[abxy]?\$(\d{2})\$')
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when AUTH_BCRYPT_MAX_PENDING password checks are already waiting or running"""
+
+
+def worker_count():
+    return getattr(settings, 'AUTH_BCRYPT_WORKERS', None) or os.cpu_count() or 2
+
+
+def _get_executor():
+    global _executor, _slots
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = worker_count()
+                max_pending = getattr(settings, 'AUTH_BCRYPT_MAX_PENDING', None) or workers * 8
+                _slots = threading.BoundedSemaphore(max(max_pending, workers))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+    return _executor
+
+
+def _run(fn, *args):
+    executor = _get_executor()
+    if not _slots.acquire(timeout=getattr(settings, 'AUTH_BCRYPT_QUEUE_TIMEOUT', 0.5)):
+        raise PasswordHasherBusy('Too many logins in progress, try again shortly')
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def rounds():
+    """Configured bcrypt cost factor"""
+    return int(getattr(settings, 'AUTH_BCRYPT_ROUNDS', DEFAULT_ROUNDS))
+
+
+def hash_password(password):
+    """bcrypt hash (text) of password at the configured cost"""
+    password_bytes = password.encode('utf-8')
+    return _run(lambda: bcrypt.hashpw(password_bytes, bcrypt.gensalt(rounds())).decode('utf-8'))
+
+
+def check_password(password, stored_hash):
+    """True if password matches the stored bcrypt hash"""
+    return _run(bcrypt.checkpw, password.encode('utf-8'), stored_hash.encode('utf-8'))
+
+
+def hash_cost(stored_hash):
+    """Cost factor of a bcrypt hash, None if it is not one"""
+    match = _COST_RE.match(stored_hash or '')
+    return int(match.group(1)) if match else None
+
+
+def needs_rehash(stored_hash):
+    """True when the hash was made with a different cost than AUTH_BCRYPT_ROUNDS"""
+    cost = hash_cost(stored_hash)
+    return cost is not None and cost != rounds()
@@ -0,0 +1,267 @@
+"""
+In-process search index over active customers
+Every customer contributes normalized keys to one sorted list: Turkish-folded name words,
+digits-only phone numbers (with and without the 0 / 90 prefix), tax number, customer code,
+email and license plates with spacing and case removed ("34 ABC 123" -> "34abc123").
+Prefix lookups are a bisect into that list, so typeahead never scans customers or joins
+customer_vespas. Callers hydrate the returned ids with one IN (...) query.
+"""
+import bisect
+import re
+import threading
+import time
+from django.conf import settings
+from inventory.search_index import fold_text
+from .database import get_db_connection
+
+_NON_DIGIT = re.compile(r'\D+')
+
+_DOCUMENT_SELECT = """
+    SELECT c.id, c.customer_code, c.first_name, c.last_name, c.phone, c.email, c.tax_number
+    FROM customers c
+    WHERE c.status = 'ACTIVE'
+"""
+
+_PLATES_SELECT = """
+    SELECT cv.customer_id, cv.license_plate
+    FROM customer_vespas cv
+    INNER JOIN customers c ON cv.customer_id = c.id
+    WHERE c.status = 'ACTIVE' AND cv.license_plate IS NOT NULL
+"""
+
+
+def normalize_plate(value):
+    """'34 ABC 123', '34-abc-123' and '34abc123' all become '34abc123'"""
+    return fold_text(value).replace(' ', '')
+
+
+def normalize_phone(value):
+    """Digits only: '+90 (555) 111 22 33' -> '905551112233'"""
+    return _NON_DIGIT.sub('', str(value or ''))
+
+
+def _national_phone(digits):
+    """Phone digits without the country code / trunk prefix ('905551112233', '05551112233' -> '5551112233')"""
+    if digits.startswith('90') and len(digits) > 10:
+        return digits[2:]
+    if digits.startswith('0'):
+        return digits[1:]
+    return digits
+
+
+class _CustomerDocument:
+    __slots__ = ('id', 'customer_code', 'first_name', 'last_name', 'phone', 'email', 'name_key', 'keys')
+
+    def __init__(self, row, plates):
+        (self.id, self.customer_code, self.first_name, self.last_name, self.phone, self.email, tax_number) = row
+        name = fold_text(f"{self.first_name or ''} {self.last_name or ''}")
+        self.name_key = name
+        keys = set(name.split())
+        keys.add(name.replace(' ', ''))
+        phone = normalize_phone(self.phone)
+        if phone:
+            keys.update((phone, _national_phone(phone)))
+        tax = normalize_phone(tax_number)
+        if tax:
+            keys.add(tax)
+        if self.customer_code:
+            keys.add(normalize_plate(self.customer_code))
+        if self.email:
+            email = str(self.email).strip().lower()
+            keys.update((email, fold_text(email.split('@')[0]).replace(' ', '')))
+        for plate in plates:
+            plate = normalize_plate(plate)
+            if plate:
+                keys.add(plate)
+        keys.discard('')
+        self.keys = frozenset(keys)
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'customer_code': self.customer_code,
+            'first_name': self.first_name,
+            'last_name': self.last_name,
+            'full_name': f"{self.first_name} {self.last_name}",
+            'phone': self.phone,
+            'email': self.email,
+        }
+
+
+def _query_keys(term):
+    """Alternatives looked up for a whole term: compact text, and phone forms for digit queries"""
+    compact = normalize_plate(term)
+    keys = {compact}
+    digits = normalize_phone(term)
+    if digits and digits == compact:
+        # Phone-like query: match stored numbers with or without the 0 / 90 prefix
+        keys.update((digits, _national_phone(digits)))
+    email = str(term or '').strip().lower()
+    if '@' in email:
+        keys.add(email)
+    keys.discard('')
+    return keys
+
+
+class CustomerSearchIndex:
+    """
+    Sorted (key, customer_id) list over active customers and their plates.
+    Built lazily on first search, kept current by refresh_customers_search() after customer and
+    vespa writes and rebuilt after `ttl` seconds so other worker processes pick up their writes too.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._documents = None
+        self._entries = None  # sorted [(key, customer_id)]
+        self._built_at = 0.0
+        self._generation = 0
+        self.builds = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._documents = None
+            self._entries = None
+            self._generation += 1
+
+    @staticmethod
+    def _load(customer_ids=None):
+        documents_query, plates_query = _DOCUMENT_SELECT, _PLATES_SELECT
+        params = []
+        if customer_ids:
+            placeholders = ', '.join('?' for _ in customer_ids)
+            documents_query += f" AND c.id IN ({placeholders})"
+            plates_query += f" AND c.id IN ({placeholders})"
+            params = list(customer_ids)
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(plates_query, params)
+            plates = {}
+            for customer_id, plate in cursor.fetchall():
+                plates.setdefault(customer_id, []).append(plate)
+            cursor.execute(documents_query, params)
+            return [_CustomerDocument(row, plates.get(row[0], ())) for row in cursor.fetchall()]
+        finally:
+            connection.close()
+
+    def _snapshot(self):
+        documents = self._documents
+        if documents is not None and (self.ttl is None or time.monotonic() - self._built_at < self.ttl):
+            return documents, self._entries
+
+        with self._lock:
+            generation = self._generation
+        documents = {document.id: document for document in self._load()}
+        entries = sorted((key, customer_id) for customer_id, document in documents.items() for key in document.keys)
+        with self._lock:
+            self.builds += 1
+            # A refresh that ran while we were reading wins; rebuild on the next search
+            if generation == self._generation:
+                self._documents = documents
+                self._entries = entries
+                self._built_at = time.monotonic()
+        return documents, entries
+
+    def refresh(self, customer_ids):
+        """Re-read the given customers (and their plates); inactive or deleted ones leave the index"""
+        customer_ids = sorted({int(cid) for cid in customer_ids if cid is not None})
+        if not customer_ids:
+            return
+        with self._lock:
+            # A build that read customers before this write must not be installed
+            self._generation += 1
+            if self._documents is None:
+                return
+        fresh = {document.id: document for document in self._load(customer_ids)}
+        with self._lock:
+            if self._documents is None:
+                return
+            # Copy on write, so concurrent searches keep bisecting a consistent list
+            documents, entries = dict(self._documents), list(self._entries)
+            for customer_id in customer_ids:
+                old = documents.pop(customer_id, None)
+                if old is not None:
+                    for key in old.keys:
+                        position = bisect.bisect_left(entries, (key, customer_id))
+                        if position < len(entries) and entries[position] == (key, customer_id):
+                            del entries[position]
+                document = fresh.get(customer_id)
+                if document is not None:
+                    documents[customer_id] = document
+                    for key in document.keys:
+                        bisect.insort(entries, (key, customer_id))
+            self._documents, self._entries = documents, entries
+
+    @staticmethod
+    def _prefix(entries, prefix):
+        """{customer_id: exact} for keys starting with prefix (exact: some key equals it)"""
+        found = {}
+        position = bisect.bisect_left(entries, (prefix,))
+        while position < len(entries):
+            key, customer_id = entries[position]
+            if not key.startswith(prefix):
+                break
+            found[customer_id] = found.get(customer_id, False) or key == prefix
+            position += 1
+        return found
+
+    def search(self, term, limit=None):
+        """
+        Customer ids whose keys start with the term, best match first.
+        The whole term is tried as one key (plate, phone, email) and word by word (every word
+        must prefix some key of the customer, e.g. 'ali ye' finds 'Ali Yılmaz').
+        """
+        documents, entries = self._snapshot()
+        scores = {}
+        for key in _query_keys(term):
+            for customer_id, exact in self._prefix(entries, key).items():
+                scores[customer_id] = max(scores.get(customer_id, 0), 3 if exact else 2)
+
+        words = fold_text(term).split()
+        if len(words) > 1:
+            matched = None
+            for word in words:
+                found = self._prefix(entries, word).keys()
+                matched = set(found) if matched is None else matched & found
+                if not matched:
+                    break
+            for customer_id in matched or ():
+                scores[customer_id] = max(scores.get(customer_id, 0), 1)
+
+        ranked = sorted(
+            (-score, documents[customer_id].name_key, customer_id)
+            for customer_id, score in scores.items() if customer_id in documents
+        )
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [customer_id for _, _, customer_id in ranked]
+
+    def typeahead(self, term, limit=10):
+        """Display fields of the best matches, answered from memory"""
+        documents, _ = self._snapshot()
+        return [documents[customer_id].as_dict() for customer_id in self.search(term, limit=limit)
+                if customer_id in documents]
+
+    def stats(self):
+        documents = self._documents
+        return {
+            'built': documents is not None,
+            'builds': self.builds,
+            'customers': len(documents) if documents is not None else 0,
+            'keys': len(self._entries) if self._entries is not None else 0,
+            'age_seconds': round(time.monotonic() - self._built_at, 1) if documents is not None else None,
+        }
+
+
+customer_search_index = CustomerSearchIndex(ttl=getattr(settings, 'CUSTOMERS_SEARCH_INDEX_TTL', 300))
+
+
+def search_customer_ids(term, limit=None):
+    return customer_search_index.search(term, limit)
+
+
+def refresh_customers_search(customer_ids):
+    """Call after committing writes to customers or customer_vespas (create, edit, status change)"""
+    customer_search_index.refresh(customer_ids)
@@ -4,16 +4,24 @@ Uses DATABASE.txt tables: customers, customer_vespas, vespa_models
 """
 from typing import List, Dict, Any, Optional
 from core.base_service import BaseSQLService
+from core.reference_registry import reference_registry
+from core.result_cache import invalidate_cache
+from core.bulk import ID_CHUNK_SIZE
+from core.pagination import approximate_count
+from .customer_functions import _CUSTOMERS_KEYSET
+from .search_index import refresh_customers_search, search_customer_ids
 
 
 class CustomerSQLService(BaseSQLService):
     """Customer management using raw SQL"""
     
     @staticmethod
-    def get_all_customers(limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
-        """Get all customers with pagination"""
-        query = """
-        SELECT 
+    def get_all_customers(limit: int = 100, cursor_token: Optional[str] = None,
+                          with_total: bool = False) -> Dict[str, Any]:
+        """Get one keyset page of active customers: {'customers', 'next_cursor', 'has_more', 'total'}"""
+        seek, params = _CUSTOMERS_KEYSET.seek(cursor_token)
+        query = f"""
+        SELECT TOP (?)
             c.id,
             c.customer_code,
             c.first_name,
@@ -32,15 +40,26 @@ class CustomerSQLService(BaseSQLService):
             COUNT(cv.id) as vespa_count
         FROM customers c
         LEFT JOIN customer_vespas cv ON c.id = cv.customer_id AND cv.is_active = 1
-        WHERE c.status = 'ACTIVE'
+        WHERE c.status = 'ACTIVE' {'AND ' + seek if seek else ''}
         GROUP BY c.id, c.customer_code, c.first_name, c.last_name, c.email, c.phone, 
                  c.address, c.city, c.district, c.status, c.customer_type, c.notes, 
                  c.created_date, c.updated_date
-        ORDER BY c.first_name, c.last_name
-        OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
+        ORDER BY {_CUSTOMERS_KEYSET.order_by()}
         """
         
-        return CustomerSQLService.execute_query(query, (offset, limit))
+        rows = CustomerSQLService.execute_query(query, tuple([int(limit) + 1] + params))
+        customers, next_cursor, has_more = _CUSTOMERS_KEYSET.page(rows, limit)
+        total = None
+        if with_total:
+            total = approximate_count(
+                'customers', "SELECT COUNT(*) FROM customers WHERE status = 'ACTIVE'", tags=('customers',)
+            )
+        return {
+            'customers': customers,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'total': total
+        }
     
     @staticmethod
     def get_customer_by_id(customer_id: int) -> Optional[Dict[str, Any]]:
@@ -85,9 +104,13 @@ class CustomerSQLService(BaseSQLService):
     
     @staticmethod
     def search_customers(search_term: str) -> List[Dict[str, Any]]:
-        """Search customers by name, phone, or license plate"""
-        query = """
-        SELECT DISTINCT
+        """Search customers by name, phone, tax number, email or license plate (customer search index)"""
+        ids = search_customer_ids(search_term, limit=ID_CHUNK_SIZE)
+        if not ids:
+            return []
+        
+        query = f"""
+        SELECT 
             c.id,
             c.customer_code,
             c.first_name,
@@ -97,21 +120,11 @@ class CustomerSQLService(BaseSQLService):
             c.phone,
             c.status
         FROM customers c
-        LEFT JOIN customer_vespas cv ON c.id = cv.customer_id
-        WHERE (
-            c.first_name LIKE ? OR 
-            c.last_name LIKE ? OR 
-            c.phone LIKE ? OR
-            c.email LIKE ? OR
-            cv.license_plate LIKE ?
-        ) AND c.status = 'ACTIVE'
+        WHERE c.id IN ({', '.join('?' for _ in ids)}) AND c.status = 'ACTIVE'
         ORDER BY c.first_name, c.last_name
         """
         
-        search_pattern = f"%{search_term}%"
-        params = (search_pattern, search_pattern, search_pattern, search_pattern, search_pattern)
-        
-        return CustomerSQLService.execute_query(query, params)
+        return CustomerSQLService.execute_query(query, tuple(ids))
     
     @staticmethod
     def create_customer(data: Dict[str, Any]) -> int:
@@ -134,7 +147,10 @@ class CustomerSQLService(BaseSQLService):
             'notes': data.get('notes', '')
         }
         
-        return CustomerSQLService.insert('customers', customer_data)
+        customer_id = CustomerSQLService.insert('customers', customer_data)
+        invalidate_cache('customers')
+        refresh_customers_search([customer_id])
+        return customer_id
     
     @staticmethod
     def update_customer(customer_id: int, data: Dict[str, Any]) -> bool:
@@ -144,6 +160,9 @@ class CustomerSQLService(BaseSQLService):
                       if k not in ['id', 'customer_code', 'created_date']}
         
         affected_rows = CustomerSQLService.update('customers', customer_id, update_data)
+        if affected_rows > 0:
+            invalidate_cache('customers')
+            refresh_customers_search([customer_id])
         return affected_rows > 0
     
     @staticmethod
@@ -161,7 +180,10 @@ class CustomerSQLService(BaseSQLService):
             'is_active': 1
         }
         
-        return CustomerSQLService.insert('customer_vespas', data)
+        vespa_id = CustomerSQLService.insert('customer_vespas', data)
+        invalidate_cache('customers')
+        refresh_customers_search([customer_id])
+        return vespa_id
     
     @staticmethod
     def _generate_customer_code() -> str:
@@ -181,22 +203,23 @@ class VespaModelSQLService(BaseSQLService):
     
     @staticmethod
     def get_all_models() -> List[Dict[str, Any]]:
-        """Get all active Vespa models"""
-        query = """
-        SELECT 
-            id,
-            model_code,
-            model_name,
-            model_year,
-            engine_size,
-            category,
-            image_path
-        FROM vespa_models 
-        WHERE is_active = 1
-        ORDER BY category, model_name
-        """
-        
-        return VespaModelSQLService.execute_query(query)
+        """Get all active Vespa models, by category then name (served from the reference registry)"""
+        models = reference_registry.vespa_models.active()
+        # The registry keeps model_name order; a stable sort by category gives ORDER BY category, model_name
+        # (NULL categories first and case-insensitive, like the database collation)
+        models = sorted(models, key=lambda m: (m.category is not None, (m.category or '').casefold()))
+        return [
+            {
+                'id': m.id,
+                'model_code': m.model_code,
+                'model_name': m.model_name,
+                'model_year': m.model_year,
+                'engine_size': m.engine_size,
+                'category': m.category,
+                'image_path': m.image_path,
+            }
+            for m in models
+        ]
     
     @staticmethod
     def get_model_by_id(model_id: int) -> Optional[Dict[str, Any]]:
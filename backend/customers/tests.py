@@ -1,3 +1,39 @@
-from django.test import TestCase
+from datetime import datetime
+from unittest import mock
+from core.tests import RawSqliteTestCase
+from customers.last_login import LastLoginBuffer
 
-# Create your tests here.
+
+class LastLoginBufferTests(RawSqliteTestCase):
+    """customers.last_login: a failed flush keeps the values and schedules a retry"""
+
+    def setUp(self):
+        super().setUp()
+        self.execute("DELETE FROM users WHERE username = 'login-test'")
+        self.user_id = self.execute(
+            "INSERT INTO users (username, email, password_hash, full_name) OUTPUT INSERTED.id VALUES (?, ?, ?, ?)",
+            ('login-test', 'login-test@example.com', 'x', 'Login Test')
+        )[0][0]
+        self.buffer = LastLoginBuffer()
+        self.addCleanup(self.cancel_timer)
+
+    def cancel_timer(self):
+        if self.buffer._timer is not None:
+            self.buffer._timer.cancel()
+
+    def test_failed_flush_is_retried(self):
+        when = datetime(2026, 1, 5, 9, 30)
+        with self.settings(AUTH_LAST_LOGIN_FLUSH_INTERVAL=60):
+            self.buffer.record(self.user_id, when)
+            with mock.patch('customers.last_login.get_dedicated_connection', side_effect=Exception('down')), \
+                    self.assertLogs('customers.last_login', 'WARNING'):
+                self.assertEqual(self.buffer.flush(), 0)
+
+        # Still buffered, with a flush scheduled although no other login arrives
+        self.assertIsNotNone(self.buffer._timer)
+        self.assertEqual(self.buffer._pending, {self.user_id: when})
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertIsNone(self.buffer._timer)
+        last_login = self.execute("SELECT last_login FROM users WHERE id = ?", (self.user_id,))[0][0]
+        self.assertEqual(str(last_login)[:19], '2026-01-05 09:30:00')
@@ -11,7 +11,9 @@ urlpatterns = [
     
     # Customer endpoints
     path('', views.CustomersView.as_view(), name='customers'),
+    path('typeahead/', views.CustomersTypeaheadView.as_view(), name='customers-typeahead'),
     path('<int:customer_id>/', views.CustomerDetailView.as_view(), name='customer-detail'),
+    path('<int:customer_id>/overview/', views.CustomerOverviewView.as_view(), name='customer-overview'),
     
     # Vespa endpoints
     path('vespa-models/', views.VespaModelsView.as_view(), name='vespa-models'),
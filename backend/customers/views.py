@@ -4,8 +4,13 @@ Customer API Views - Simple raw SQL approach
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from core.renderers import FAST_JSON_RENDERERS
+from core.reference_data import conditional_get
+from core.pagination import InvalidCursor
 from .auth_functions import authenticate_user_with_jwt, get_user_by_id
-from .customer_functions import get_all_customers, get_customer_by_id, create_customer, update_customer, search_customers, get_vespa_models, create_customer_vespa, get_customer_vespas
+from .password_hasher import PasswordHasherBusy
+from .search_index import customer_search_index
+from .customer_functions import get_all_customers, get_customer_by_id, create_customer, update_customer, search_customers, get_vespa_models, create_customer_vespa, get_customer_vespas, get_customer_overview, OVERVIEW_DEFAULT_LIMIT, OVERVIEW_SECTIONS
 
 
 # ===== AUTHENTICATION VIEWS =====
@@ -25,12 +30,6 @@ class LoginView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Test database connection first
-            from .database import execute_query
-            test_query = "SELECT COUNT(*) as count FROM users"
-            result = execute_query(test_query)
-            print(f"Database test - Users table count: {result}")
-            
             auth_result = authenticate_user_with_jwt(username, password)
             if auth_result:
                 return Response({
@@ -44,6 +43,12 @@ class LoginView(APIView):
                     'error': 'Invalid credentials'
                 }, status=status.HTTP_401_UNAUTHORIZED)
                 
+        except PasswordHasherBusy as e:
+            response = Response({
+                'error': str(e)
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response['Retry-After'] = '1'
+            return response
         except Exception as e:
             print(f"Login exception: {str(e)}")
             return Response({
@@ -94,24 +99,36 @@ class CurrentUserView(APIView):
 
 class CustomersView(APIView):
     """Customer management"""
+    renderer_classes = FAST_JSON_RENDERERS
     
     def get(self, request):
-        """Get all customers"""
+        """Get all customers (keyset pages: pass next_cursor back as ?cursor=, ?with_total=1 for an approximate total)"""
         try:
-            limit = int(request.GET.get('limit', 100))
-            offset = int(request.GET.get('offset', 0))
+            limit = min(max(int(request.GET.get('limit', 100)), 1), 1000)
             search = request.GET.get('search')
             
             if search:
                 customers = search_customers(search)
+                page = {'customers': customers, 'next_cursor': None, 'has_more': False, 'total': len(customers)}
             else:
-                customers = get_all_customers(limit, offset)
+                page = get_all_customers(
+                    limit,
+                    request.GET.get('cursor'),
+                    with_total=request.GET.get('with_total') in ('1', 'true')
+                )
             
             return Response({
-                'customers': customers,
-                'count': len(customers)
+                'customers': page['customers'],
+                'count': len(page['customers']),
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more'],
+                'total': page['total']
             }, status=status.HTTP_200_OK)
             
+        except InvalidCursor as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 'error': f'Failed to get customers: {str(e)}'
@@ -186,11 +203,59 @@ class CustomerDetailView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class CustomerOverviewView(APIView):
+    """Customer 360: customer, vespas, service records, invoices and appointments in one round trip"""
+    renderer_classes = FAST_JSON_RENDERERS
+    
+    def get(self, request, customer_id):
+        """?limit= rows per section (max 50), ?<section>_offset= to page vespas, service_records, invoices, appointments"""
+        try:
+            limit = int(request.GET.get('limit', OVERVIEW_DEFAULT_LIMIT))
+            offsets = {section: int(request.GET.get(f'{section}_offset', 0)) for section in OVERVIEW_SECTIONS}
+        except ValueError:
+            return Response({
+                'error': 'limit and offsets must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            overview = get_customer_overview(customer_id, limit, offsets)
+            if overview is None:
+                return Response({
+                    'error': 'Customer not found'
+                }, status=status.HTTP_404_NOT_FOUND)
+            return Response(overview, status=status.HTTP_200_OK)
+            
+        except Exception as e:
+            return Response({
+                'error': f'Failed to get customer overview: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class CustomersTypeaheadView(APIView):
+    """Search-as-you-type suggestions answered from the in-memory customer index"""
+    
+    def get(self, request):
+        """?q=name, phone, plate, tax number or email prefix, with optional limit (max 50)"""
+        try:
+            limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+            suggestions = customer_search_index.typeahead(request.GET.get('q', ''), limit)
+            return Response({
+                'customers': suggestions,
+                'count': len(suggestions)
+            }, status=status.HTTP_200_OK)
+            
+        except Exception as e:
+            return Response({
+                'error': f'Failed to search customers: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 # ===== VESPA VIEWS =====
 
 class VespaModelsView(APIView):
     """Vespa models management"""
     
+    @conditional_get('vespa_models')
     def get(self, request):
         """Get all Vespa models"""
         try:
@@ -0,0 +1,123 @@
+"""
+In-process cache of the currency_rates history
+Answers "latest rate" and "rate on or before date D" without querying currency_rates per row
+"""
+import threading
+import time
+from bisect import bisect_right
+from datetime import date, datetime
+from django.conf import settings
+from .database import get_db_connection
+
+
+def _as_date(value):
+    """rate_date/effective_date as a date (DATETIME values compare by their day, strings are ISO)"""
+    if value is None or type(value) is date:
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class CurrencyRateCache:
+    """
+    Full currency_rates history, one sorted (dates, sell_rates) series per currency.
+    Loaded lazily on first use, dropped by invalidate() after writes to currency_rates
+    and reloaded after `ttl` seconds so other worker processes pick up new rates too.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._series = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        self.loads = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._series = None
+            self._generation += 1
+
+    def _snapshot(self):
+        series = self._series
+        if series is not None and (self.ttl is None or time.monotonic() - self._loaded_at < self.ttl):
+            return series
+
+        with self._lock:
+            generation = self._generation
+        series = self._load()
+        with self._lock:
+            self.loads += 1
+            # A write that invalidated the cache while we were reading wins
+            if generation == self._generation:
+                self._series = series
+                self._loaded_at = time.monotonic()
+        return series
+
+    @staticmethod
+    def _load():
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT currency_code, rate_date, sell_rate
+                FROM currency_rates
+                ORDER BY currency_code, rate_date
+            """)
+            rows = cursor.fetchall()
+        finally:
+            connection.close()
+
+        series = {}
+        for currency_code, rate_date, sell_rate in rows:
+            dates, rates = series.setdefault(currency_code, ([], []))
+            dates.append(_as_date(rate_date))
+            rates.append(float(sell_rate) if sell_rate is not None else None)
+        return series
+
+    def latest(self, currency_code):
+        """Most recent sell rate for the currency, or None if it has no rates"""
+        entry = self._snapshot().get(currency_code)
+        if not entry or not entry[1]:
+            return None
+        return entry[1][-1]
+
+    def rate_on(self, currency_code, on_date):
+        """Sell rate of the latest rate_date <= on_date, or None (also when on_date is None)"""
+        if on_date is None:
+            return None
+        entry = self._snapshot().get(currency_code)
+        if not entry:
+            return None
+        dates, rates = entry
+        index = bisect_right(dates, _as_date(on_date))
+        return rates[index - 1] if index else None
+
+    def stats(self):
+        series = self._series
+        return {
+            'loaded': series is not None,
+            'loads': self.loads,
+            'currencies': sorted(series) if series is not None else [],
+            'rows': sum(len(dates) for dates, _ in series.values()) if series is not None else 0,
+            'age_seconds': round(time.monotonic() - self._loaded_at, 1) if series is not None else None,
+        }
+
+
+rate_cache = CurrencyRateCache(ttl=getattr(settings, 'CURRENCY_RATE_CACHE_TTL', 300))
+
+
+def get_latest_rate(currency_code):
+    return rate_cache.latest(currency_code)
+
+
+def get_rate_on(currency_code, on_date):
+    return rate_cache.rate_on(currency_code, on_date)
+
+
+def invalidate_currency_rates():
+    """Call after committing writes to currency_rates"""
+    rate_cache.invalidate()
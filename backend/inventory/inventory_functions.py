@@ -7,43 +7,38 @@ Implements DATABASE.txt inventory system with:
 - Compatibility with Vespa models
 - Stock movements tracking
 """
+import re
 from datetime import datetime
 from decimal import Decimal
 from .database import get_db_connection
+from core.database import get_dedicated_connection
+from core.pagination import decode_cursor, encode_cursor
+from .currency_cache import get_latest_rate, get_rate_on, invalidate_currency_rates
+from .stock_summary import ensure_part_stock_summary, refresh_part_stock_summary
+from .search_index import search_part_ids
+from core.bulk import ID_CHUNK_SIZE
+from core.row_mapping import RowShape, or_empty, to_float
+from core.result_cache import cached_result, invalidate_cache
+from core.reference_data import bump_data_version
+from core.reference_registry import reference_registry
 
 
 # ===== STORAGE LOCATIONS =====
 
 def get_all_storage_locations():
-    """Get all storage locations with warehouse/store structure"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
-    
-    query = """
-    SELECT 
-        id, location_code, location_name, location_type,
-        shelf_code, rack_number, level_number, description, is_active
-    FROM storage_locations 
-    WHERE is_active = 1
-    ORDER BY location_type, shelf_code, rack_number, level_number
-    """
-    
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    connection.close()
-    
+    """Get all storage locations with warehouse/store structure (from the reference registry)"""
     locations = []
-    for row in rows:
+    for location in reference_registry.storage_locations.active():
         locations.append({
-            'id': row[0],
-            'location_code': row[1],
-            'location_name': row[2],
-            'location_type': row[3],  # STORE or WAREHOUSE
-            'shelf_code': row[4],
-            'rack_number': row[5],
-            'level_number': row[6],
-            'description': row[7],
-            'is_active': row[8]
+            'id': location.id,
+            'location_code': location.location_code,
+            'location_name': location.location_name,
+            'location_type': location.location_type,  # STORE or WAREHOUSE
+            'shelf_code': location.shelf_code,
+            'rack_number': location.rack_number,
+            'level_number': location.level_number,
+            'description': location.description,
+            'is_active': location.is_active
         })
     
     return locations
@@ -51,34 +46,23 @@ def get_all_storage_locations():
 
 def get_warehouse_structure():
     """Get warehouse structure organized by shelves and racks"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
-    
-    query = """
-    SELECT 
-        shelf_code,
-        rack_number,
-        level_number,
-        COUNT(*) as location_count,
-        STRING_AGG(location_code, ', ') as location_codes
-    FROM storage_locations 
-    WHERE location_type = 'WAREHOUSE' AND is_active = 1
-    GROUP BY shelf_code, rack_number, level_number
-    ORDER BY shelf_code, rack_number, level_number
-    """
-    
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    connection.close()
+    # Registry rows are ordered by location_type, shelf_code, rack_number, level_number, id,
+    # so groups come out in shelf/rack/level order with their codes in id order
+    groups = {}
+    for location in reference_registry.storage_locations.active():
+        if location.location_type != 'WAREHOUSE':
+            continue
+        key = (location.shelf_code, location.rack_number, location.level_number)
+        groups.setdefault(key, []).append(location.location_code)
     
     structure = []
-    for row in rows:
+    for (shelf_code, rack_number, level_number), codes in groups.items():
         structure.append({
-            'shelf_code': row[0],
-            'rack_number': row[1],
-            'level_number': row[2],
-            'location_count': row[3],
-            'location_codes': row[4]
+            'shelf_code': shelf_code,
+            'rack_number': rack_number,
+            'level_number': level_number,
+            'location_count': len(codes),
+            'location_codes': ', '.join(codes)
         })
     
     return structure
@@ -145,7 +129,9 @@ def create_supplier(data):
     ))
     
     supplier_id = cursor.fetchone()[0]
+    bump_data_version('suppliers', cursor=cursor)
     connection.commit()
+    invalidate_cache('inventory')
     connection.close()
     
     return supplier_id
@@ -154,81 +140,55 @@ def create_supplier(data):
 # ===== PART CATEGORIES =====
 
 def get_part_categories_tree():
-    """Get part categories in hierarchical structure"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
-    
-    query = """
-    WITH CategoryHierarchy AS (
-        -- Root categories
-        SELECT 
-            id, category_name, parent_category_id, category_type, 
-            sort_order, 0 as level,
-            CAST(category_name AS NVARCHAR(MAX)) as hierarchy_path
-        FROM part_categories 
-        WHERE parent_category_id IS NULL AND is_active = 1
-        
-        UNION ALL
-        
-        -- Child categories
-        SELECT 
-            c.id, c.category_name, c.parent_category_id, c.category_type,
-            c.sort_order, ch.level + 1,
-            ch.hierarchy_path + ' > ' + c.category_name
-        FROM part_categories c
-        INNER JOIN CategoryHierarchy ch ON c.parent_category_id = ch.id
-        WHERE c.is_active = 1
-    )
-    SELECT 
-        id, category_name, parent_category_id, category_type, 
-        sort_order, level, hierarchy_path
-    FROM CategoryHierarchy
-    ORDER BY level, sort_order, category_name
-    """
-    
-    cursor.execute(query)
-    rows = cursor.fetchall()
-    connection.close()
-    
+    """Get part categories in hierarchical structure (built from the reference registry)"""
+    # Same result as the former recursive CTE: active categories reachable from an active root,
+    # ordered by level, sort_order, category_name. Registry rows are already in
+    # sort_order, category_name order, so each level keeps that order.
+    active = reference_registry.part_categories.active()
     categories = []
-    for row in rows:
-        categories.append({
-            'id': row[0],
-            'category_name': row[1],
-            'parent_category_id': row[2],
-            'category_type': row[3],  # PART or ACCESSORY
-            'sort_order': row[4],
-            'level': row[5],
-            'hierarchy_path': row[6]
-        })
+    parents = {}  # id -> hierarchy_path of the previous level
+    level = 0
+    while True:
+        current = {}
+        for category in active:
+            if level == 0:
+                if category.parent_category_id is not None:
+                    continue
+                path = category.category_name
+            elif category.parent_category_id in parents:
+                path = f"{parents[category.parent_category_id]} > {category.category_name}"
+            else:
+                continue
+            current[category.id] = path
+            categories.append({
+                'id': category.id,
+                'category_name': category.category_name,
+                'parent_category_id': category.parent_category_id,
+                'category_type': category.category_type,  # PART or ACCESSORY
+                'sort_order': category.sort_order,
+                'level': level,
+                'hierarchy_path': path
+            })
+        if not current:
+            break
+        parents = current
+        level += 1
     
     return categories
 
 
 def get_categories_by_type(category_type):
     """Get categories by type (PART or ACCESSORY)"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
-    
-    query = """
-    SELECT 
-        id, category_name, parent_category_id, sort_order
-    FROM part_categories 
-    WHERE category_type = ? AND is_active = 1
-    ORDER BY sort_order, category_name
-    """
-    
-    cursor.execute(query, (category_type,))
-    rows = cursor.fetchall()
-    connection.close()
-    
+    wanted = (category_type or '').casefold()
     categories = []
-    for row in rows:
+    for category in reference_registry.part_categories.active():
+        if (category.category_type or '').casefold() != wanted:
+            continue
         categories.append({
-            'id': row[0],
-            'category_name': row[1],
-            'parent_category_id': row[2],
-            'sort_order': row[3]
+            'id': category.id,
+            'category_name': category.category_name,
+            'parent_category_id': category.parent_category_id,
+            'sort_order': category.sort_order
         })
     
     return categories
@@ -236,73 +196,174 @@ def get_categories_by_type(category_type):
 
 # ===== PARTS =====
 
-def get_all_parts_with_stock():
-    """Get all parts with total stock from all locations and price information"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
-    
-    query = """
-    SELECT 
-        p.id, p.part_code, p.part_name, p.part_type,
-        p.category_id, pc.category_name, p.description,
-        p.min_stock_level, p.max_stock_level,
-        p.brand, p.model, p.color, p.size, p.image_path,
-        ISNULL(stock_summary.total_stock, 0) as total_stock,
-        ISNULL(stock_summary.total_reserved, 0) as total_reserved,
-        ISNULL(stock_summary.available_stock, 0) as available_stock,
-        CASE 
-            WHEN ISNULL(stock_summary.total_stock, 0) <= 0 THEN 'CRITICAL'
-            WHEN ISNULL(stock_summary.total_stock, 0) <= p.min_stock_level THEN 'LOW'
-            ELSE 'NORMAL'
-        END as stock_status,
-        -- Price information
-        ISNULL(pp.purchase_price, 0) as purchase_price,
-        ISNULL(pp.sale_price, 0) as sale_price,
-        ISNULL(pp.currency_type, 'TRY') as currency_type,
-        pp.effective_date,
-        pp.supplier_id as supplier_id,
-        s.supplier_name,
-        -- Current exchange rates (latest)
-        (SELECT TOP 1 sell_rate FROM currency_rates WHERE currency_code = 'EUR' ORDER BY rate_date DESC) as eur_try_today,
-        (SELECT TOP 1 sell_rate FROM currency_rates WHERE currency_code = 'USD' ORDER BY rate_date DESC) as usd_try_today,
-        -- Exchange rates on purchase date
-        (SELECT TOP 1 sell_rate FROM currency_rates WHERE currency_code = 'EUR' AND rate_date <= pp.effective_date ORDER BY rate_date DESC) as eur_try_on_purchase,
-        (SELECT TOP 1 sell_rate FROM currency_rates WHERE currency_code = 'USD' AND rate_date <= pp.effective_date ORDER BY rate_date DESC) as usd_try_on_purchase,
-        p.is_active, p.created_date, p.updated_date
+# Catalogue columns: output key -> SQL expression. Only the requested keys are selected.
+_PART_COLUMNS = {
+    'id': 'p.id',
+    'part_code': 'p.part_code',
+    'part_name': 'p.part_name',
+    'part_type': 'p.part_type',
+    'category_id': 'p.category_id',
+    'category_name': 'pc.category_name',
+    'description': 'p.description',
+    'min_stock_level': 'p.min_stock_level',
+    'max_stock_level': 'p.max_stock_level',
+    'brand': 'p.brand',
+    'model': 'p.model',
+    'color': 'p.color',
+    'size': 'p.size',
+    'image_path': 'p.image_path',
+    'total_stock': 'ISNULL(stock_summary.total_stock, 0)',
+    'total_reserved': 'ISNULL(stock_summary.reserved_stock, 0)',
+    'available_stock': 'ISNULL(stock_summary.available_stock, 0)',
+    'stock_status': "ISNULL(stock_summary.stock_status, 'CRITICAL')",
+    'purchase_price': 'ISNULL(pp.purchase_price, 0)',
+    'sale_price': 'ISNULL(pp.sale_price, 0)',
+    'currency_type': "ISNULL(pp.currency_type, 'TRY')",
+    'effective_date': 'pp.effective_date',
+    'supplier_id': 'pp.supplier_id',
+    'supplier_name': 's.supplier_name',
+    'is_active': 'p.is_active',
+    'created_date': 'p.created_date',
+    'updated_date': 'p.updated_date',
+}
+
+# Calculated in Python from purchase_price, sale_price, currency_type and effective_date
+_PART_PRICE_FIELDS = (
+    'purchase_price_try_at_purchase', 'sale_price_try_today',
+    'eur_try_today', 'usd_try_today', 'eur_try_on_purchase', 'usd_try_on_purchase',
+)
+_PART_PRICE_SOURCES = ('purchase_price', 'sale_price', 'currency_type', 'effective_date')
+
+# Default response shape (same key order as before projection existed)
+_PART_AUDIT_FIELDS = ('is_active', 'created_date', 'updated_date')
+PART_CATALOGUE_FIELDS = (
+    [f for f in _PART_COLUMNS if f not in _PART_AUDIT_FIELDS] + list(_PART_PRICE_FIELDS) + list(_PART_AUDIT_FIELDS)
+)
+
+# Column names are the SELECT aliases above; only the converted ones are listed
+_PART_ROW = RowShape('PartRow', converters={
+    'purchase_price': to_float,
+    'sale_price': to_float,
+    'currency_type': lambda value: value or 'TRY',
+})
+_MODEL_PART_ROW = RowShape('ModelPartRow', converters={'sale_price_tl': to_float, 'image_path': or_empty})
+_SEARCH_PART_ROW = RowShape('SearchPartRow', converters={'sale_price_tl': to_float})
+_PLAIN_ROW = RowShape('Row')
+
+PART_CATALOGUE_SORTS = {
+    'part_name': 'p.part_name',
+    'part_code': 'p.part_code',
+    'created_date': 'p.created_date',
+    'total_stock': 'ISNULL(stock_summary.total_stock, 0)',
+    'available_stock': 'ISNULL(stock_summary.available_stock, 0)',
+    'sale_price': 'ISNULL(pp.sale_price, 0)',
+}
+
+# Joins are added only when a selected column, filter or sort references their alias
+_PART_JOINS = (
+    ('pc', "INNER JOIN part_categories pc ON p.category_id = pc.id"),
+    ('stock_summary', "LEFT JOIN part_stock_summary stock_summary ON p.id = stock_summary.part_id"),
+    ('pp', "LEFT JOIN part_prices pp ON p.id = pp.part_id AND pp.is_current = 1"),
+    ('s', "LEFT JOIN suppliers s ON pp.supplier_id = s.id"),
+)
+
+
+def _part_catalogue_joins(*sql_fragments):
+    sql = ' '.join(sql_fragments)
+    needed = {alias for alias, _ in _PART_JOINS if re.search(rf'\b{alias}\.', sql)}
+    if 's' in needed:
+        needed.add('pp')
+    return '\n    '.join(join for alias, join in _PART_JOINS if alias in needed)
+
+
+def _part_catalogue_filters(category_id=None, part_type=None, stock_status=None,
+                            supplier_id=None, currency_type=None):
+    """WHERE conditions and params shared by the catalogue page and its count"""
+    conditions = ["p.is_active = 1"]
+    params = []
+    if category_id:
+        conditions.append("p.category_id = ?")
+        params.append(int(category_id))
+    if part_type:
+        conditions.append("p.part_type = ?")
+        params.append(part_type)
+    if stock_status:
+        statuses = [s.strip().upper() for s in str(stock_status).split(',') if s.strip()]
+        conditions.append(f"{_PART_COLUMNS['stock_status']} IN ({', '.join('?' for _ in statuses)})")
+        params.extend(statuses)
+    if supplier_id:
+        conditions.append("pp.supplier_id = ?")
+        params.append(int(supplier_id))
+    if currency_type:
+        conditions.append(f"{_PART_COLUMNS['currency_type']} = ?")
+        params.append(currency_type.upper())
+    return conditions, params
+
+
+def get_all_parts_with_stock(category_id=None, part_type=None, stock_status=None, supplier_id=None,
+                             currency_type=None, fields=None, sort='part_name', limit=None, offset=0):
+    """
+    Get active parts with total stock and price information.
+    Filters, sorting and paging run in SQL; `fields` restricts the returned keys
+    (and the selected columns/joins) to a subset of PART_CATALOGUE_FIELDS.
+    Without a limit every matching part is returned.
+    """
+    ensure_part_stock_summary()
+
+    fields = list(fields) if fields else list(PART_CATALOGUE_FIELDS)
+    unknown = [f for f in fields if f not in _PART_COLUMNS and f not in _PART_PRICE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown part fields: {', '.join(unknown)}")
+    descending = bool(sort) and sort.startswith('-')
+    sort_key = (sort or 'part_name').lstrip('-')
+    if sort_key not in PART_CATALOGUE_SORTS:
+        raise ValueError(f"Unknown sort field: {sort_key}")
+
+    with_prices = any(f in _PART_PRICE_FIELDS for f in fields)
+    selected = [f for f in _PART_COLUMNS if f in fields or (with_prices and f in _PART_PRICE_SOURCES)]
+    select_list = ', '.join(f"{_PART_COLUMNS[f]} as {f}" for f in selected)
+    direction = 'DESC' if descending else 'ASC'
+    order_by = f"{PART_CATALOGUE_SORTS[sort_key]} {direction}, p.id {direction}"
+    conditions, params = _part_catalogue_filters(category_id, part_type, stock_status, supplier_id, currency_type)
+    where_clause = " AND ".join(conditions)
+
+    query = f"""
+    SELECT {select_list}
     FROM parts p
-    INNER JOIN part_categories pc ON p.category_id = pc.id
-    LEFT JOIN (
-        SELECT 
-            part_id,
-            SUM(current_stock) as total_stock,
-            SUM(reserved_stock) as total_reserved,
-            SUM(current_stock - reserved_stock) as available_stock
-        FROM part_stock_locations
-        GROUP BY part_id
-    ) stock_summary ON p.id = stock_summary.part_id
-    LEFT JOIN part_prices pp ON p.id = pp.part_id AND pp.is_current = 1
-    LEFT JOIN suppliers s ON pp.supplier_id = s.id
-    WHERE p.is_active = 1
-    ORDER BY p.part_name
+    {_part_catalogue_joins(select_list, where_clause, order_by)}
+    WHERE {where_clause}
+    ORDER BY {order_by}
     """
-    
-    cursor.execute(query)
-    rows = cursor.fetchall()
+    if limit is not None:
+        query += "OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+        params.extend([int(offset), int(limit)])
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    cursor.execute(query, params)
+    records = _PART_ROW.dicts(cursor)
     connection.close()
-    
+
+    if not with_prices:
+        if selected == fields:
+            return records
+        return [{f: record[f] for f in fields} for record in records]
+
+    # Exchange rates come from the in-process rate cache instead of per-row subqueries
+    eur_try_today = get_latest_rate('EUR') or 35.0
+    usd_try_today = get_latest_rate('USD') or 32.0
+    rates_on = {}
+
     parts = []
-    for row in rows:
-        # Extract values (keep indices in sync with SELECT)
-        purchase_price = float(row[18]) if row[18] else 0
-        sale_price = float(row[19]) if row[19] else 0
-        currency_type = row[20] or 'TRY'
-        effective_date = row[21]
-        supplier_id = row[22]
-        supplier_name = row[23]
-        eur_try_today = float(row[24]) if row[24] else 35.0
-        usd_try_today = float(row[25]) if row[25] else 32.0
-        eur_try_on_purchase = float(row[26]) if row[26] else 35.0
-        usd_try_on_purchase = float(row[27]) if row[27] else 32.0
+    for record in records:
+        purchase_price = record['purchase_price']
+        sale_price = record['sale_price']
+        currency_type = record['currency_type']
+        effective_date = record['effective_date']
+        if effective_date not in rates_on:
+            rates_on[effective_date] = (get_rate_on('EUR', effective_date) or 35.0,
+                                        get_rate_on('USD', effective_date) or 32.0)
+        eur_try_on_purchase, usd_try_on_purchase = rates_on[effective_date]
 
         # Calculate TRY prices
         if currency_type == 'EUR':
@@ -316,59 +377,54 @@ def get_all_parts_with_stock():
             purchase_price_try_at_purchase = purchase_price
             sale_price_try_today = sale_price
 
-        parts.append({
-            'id': row[0],
-            'part_code': row[1],
-            'part_name': row[2],
-            'part_type': row[3],
-            'category_id': row[4],
-            'category_name': row[5],
-            'description': row[6],
-            'min_stock_level': row[7],
-            'max_stock_level': row[8],
-            'brand': row[9],
-            'model': row[10],
-            'color': row[11],
-            'size': row[12],
-            'image_path': row[13],
-            'total_stock': row[14],
-            'total_reserved': row[15],
-            'available_stock': row[16],
-            'stock_status': row[17],
-            'purchase_price': purchase_price,
-            'sale_price': sale_price,
-            'currency_type': currency_type,
-            'effective_date': effective_date,
-            'supplier_id': supplier_id,
-            'supplier_name': supplier_name,
-            # Calculated TRY prices
+        record.update({
             'purchase_price_try_at_purchase': round(purchase_price_try_at_purchase, 2),
             'sale_price_try_today': round(sale_price_try_today, 2),
             'eur_try_today': eur_try_today,
             'usd_try_today': usd_try_today,
             'eur_try_on_purchase': eur_try_on_purchase,
             'usd_try_on_purchase': usd_try_on_purchase,
-            'is_active': row[28],
-            'created_date': row[29],
-            'updated_date': row[30]
         })
-    
+        parts.append({f: record[f] for f in fields})
+
     return parts
 
 
+def count_parts_with_stock(category_id=None, part_type=None, stock_status=None, supplier_id=None, currency_type=None):
+    """Number of parts get_all_parts_with_stock would return without a limit (joins only what the filters need)"""
+    if stock_status:
+        ensure_part_stock_summary()
+    conditions, params = _part_catalogue_filters(category_id, part_type, stock_status, supplier_id, currency_type)
+    where_clause = " AND ".join(conditions)
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    cursor.execute(f"""
+    SELECT COUNT(*)
+    FROM parts p
+    {_part_catalogue_joins(where_clause)}
+    WHERE {where_clause}
+    """, params)
+    total = cursor.fetchone()[0]
+    connection.close()
+    return total
+
+
 def get_parts_by_model_with_stock(vespa_model_id, search_term=None):
     """Get parts compatible with a specific Vespa model (PART type only), including stock and price info.
-    Optional search by part name/code/category.
+    Optional search by part name/code/category (through the parts search index).
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    ensure_part_stock_summary()
 
     where_search = ""
     params = [vespa_model_id]
+    rank = None
     if search_term:
-        where_search = " AND (p.part_name LIKE ? OR p.part_code LIKE ? OR pc.category_name LIKE ?)"
-        like = f"%{search_term}%"
-        params.extend([like, like, like])
+        where_search, search_params, rank = _search_id_filter(search_term, part_type='PART')
+        if rank is None:
+            return []
+        where_search = f" AND {where_search}"
+        params.extend(search_params)
 
     query = f"""
     SELECT 
@@ -381,14 +437,7 @@ def get_parts_by_model_with_stock(vespa_model_id, search_term=None):
     FROM parts p
     INNER JOIN part_categories pc ON p.category_id = pc.id
     INNER JOIN part_model_compatibility pmc ON pmc.part_id = p.id AND pmc.vespa_model_id = ?
-    LEFT JOIN (
-        SELECT 
-            part_id,
-            SUM(current_stock) as total_stock,
-            SUM(current_stock - reserved_stock) as available_stock
-        FROM part_stock_locations
-        GROUP BY part_id
-    ) stock_summary ON p.id = stock_summary.part_id
+    LEFT JOIN part_stock_summary stock_summary ON p.id = stock_summary.part_id
     LEFT JOIN (
         SELECT 
             pp.part_id,
@@ -410,25 +459,14 @@ def get_parts_by_model_with_stock(vespa_model_id, search_term=None):
     ORDER BY p.part_name
     """
 
+    connection = get_db_connection()
+    cursor = connection.cursor()
     cursor.execute(query, params)
-    rows = cursor.fetchall()
+    parts = _MODEL_PART_ROW.dicts(cursor)
     connection.close()
 
-    parts = []
-    for row in rows:
-        parts.append({
-            'id': row[0],
-            'part_code': row[1],
-            'part_name': row[2],
-            'part_type': row[3],
-            'category_name': row[4],
-            'description': row[5],
-            'total_stock': row[6],
-            'available_stock': row[7],
-            'sale_price_tl': float(row[8]) if row[8] else 0.0,
-            'image_path': row[9] or ''
-        })
-
+    if rank is not None:
+        parts.sort(key=lambda part: rank[part['id']])
     return parts
 
 def get_part_stock_by_location(part_id):
@@ -450,29 +488,14 @@ def get_part_stock_by_location(part_id):
     """
     
     cursor.execute(query, (part_id,))
-    rows = cursor.fetchall()
+    locations = _PLAIN_ROW.dicts(cursor)
     connection.close()
-    
-    locations = []
-    for row in rows:
-        locations.append({
-            'location_code': row[0],
-            'location_name': row[1],
-            'location_type': row[2],
-            'shelf_code': row[3],
-            'rack_number': row[4],
-            'level_number': row[5],
-            'current_stock': row[6],
-            'reserved_stock': row[7],
-            'available_stock': row[8],
-            'updated_date': row[9]
-        })
-    
     return locations
 
 
 def get_low_stock_parts():
     """Get parts with low or critical stock levels"""
+    ensure_part_stock_summary()
     connection = get_db_connection()
     cursor = connection.cursor()
     
@@ -488,11 +511,7 @@ def get_low_stock_parts():
         s.supplier_name
     FROM parts p
     INNER JOIN part_categories pc ON p.category_id = pc.id
-    LEFT JOIN (
-        SELECT part_id, SUM(current_stock) as total_stock
-        FROM part_stock_locations
-        GROUP BY part_id
-    ) stock_summary ON p.id = stock_summary.part_id
+    LEFT JOIN part_stock_summary stock_summary ON p.id = stock_summary.part_id
     LEFT JOIN part_prices pp ON p.id = pp.part_id AND pp.is_current = 1
     LEFT JOIN suppliers s ON pp.supplier_id = s.id
     WHERE p.is_active = 1 
@@ -506,42 +525,38 @@ def get_low_stock_parts():
     """
     
     cursor.execute(query)
-    rows = cursor.fetchall()
+    parts = _PLAIN_ROW.dicts(cursor)
     connection.close()
-    
-    parts = []
-    for row in rows:
-        parts.append({
-            'id': row[0],
-            'part_code': row[1],
-            'part_name': row[2],
-            'part_type': row[3],
-            'category_name': row[4],
-            'min_stock_level': row[5],
-            'total_stock': row[6],
-            'stock_status': row[7],
-            'supplier_name': row[8]
-        })
-    
     return parts
 
 
+def _search_id_filter(search_term, part_type=None, category_id=None):
+    """
+    Resolve a search term through the parts search index.
+    Returns (condition, params, {part_id: rank}) for the best ID_CHUNK_SIZE matches,
+    or (None, [], None) when nothing matches.
+    """
+    ids = search_part_ids(search_term, part_type, category_id, limit=ID_CHUNK_SIZE)
+    if not ids:
+        return None, [], None
+    condition = f"p.id IN ({', '.join('?' for _ in ids)})"
+    return condition, ids, {part_id: position for position, part_id in enumerate(ids)}
+
+
 def search_parts(search_term, part_type=None, category_id=None):
-    """Advanced part search with filters"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    """Advanced part search with filters (search term matched by the in-memory parts index)"""
+    ensure_part_stock_summary()
     
     where_conditions = ["p.is_active = 1"]
     params = []
+    rank = None
     
     # Search term
     if search_term:
-        where_conditions.append("""
-        (p.part_code LIKE ? OR p.part_name LIKE ? OR 
-         p.description LIKE ? OR p.brand LIKE ? OR p.model LIKE ?)
-        """)
-        search_pattern = f"%{search_term}%"
-        params.extend([search_pattern] * 5)
+        condition, params, rank = _search_id_filter(search_term, part_type, category_id)
+        if rank is None:
+            return []
+        where_conditions.append(condition)
     
     # Part type filter
     if part_type:
@@ -564,11 +579,7 @@ def search_parts(search_term, part_type=None, category_id=None):
         s.supplier_name
     FROM parts p
     INNER JOIN part_categories pc ON p.category_id = pc.id
-    LEFT JOIN (
-        SELECT part_id, SUM(current_stock) as total_stock
-        FROM part_stock_locations
-        GROUP BY part_id
-    ) stock_summary ON p.id = stock_summary.part_id
+    LEFT JOIN part_stock_summary stock_summary ON p.id = stock_summary.part_id
     LEFT JOIN (
         SELECT 
             pp.part_id,
@@ -588,27 +599,14 @@ def search_parts(search_term, part_type=None, category_id=None):
     ORDER BY p.part_name
     """
     
+    connection = get_db_connection()
+    cursor = connection.cursor()
     cursor.execute(query, params)
-    rows = cursor.fetchall()
+    parts = _SEARCH_PART_ROW.dicts(cursor)
     connection.close()
-    
-    parts = []
-    for row in rows:
-        parts.append({
-            'id': row[0],
-            'part_code': row[1],
-            'part_name': row[2],
-            'part_type': row[3],
-            'category_name': row[4],
-            'brand': row[5],
-            'model': row[6],
-            'color': row[7],
-            'size': row[8],
-            'total_stock': row[9],
-            'sale_price_tl': float(row[10]) if row[10] else 0,
-            'supplier_name': row[11]
-        })
-    
+
+    if rank is not None:
+        parts.sort(key=lambda part: rank[part['id']])
     return parts
 
 
@@ -616,6 +614,7 @@ def search_parts(search_term, part_type=None, category_id=None):
 
 def create_stock_movement(part_id, location_id, movement_type, quantity, reference_type=None, reference_id=None, notes='', user_id=1):
     """Create stock movement and update stock levels"""
+    ensure_part_stock_summary()
     connection = get_db_connection()
     cursor = connection.cursor()
     
@@ -659,7 +658,10 @@ def create_stock_movement(part_id, location_id, movement_type, quantity, referen
                 VALUES (source.part_id, source.storage_location_id, source.new_stock, 0);
         """, (part_id, location_id, new_stock))
         
+        refresh_part_stock_summary(cursor, [part_id])
+        
         connection.commit()
+        invalidate_cache('inventory')
         return True
         
     except Exception as e:
@@ -669,11 +671,30 @@ def create_stock_movement(part_id, location_id, movement_type, quantity, referen
         connection.close()
 
 
-def get_stock_movements_history(part_id=None, location_id=None, limit=100):
-    """Get stock movements history with filters"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
-    
+_MOVEMENT_COLUMNS = (
+    'id', 'part_code', 'part_name', 'location_code', 'location_name',
+    'movement_type', 'quantity', 'reference_type', 'reference_id',
+    'notes', 'created_date', 'created_by_name'
+)
+
+_MOVEMENT_SELECT = """
+    SELECT {top}
+        sm.id, p.part_code, p.part_name,
+        sl.location_code, sl.location_name,
+        sm.movement_type, sm.quantity,
+        sm.reference_type, sm.reference_id,
+        sm.notes, sm.created_date,
+        u.full_name as created_by_name
+    FROM stock_movements sm
+    INNER JOIN parts p ON sm.part_id = p.id
+    INNER JOIN storage_locations sl ON sm.storage_location_id = sl.id
+    LEFT JOIN users u ON sm.created_by = u.id
+    {where_clause}
+    ORDER BY sm.created_date DESC, sm.id DESC
+"""
+
+
+def _movement_filters(part_id=None, location_id=None, date_from=None, date_to=None):
     where_conditions = []
     params = []
     
@@ -685,46 +706,79 @@ def get_stock_movements_history(part_id=None, location_id=None, limit=100):
         where_conditions.append("sm.storage_location_id = ?")
         params.append(location_id)
     
-    where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+    if date_from:
+        where_conditions.append("sm.created_date >= ?")
+        params.append(date_from)
     
-    query = f"""
-    SELECT TOP {limit}
-        sm.id, p.part_code, p.part_name,
-        sl.location_code, sl.location_name,
-        sm.movement_type, sm.quantity,
-        sm.reference_type, sm.reference_id,
-        sm.notes, sm.created_date,
-        u.full_name as created_by_name
-    FROM stock_movements sm
-    INNER JOIN parts p ON sm.part_id = p.id
-    INNER JOIN storage_locations sl ON sm.storage_location_id = sl.id
-    LEFT JOIN users u ON sm.created_by = u.id
-    {where_clause}
-    ORDER BY sm.created_date DESC
+    if date_to:
+        where_conditions.append("sm.created_date < DATEADD(day, 1, CAST(? AS DATE))")
+        params.append(date_to)
+    
+    return where_conditions, params
+
+
+def get_stock_movements_page(part_id=None, location_id=None, limit=100, cursor_token=None):
     """
+    One page of the movement ledger, newest first, keyset-paginated on (created_date, id).
+    Returns {'stock_movements', 'next_cursor', 'has_more'}; pass next_cursor back to get the next page.
+    """
+    where_conditions, params = _movement_filters(part_id, location_id)
     
-    cursor.execute(query, params)
+    if cursor_token:
+        last_created, last_id = decode_cursor('stock_movements', cursor_token, 2)
+        # The anchor's created_date is re-read by id: DATETIME2 is more precise than the token.
+        # The token value is only used when the anchor row no longer exists.
+        where_conditions.append("""
+        (sm.created_date < ISNULL((SELECT created_date FROM stock_movements WHERE id = ?), ?)
+         OR (sm.created_date = ISNULL((SELECT created_date FROM stock_movements WHERE id = ?), ?) AND sm.id < ?))
+        """)
+        params.extend([last_id, last_created, last_id, last_created, last_id])
+    
+    where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+    query = _MOVEMENT_SELECT.format(top="TOP (?)", where_clause=where_clause)
+    
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    # One extra row tells whether another page exists
+    cursor.execute(query, [int(limit) + 1] + params)
     rows = cursor.fetchall()
     connection.close()
     
-    movements = []
-    for row in rows:
-        movements.append({
-            'id': row[0],
-            'part_code': row[1],
-            'part_name': row[2],
-            'location_code': row[3],
-            'location_name': row[4],
-            'movement_type': row[5],
-            'quantity': row[6],
-            'reference_type': row[7],
-            'reference_id': row[8],
-            'notes': row[9],
-            'created_date': row[10],
-            'created_by_name': row[11]
-        })
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    movements = [dict(zip(_MOVEMENT_COLUMNS, row)) for row in rows]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor('stock_movements', rows[-1][10], rows[-1][0])
     
-    return movements
+    return {
+        'stock_movements': movements,
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    }
+
+
+def get_stock_movements_history(part_id=None, location_id=None, limit=100):
+    """Get stock movements history with filters"""
+    return get_stock_movements_page(part_id, location_id, limit)['stock_movements']
+
+
+def iter_stock_movements(part_id=None, location_id=None, date_from=None, date_to=None, batch_size=1000):
+    """
+    Yield movement rows (tuples in _MOVEMENT_COLUMNS order) straight from the cursor with fetchmany.
+    Uses its own pooled connection: the generator is consumed by a streaming response after the request scope ends.
+    """
+    where_conditions, params = _movement_filters(part_id, location_id, date_from, date_to)
+    where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+    query = _MOVEMENT_SELECT.format(top="", where_clause=where_clause)
+    
+    connection = get_dedicated_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        yield from _PLAIN_ROW.iterate(cursor, batch_size, as_='tuple')
+    finally:
+        connection.close()
 
 
 # ===== PART PRICES =====
@@ -890,6 +944,8 @@ def update_currency_rates_auto():
         
         connection.commit()
         connection.close()
+        invalidate_currency_rates()
+        invalidate_cache('inventory')
         return True
         
     except Exception as e:
@@ -900,8 +956,10 @@ def update_currency_rates_auto():
 
 # ===== INVENTORY ANALYTICS =====
 
+@cached_result('inventory')
 def get_inventory_summary():
     """Get comprehensive inventory summary"""
+    ensure_part_stock_summary()
     connection = get_db_connection()
     cursor = connection.cursor()
     
@@ -919,11 +977,7 @@ def get_inventory_summary():
     INNER JOIN part_categories pc ON p.category_id = pc.id
     LEFT JOIN part_prices pp ON p.id = pp.part_id AND pp.is_current = 1
     LEFT JOIN suppliers s ON pp.supplier_id = s.id
-    LEFT JOIN (
-        SELECT part_id, SUM(current_stock) as total_stock
-        FROM part_stock_locations
-        GROUP BY part_id
-    ) stock_summary ON p.id = stock_summary.part_id
+    LEFT JOIN part_stock_summary stock_summary ON p.id = stock_summary.part_id
     WHERE p.is_active = 1
     """
     
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from inventory.stock_summary import rebuild_part_stock_summary, verify_part_stock_summary
+
+
+class Command(BaseCommand):
+    help = 'Verifies part_stock_summary against part_stock_locations and optionally rebuilds it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recompute the whole summary table')
+        parser.add_argument('--fail-on-drift', action='store_true', help='Exit with an error when drift is found')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rows = rebuild_part_stock_summary()
+            self.stdout.write(self.style.SUCCESS(f'part_stock_summary: rebuilt {rows} rows'))
+
+        drift = verify_part_stock_summary()
+        for entry in drift:
+            self.stdout.write(self.style.WARNING(
+                f"part {entry['part_id']}: stored {entry['stored']} expected {entry['expected']}"
+            ))
+        if drift and options['fail_on_drift']:
+            raise CommandError(f'part_stock_summary: {len(drift)} parts drifted')
+        self.stdout.write(self.style.SUCCESS(f'part_stock_summary: {len(drift)} parts drifted'))
@@ -0,0 +1,261 @@
+"""
+In-process search index over active parts
+Trigram postings over Turkish-folded text replace LIKE '%term%' scans on parts.
+Lookups return ranked part ids; callers hydrate them with one IN (...) query.
+"""
+import re
+import threading
+import time
+import unicodedata
+from django.conf import settings
+from .database import get_db_connection
+
+# Turkish letters folded to what people type on a non-Turkish keyboard (İ/I/ı all become i)
+_TURKISH_FOLD = str.maketrans({
+    'İ': 'i', 'I': 'i', 'ı': 'i',
+    'Ş': 's', 'ş': 's', 'Ğ': 'g', 'ğ': 'g',
+    'Ü': 'u', 'ü': 'u', 'Ö': 'o', 'ö': 'o', 'Ç': 'c', 'ç': 'c',
+})
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def fold_text(value):
+    """Lowercase, Turkish-aware, accent-free form used for both indexing and queries"""
+    if not value:
+        return ''
+    text = str(value).translate(_TURKISH_FOLD).lower()
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(' ', text).strip()
+
+
+def _trigrams(text):
+    grams = set()
+    for word in text.split():
+        padded = f' {word} '
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+# (field, weight) searched for every token; earlier fields rank higher
+_FIELD_WEIGHTS = (
+    ('part_code', 8),
+    ('part_name', 6),
+    ('brand', 3),
+    ('model', 3),
+    ('category_name', 2),
+    ('description', 1),
+)
+
+_DOCUMENT_SELECT = """
+    SELECT p.id, p.part_code, p.part_name, p.part_type, p.category_id, pc.category_name,
+           p.brand, p.model, p.description
+    FROM parts p
+    INNER JOIN part_categories pc ON p.category_id = pc.id
+    WHERE p.is_active = 1
+"""
+
+
+class _PartDocument:
+    __slots__ = ('id', 'part_code', 'part_name', 'part_type', 'category_id', 'category_name',
+                 'folded', 'text', 'grams')
+
+    def __init__(self, row):
+        (self.id, self.part_code, self.part_name, self.part_type, self.category_id,
+         self.category_name, brand, model, description) = row
+        values = {
+            'part_code': self.part_code, 'part_name': self.part_name, 'brand': brand,
+            'model': model, 'category_name': self.category_name, 'description': description,
+        }
+        self.folded = tuple((fold_text(values[field]), weight) for field, weight in _FIELD_WEIGHTS)
+        self.text = ' '.join(text for text, _ in self.folded)
+        self.grams = _trigrams(self.text)
+
+    def score(self, tokens):
+        """Rank of the document for the query tokens, or 0 when a token is missing"""
+        total = 0
+        for token in tokens:
+            best = 0
+            for text, weight in self.folded:
+                if token not in text:
+                    continue
+                if text == token:
+                    points = weight * 4
+                elif text.startswith(token):
+                    points = weight * 3
+                elif f' {token}' in f' {text}':
+                    points = weight * 2
+                else:
+                    points = weight
+                best = max(best, points)
+            if not best:
+                return 0
+            total += best
+        return total
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'part_code': self.part_code,
+            'part_name': self.part_name,
+            'part_type': self.part_type,
+            'category_id': self.category_id,
+            'category_name': self.category_name,
+        }
+
+
+class PartSearchIndex:
+    """
+    Trigram index of active parts (code, name, brand, model, category, description).
+    Built lazily on first search, kept current by refresh_parts_search() after part writes
+    and rebuilt after `ttl` seconds so other worker processes pick up their writes too.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._documents = None
+        self._postings = None
+        self._built_at = 0.0
+        self._generation = 0
+        self.builds = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._documents = None
+            self._postings = None
+            self._generation += 1
+
+    def _snapshot(self):
+        documents = self._documents
+        if documents is not None and (self.ttl is None or time.monotonic() - self._built_at < self.ttl):
+            return documents, self._postings
+
+        with self._lock:
+            generation = self._generation
+        documents, postings = {}, {}
+        for row in self._load():
+            document = _PartDocument(row)
+            documents[document.id] = document
+            for gram in document.grams:
+                postings.setdefault(gram, set()).add(document.id)
+        with self._lock:
+            self.builds += 1
+            # A refresh that ran while we were reading wins; rebuild on the next search
+            if generation == self._generation:
+                self._documents = documents
+                self._postings = postings
+                self._built_at = time.monotonic()
+        return documents, postings
+
+    @staticmethod
+    def _load(part_ids=None):
+        query = _DOCUMENT_SELECT
+        params = []
+        if part_ids:
+            query += f" AND p.id IN ({', '.join('?' for _ in part_ids)})"
+            params = list(part_ids)
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            connection.close()
+
+    def refresh(self, part_ids):
+        """Re-read the given parts; inactive or deleted ones leave the index"""
+        part_ids = sorted({int(pid) for pid in part_ids if pid is not None})
+        if not part_ids:
+            return
+        with self._lock:
+            # A build that read parts before this write must not be installed
+            self._generation += 1
+            if self._documents is None:
+                return
+        rows = {row[0]: row for row in self._load(part_ids)}
+        with self._lock:
+            documents, postings = self._documents, self._postings
+            if documents is None:
+                return
+            # Posting sets are replaced, not mutated, so concurrent searches keep a consistent view
+            for part_id in part_ids:
+                old = documents.pop(part_id, None)
+                if old is not None:
+                    for gram in old.grams:
+                        ids = postings.get(gram, set()) - {part_id}
+                        if ids:
+                            postings[gram] = ids
+                        else:
+                            postings.pop(gram, None)
+                if part_id in rows:
+                    document = _PartDocument(rows[part_id])
+                    documents[part_id] = document
+                    for gram in document.grams:
+                        postings[gram] = postings.get(gram, set()) | {part_id}
+
+    def search(self, term, part_type=None, category_id=None, limit=None):
+        """Part ids matching every word of `term`, best match first"""
+        tokens = fold_text(term).split()
+        if not tokens:
+            return []
+        documents, postings = self._snapshot()
+
+        candidates = None
+        for token in tokens:
+            if len(token) < 3:
+                # Too short for a trigram; the score check below does the substring test
+                continue
+            for i in range(len(token) - 2):
+                ids = postings.get(token[i:i + 3], frozenset())
+                candidates = set(ids) if candidates is None else candidates & ids
+                if not candidates:
+                    return []
+        if candidates is None:
+            candidates = list(documents)
+
+        ranked = []
+        for part_id in candidates:
+            document = documents.get(part_id)
+            if document is None:
+                continue
+            if part_type and document.part_type != part_type:
+                continue
+            if category_id and document.category_id != int(category_id):
+                continue
+            score = document.score(tokens)
+            if score:
+                ranked.append((-score, document.folded[1][0], part_id))
+        ranked.sort()
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [part_id for _, _, part_id in ranked]
+
+    def typeahead(self, term, part_type=None, limit=10):
+        """Display fields of the best matches, answered from memory"""
+        documents, _ = self._snapshot()
+        return [documents[part_id].as_dict() for part_id in self.search(term, part_type, limit=limit)
+                if part_id in documents]
+
+    def stats(self):
+        documents = self._documents
+        return {
+            'built': documents is not None,
+            'builds': self.builds,
+            'parts': len(documents) if documents is not None else 0,
+            'grams': len(self._postings) if self._postings is not None else 0,
+            'age_seconds': round(time.monotonic() - self._built_at, 1) if documents is not None else None,
+        }
+
+
+part_search_index = PartSearchIndex(ttl=getattr(settings, 'PARTS_SEARCH_INDEX_TTL', 300))
+
+
+def search_part_ids(term, part_type=None, category_id=None, limit=None):
+    return part_search_index.search(term, part_type, category_id, limit)
+
+
+def refresh_parts_search(part_ids):
+    """Call after committing writes to parts (create, edit, deactivate)"""
+    part_search_index.refresh(part_ids)
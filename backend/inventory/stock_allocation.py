@@ -0,0 +1,228 @@
+"""
+Stock allocation engine shared by services and retail sales
+A basket of (part_id, quantity) is planned against part_stock_locations in one locked read
+(STORE locations first, then the oldest stock rows), then applied with executemany.
+"""
+from .stock_summary import refresh_part_stock_summary
+from core.reference_registry import reference_registry
+
+
+class InsufficientStock(ValueError):
+    """Raised by allocate_stock_out when the basket cannot be covered and partial allocation is off"""
+
+    def __init__(self, message, plan):
+        super().__init__(message)
+        self.plan = plan
+
+
+class AllocationLine:
+    """Allocation of one part of the basket"""
+
+    __slots__ = ('part_id', 'requested', 'takes', 'total_available', 'store_available')
+
+    def __init__(self, part_id, requested):
+        self.part_id = part_id
+        self.requested = requested
+        self.takes = []  # [(location_id, location_type, quantity)]
+        self.total_available = 0
+        self.store_available = 0
+
+    @property
+    def allocated(self):
+        return sum(qty for _, _, qty in self.takes)
+
+    @property
+    def shortfall(self):
+        return self.requested - self.allocated
+
+    def as_dict(self):
+        return {
+            'part_id': self.part_id,
+            'requested': self.requested,
+            'allocated': self.allocated,
+            'shortfall': self.shortfall,
+            'available': self.total_available,
+            'store_available': self.store_available,
+            'locations': [
+                {'location_id': loc_id, 'location_type': loc_type, 'quantity': qty}
+                for loc_id, loc_type, qty in self.takes
+            ],
+        }
+
+
+class AllocationPlan:
+    """Result of plan_stock_out: one line per part plus user-facing warnings"""
+
+    def __init__(self, lines, warnings):
+        self.lines = lines
+        self.warnings = warnings
+
+    @property
+    def shortages(self):
+        return [line for line in self.lines if line.shortfall > 0]
+
+    @property
+    def part_ids(self):
+        return [line.part_id for line in self.lines]
+
+    def as_dict(self):
+        return {
+            'lines': [line.as_dict() for line in self.lines],
+            'warnings': list(self.warnings),
+        }
+
+
+def _normalize_basket(basket):
+    """[(part_id, qty)] or [{'part_id', 'quantity'}] -> ordered {part_id: total_qty}"""
+    quantities = {}
+    for item in basket:
+        if isinstance(item, dict):
+            part_id, quantity = item['part_id'], item['quantity']
+        else:
+            part_id, quantity = item
+        part_id, quantity = int(part_id), int(quantity)
+        if quantity <= 0:
+            continue
+        quantities[part_id] = quantities.get(part_id, 0) + quantity
+    return quantities
+
+
+def _location_types(location_ids):
+    """{location_id: location_type} from the reference registry (reloaded once for unknown ids)"""
+    locations = reference_registry.storage_locations
+    found = locations.get_many(location_ids)
+    if len(found) < len(location_ids):
+        locations.refresh()
+        found = locations.get_many(location_ids)
+    return {location_id: location.location_type for location_id, location in found.items()}
+
+
+def _lock_balances(cursor, part_ids):
+    """
+    Read (and on SQL Server update-lock) every stock row of the basket in allocation order.
+    Location types come from the reference registry, so the locked read touches part_stock_locations only.
+    """
+    placeholders = ', '.join('?' for _ in part_ids)
+    cursor.execute(
+        f"""
+        SELECT part_id, storage_location_id, created_date,
+               current_stock - reserved_stock as available_stock
+        FROM part_stock_locations WITH (UPDLOCK, ROWLOCK)
+        WHERE part_id IN ({placeholders})
+        """,
+        part_ids
+    )
+    rows = cursor.fetchall()
+    location_types = _location_types({row[1] for row in rows})
+
+    def allocation_order(row):
+        part_id, location_id, created_date, _ = row
+        # STORE first, then oldest stock row (NULL dates first, as SQL Server sorts them)
+        return (part_id, location_types.get(location_id) != 'STORE',
+                created_date is not None, created_date or '', location_id)
+
+    balances = {}
+    for part_id, location_id, _, available in sorted(rows, key=allocation_order):
+        balances.setdefault(part_id, []).append((location_id, location_types.get(location_id), int(available or 0)))
+    return balances
+
+
+def plan_stock_out(cursor, basket):
+    """
+    Plan a stock OUT for a whole basket without writing anything.
+    STORE stock is used first, then the remaining locations oldest stock row first (FIFO).
+    """
+    quantities = _normalize_basket(basket)
+    if not quantities:
+        return AllocationPlan([], [])
+    balances = _lock_balances(cursor, sorted(quantities))
+
+    lines, warnings = [], []
+    for part_id, requested in quantities.items():
+        line = AllocationLine(part_id, requested)
+        remaining = requested
+        for location_id, location_type, available in balances.get(part_id, []):
+            available = max(0, available)
+            line.total_available += available
+            if location_type == 'STORE':
+                line.store_available += available
+            take = min(available, remaining)
+            if take > 0:
+                line.takes.append((location_id, location_type, take))
+                remaining -= take
+        lines.append(line)
+
+        if line.shortfall > 0:
+            warnings.append(f"Yetersiz stok: Parça {part_id} için ihtiyaç {requested}, mevcut {line.total_available} (Mağaza {line.store_available}).")
+        elif line.store_available < requested:
+            warnings.append(f"Mağazada stok yetersiz (var: {line.store_available}), depo kullanıldı. Parça {part_id} için toplam {requested} düşüldü.")
+
+    return AllocationPlan(lines, warnings)
+
+
+def apply_stock_out(cursor, plan, reference_type, reference_id, notes='', user_id=1):
+    """Write a plan: decrement part_stock_locations, record OUT movements, refresh the summary"""
+    takes = [(line.part_id, loc_id, qty) for line in plan.lines for loc_id, _, qty in line.takes]
+    if takes:
+        cursor.fast_executemany = True
+        cursor.executemany(
+            """
+            UPDATE part_stock_locations
+            SET current_stock = current_stock - ?, updated_date = GETDATE()
+            WHERE part_id = ? AND storage_location_id = ?
+            """,
+            [(qty, part_id, loc_id) for part_id, loc_id, qty in takes]
+        )
+        cursor.executemany(
+            """
+            INSERT INTO stock_movements (
+                part_id, storage_location_id, movement_type, quantity,
+                reference_type, reference_id, notes, created_by
+            ) VALUES (?, ?, 'OUT', ?, ?, ?, ?, ?)
+            """,
+            [(part_id, loc_id, qty, reference_type, reference_id, notes, user_id) for part_id, loc_id, qty in takes]
+        )
+    refresh_part_stock_summary(cursor, plan.part_ids)
+    return plan
+
+
+def allocate_stock_out(cursor, basket, reference_type, reference_id, notes='', user_id=1, allow_partial=False):
+    """
+    Plan and apply in one call on the caller's transaction.
+    Without allow_partial nothing is written when any part is short (InsufficientStock is raised).
+    """
+    plan = plan_stock_out(cursor, basket)
+    shortages = plan.shortages
+    if shortages and not allow_partial:
+        line = shortages[0]
+        raise InsufficientStock(
+            f"Insufficient stock for part {line.part_id}: required {line.requested}, available {line.total_available}",
+            plan
+        )
+    return apply_stock_out(cursor, plan, reference_type, reference_id, notes, user_id)
+
+
+def restore_stock_out(cursor, reference_type, reference_id):
+    """Give back the stock taken by earlier OUT movements of a reference (before they are deleted)"""
+    cursor.execute(
+        """
+        SELECT part_id, storage_location_id, SUM(quantity)
+        FROM stock_movements
+        WHERE reference_type = ? AND reference_id = ? AND movement_type = 'OUT'
+        GROUP BY part_id, storage_location_id
+        """,
+        (reference_type, reference_id)
+    )
+    rows = cursor.fetchall()
+    if rows:
+        cursor.fast_executemany = True
+        cursor.executemany(
+            """
+            UPDATE part_stock_locations
+            SET current_stock = current_stock + ?, updated_date = GETDATE()
+            WHERE part_id = ? AND storage_location_id = ?
+            """,
+            [(int(quantity or 0), part_id, location_id) for part_id, location_id, quantity in rows]
+        )
+        refresh_part_stock_summary(cursor, {row[0] for row in rows})
+    return [row[0] for row in rows]
@@ -0,0 +1,140 @@
+"""
+Materialized per-part stock totals (part_stock_summary)
+Replaces the SUM(...) FROM part_stock_locations GROUP BY part_id derived table in the read paths.
+Writers call refresh_part_stock_summary(cursor, part_ids) inside their own transaction.
+"""
+from .database import get_db_connection
+
+# Cache flag to avoid checking the table on every call
+_SUMMARY_TABLE_ENSURED = False
+
+SUMMARY_TABLE_DDL = """
+CREATE TABLE part_stock_summary (
+    part_id INT NOT NULL PRIMARY KEY,
+    total_stock INT NOT NULL DEFAULT 0,
+    reserved_stock INT NOT NULL DEFAULT 0,
+    available_stock INT NOT NULL DEFAULT 0,
+    stock_status NVARCHAR(10) NOT NULL DEFAULT 'CRITICAL',
+    updated_date DATETIME2 DEFAULT GETDATE(),
+    FOREIGN KEY (part_id) REFERENCES parts(id) ON DELETE CASCADE
+)
+"""
+
+SUMMARY_INDEX_DDL = "CREATE INDEX IX_part_stock_summary_status ON part_stock_summary(stock_status)"
+
+# Live aggregate the summary materializes; {where} restricts it to a set of parts
+_SUMMARY_SELECT = """
+    SELECT
+        p.id,
+        ISNULL(SUM(psl.current_stock), 0),
+        ISNULL(SUM(psl.reserved_stock), 0),
+        ISNULL(SUM(psl.current_stock - psl.reserved_stock), 0),
+        CASE
+            WHEN ISNULL(SUM(psl.current_stock), 0) <= 0 THEN 'CRITICAL'
+            WHEN ISNULL(SUM(psl.current_stock), 0) <= p.min_stock_level THEN 'LOW'
+            ELSE 'NORMAL'
+        END,
+        GETDATE()
+    FROM parts p
+    LEFT JOIN part_stock_locations psl ON psl.part_id = p.id
+    {where}
+    GROUP BY p.id, p.min_stock_level
+"""
+
+# What the read paths assume for a part without a summary row (ISNULL(..., 0) / 'CRITICAL')
+_MISSING_ROW = (0, 0, 0, 'CRITICAL')
+
+_SUMMARY_INSERT = """
+    INSERT INTO part_stock_summary (
+        part_id, total_stock, reserved_stock, available_stock, stock_status, updated_date
+    )
+"""
+
+
+def ensure_part_stock_summary():
+    """Create and fill part_stock_summary on databases that predate it (once per process)"""
+    global _SUMMARY_TABLE_ENSURED
+    if _SUMMARY_TABLE_ENSURED:
+        return
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'part_stock_summary'")
+        if not cursor.fetchone()[0]:
+            cursor.execute(SUMMARY_TABLE_DDL)
+            cursor.execute(SUMMARY_INDEX_DDL)
+            _rebuild(cursor)
+            connection.commit()
+        _SUMMARY_TABLE_ENSURED = True
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def refresh_part_stock_summary(cursor, part_ids):
+    """
+    Recompute the summary rows of the given parts from part_stock_locations.
+    Runs on the caller's cursor so it commits or rolls back with the stock change itself.
+    """
+    part_ids = sorted({int(pid) for pid in part_ids if pid is not None})
+    if not part_ids:
+        return
+    placeholders = ', '.join('?' for _ in part_ids)
+    cursor.execute(f"DELETE FROM part_stock_summary WHERE part_id IN ({placeholders})", part_ids)
+    cursor.execute(
+        _SUMMARY_INSERT + _SUMMARY_SELECT.format(where=f"WHERE p.id IN ({placeholders})"),
+        part_ids
+    )
+
+
+def _rebuild(cursor):
+    cursor.execute("DELETE FROM part_stock_summary")
+    cursor.execute(_SUMMARY_INSERT + _SUMMARY_SELECT.format(where=""))
+    return cursor.rowcount
+
+
+def rebuild_part_stock_summary():
+    """Recompute the whole table; returns the number of summary rows written"""
+    ensure_part_stock_summary()
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        rows = _rebuild(cursor)
+        connection.commit()
+        return rows
+    except Exception as e:
+        connection.rollback()
+        raise e
+    finally:
+        connection.close()
+
+
+def verify_part_stock_summary():
+    """Compare the summary with a live aggregate; returns a list of drifted parts"""
+    ensure_part_stock_summary()
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute(_SUMMARY_SELECT.format(where=""))
+        expected = {row[0]: tuple(row[1:5]) for row in cursor.fetchall()}
+        cursor.execute("""
+            SELECT part_id, total_stock, reserved_stock, available_stock, stock_status
+            FROM part_stock_summary
+        """)
+        stored = {row[0]: tuple(row[1:5]) for row in cursor.fetchall()}
+    finally:
+        connection.close()
+
+    drift = []
+    for part_id in sorted(set(expected) | set(stored)):
+        want = expected.get(part_id)
+        have = stored.get(part_id)
+        if want != (have or _MISSING_ROW):
+            drift.append({
+                'part_id': part_id,
+                'expected': dict(zip(('total_stock', 'reserved_stock', 'available_stock', 'stock_status'), want)) if want else None,
+                'stored': dict(zip(('total_stock', 'reserved_stock', 'available_stock', 'stock_status'), have)) if have else None,
+            })
+    return drift
@@ -1,3 +1,61 @@
-from django.test import TestCase
+from core import database
+from core.tests import RawSqliteTestCase
+from inventory.stock_allocation import InsufficientStock, allocate_stock_out, plan_stock_out
 
-# Create your tests here.
+
+class StockAllocationTests(RawSqliteTestCase):
+    """inventory.stock_allocation: basket planning (STORE first, merged lines, shortages)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        connection = database.get_db_connection()
+        try:
+            cls.seed_stock(connection.cursor(), [(4, 10), (None, 1)])
+            connection.commit()
+        finally:
+            connection.close()
+        cls.part, cls.other_part = cls.parts
+
+    def plan(self, basket):
+        connection = database.get_db_connection()
+        try:
+            return plan_stock_out(connection.cursor(), basket)
+        finally:
+            connection.rollback()
+            connection.close()
+
+    def test_store_is_used_before_older_warehouse_stock(self):
+        plan = self.plan([(self.part, 6)])
+        (line,) = plan.lines
+        self.assertEqual(line.takes, [(self.store, 'STORE', 4), (self.warehouse, 'WAREHOUSE', 2)])
+        self.assertEqual(line.store_available, 4)
+        self.assertEqual(plan.shortages, [])
+        self.assertEqual(len(plan.warnings), 1)
+
+    def test_same_part_listed_twice_is_one_line(self):
+        plan = self.plan([{'part_id': self.part, 'quantity': 3}, {'part_id': str(self.part), 'quantity': 2}])
+        (line,) = plan.lines
+        self.assertEqual(line.requested, 5)
+        self.assertEqual(line.takes, [(self.store, 'STORE', 4), (self.warehouse, 'WAREHOUSE', 1)])
+
+    def test_shortage_is_reported_and_nothing_is_written(self):
+        plan = self.plan([(self.part, 1), (self.other_part, 3)])
+        (short,) = plan.shortages
+        self.assertEqual((short.part_id, short.requested, short.allocated, short.total_available),
+                         (self.other_part, 3, 1, 1))
+
+        connection = database.get_db_connection()
+        try:
+            with self.assertRaises(InsufficientStock) as raised:
+                allocate_stock_out(connection.cursor(), [(self.part, 1), (self.other_part, 3)], 'TEST', 1)
+            connection.commit()
+        finally:
+            connection.close()
+        self.assertIn(f'part {self.other_part}', str(raised.exception))
+        self.assertEqual(self.execute("SELECT COUNT(*) FROM stock_movements WHERE reference_type = 'TEST'")[0][0], 0)
+        self.assertEqual(
+            self.execute("SELECT current_stock FROM part_stock_locations WHERE part_id = ? AND storage_location_id = ?",
+                         (self.part, self.store))[0][0],
+            4
+        )
@@ -17,6 +17,7 @@ urlpatterns = [
     
     # Parts
     path('parts/', views.PartsView.as_view(), name='parts'),
+    path('parts/typeahead/', views.PartsTypeaheadView.as_view(), name='parts-typeahead'),
     path('parts/<int:part_id>/', views.PartDetailView.as_view(), name='part-detail'),
     path('parts/<int:part_id>/locations/', views.PartLocationsView.as_view(), name='part-locations'),
     path('parts/<int:part_id>/prices/', views.PartPricesView.as_view(), name='part-prices'),
@@ -29,6 +30,7 @@ urlpatterns = [
     # Stock Management
     path('stock/low/', views.LowStockView.as_view(), name='low-stock'),
     path('stock/movements/', views.StockMovementsView.as_view(), name='stock-movements'),
+    path('stock/movements/export/', views.StockMovementsExportView.as_view(), name='stock-movements-export'),
     
     # Currency
     path('currency/rates/', views.CurrencyRatesView.as_view(), name='currency-rates'),
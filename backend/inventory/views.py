@@ -4,17 +4,31 @@ Inventory API Views - Complex inventory management system
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from core.renderers import FAST_JSON_RENDERERS, StreamingJSONResponse, dumps
 from .inventory_functions import (
     get_all_storage_locations, get_warehouse_structure,
     get_all_suppliers, create_supplier,
     get_part_categories_tree, get_categories_by_type,
-    get_all_parts_with_stock, get_parts_by_model_with_stock, get_part_stock_by_location,
+    get_all_parts_with_stock, count_parts_with_stock, get_parts_by_model_with_stock, get_part_stock_by_location,
     get_low_stock_parts, search_parts,
     create_stock_movement, get_stock_movements_history,
+    get_stock_movements_page, iter_stock_movements, _MOVEMENT_COLUMNS,
     get_part_current_prices, get_currency_rates,
     get_inventory_summary
 )
+from .currency_cache import invalidate_currency_rates
+from .stock_summary import ensure_part_stock_summary, refresh_part_stock_summary
+from .search_index import part_search_index, refresh_parts_search
+from core.pagination import InvalidCursor
+from core.result_cache import invalidate_cache
+from core.reference_data import conditional_get
+from core.reference_registry import reference_registry
+from core.fanout import gather
+import csv
+import json
+from datetime import date
 from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 
@@ -24,6 +38,7 @@ from django.core.files.base import ContentFile
 class StorageLocationsView(APIView):
     """Storage locations and warehouse management"""
     
+    @conditional_get('storage_locations')
     def get(self, request):
         """Get all storage locations"""
         try:
@@ -42,6 +57,7 @@ class StorageLocationsView(APIView):
 class WarehouseStructureView(APIView):
     """Warehouse rack structure"""
     
+    @conditional_get('storage_locations')
     def get(self, request):
         """Get warehouse structure organized by shelves and racks"""
         try:
@@ -62,6 +78,7 @@ class WarehouseStructureView(APIView):
 class SuppliersView(APIView):
     """Supplier management"""
     
+    @conditional_get('suppliers')
     def get(self, request):
         """Get all suppliers"""
         try:
@@ -115,6 +132,7 @@ def ensure_part_images_table(cur):
 class CategoriesView(APIView):
     """Part categories management"""
     
+    @conditional_get('part_categories')
     def get(self, request):
         """Get categories tree or by type"""
         try:
@@ -140,6 +158,7 @@ class CategoriesView(APIView):
 
 class PartsView(APIView):
     """Parts management with advanced features"""
+    renderer_classes = FAST_JSON_RENDERERS
     
     def get(self, request):
         """Get parts with stock information"""
@@ -151,19 +170,56 @@ class PartsView(APIView):
             model_id = request.GET.get('model')
             if model_id:
                 parts = get_parts_by_model_with_stock(int(model_id), search_term)
-            elif search_term or part_type or category_id:
+            elif search_term:
                 # Advanced search
                 parts = search_parts(search_term, part_type, 
                                    int(category_id) if category_id else None)
             else:
-                # Get all parts
-                parts = get_all_parts_with_stock()
+                # Catalogue: filters, sorting and paging run in SQL
+                filters = {
+                    'category_id': category_id or request.GET.get('category'),
+                    'part_type': part_type,
+                    'stock_status': request.GET.get('stock_status'),
+                    'supplier_id': request.GET.get('supplier_id'),
+                    'currency_type': request.GET.get('currency'),
+                }
+                fields = request.GET.get('fields')
+                limit = request.GET.get('limit')
+                limit = min(max(int(limit), 1), 1000) if limit else None
+                offset = int(request.GET.get('offset', 0))
+                if limit and 'offset' not in request.GET:
+                    offset = (max(int(request.GET.get('page', 1)), 1) - 1) * limit
+                
+                parts = get_all_parts_with_stock(
+                    **filters,
+                    fields=[f.strip() for f in fields.split(',') if f.strip()] if fields else None,
+                    sort=request.GET.get('sort') or 'part_name',
+                    limit=limit,
+                    offset=offset
+                )
+                total = count_parts_with_stock(**filters) if limit else len(parts)
+                envelope = {
+                    'count': len(parts),
+                    'total': total,
+                    'limit': limit,
+                    'offset': offset,
+                    'has_more': limit is not None and offset + len(parts) < total
+                }
+                if request.GET.get('stream') in ('1', 'true'):
+                    # Serialized in chunks while being sent instead of as one body
+                    return StreamingJSONResponse(parts, 'parts', envelope=envelope)
+                
+                return Response({'parts': parts, **envelope}, status=status.HTTP_200_OK)
             
             return Response({
                 'parts': parts,
                 'count': len(parts)
             }, status=status.HTTP_200_OK)
             
+        except ValueError as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 'error': f'Failed to get parts: {str(e)}'
@@ -215,6 +271,7 @@ class PartsView(APIView):
                 path = default_storage.save(f'parts/{part_code}_{img.name}', ContentFile(img.read()))
                 image_url = settings.MEDIA_URL + path
 
+            ensure_part_stock_summary()
             conn = get_db_connection()
             cur = conn.cursor()
             
@@ -271,8 +328,12 @@ class PartsView(APIView):
             except Exception:
                 pass
 
+            refresh_part_stock_summary(cur, [new_id])
+
             conn.commit()
+            invalidate_cache('inventory')
             conn.close()
+            refresh_parts_search([new_id])
             
             return Response({
                 'message': 'Part created successfully',
@@ -286,6 +347,29 @@ class PartsView(APIView):
             return Response({'error': f'Failed to create part: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class PartsTypeaheadView(APIView):
+    """Search-as-you-type suggestions answered from the in-memory parts index"""
+    
+    def get(self, request):
+        """?q=term with optional type (PART/ACCESSORY) and limit (max 50)"""
+        try:
+            limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+            suggestions = part_search_index.typeahead(
+                request.GET.get('q', ''),
+                request.GET.get('type') or None,
+                limit
+            )
+            return Response({
+                'parts': suggestions,
+                'count': len(suggestions)
+            }, status=status.HTTP_200_OK)
+            
+        except Exception as e:
+            return Response({
+                'error': f'Failed to search parts: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class PartDetailView(APIView):
     """Individual part operations"""
     
@@ -327,6 +411,7 @@ class PartDetailView(APIView):
             data = request.data
 
             # Load existing part
+            ensure_part_stock_summary()
             conn = get_db_connection()
             cur = conn.cursor()
             cur.execute("SELECT id, part_code, part_name, category_id, part_type, description, image_path, min_stock_level, max_stock_level, brand, model, color, size FROM parts WHERE id = ?", (part_id,))
@@ -386,6 +471,8 @@ class PartDetailView(APIView):
                     brand, model, color, size, part_id
                 )
             )
+            # stock_status depends on min_stock_level
+            refresh_part_stock_summary(cur, [part_id])
 
             # Handle additional uploaded gallery images on edit
             try:
@@ -457,7 +544,9 @@ class PartDetailView(APIView):
                     pass
 
             conn.commit()
+            invalidate_cache('inventory')
             conn.close()
+            refresh_parts_search([part_id])
 
             return Response({'message': 'Part updated successfully', 'id': part_id, 'image_url': image_url}, status=status.HTTP_200_OK)
 
@@ -603,6 +692,7 @@ class PartImagesView(APIView):
 
 class LowStockView(APIView):
     """Low stock alerts"""
+    renderer_classes = FAST_JSON_RENDERERS
     
     def get(self, request):
         """Get parts with low or critical stock"""
@@ -631,25 +721,33 @@ class LowStockView(APIView):
 
 class StockMovementsView(APIView):
     """Stock movement management"""
+    renderer_classes = FAST_JSON_RENDERERS
     
     def get(self, request):
-        """Get stock movements history"""
+        """Get stock movements history (keyset pages: pass next_cursor back as ?cursor=)"""
         try:
             part_id = request.GET.get('part_id')
             location_id = request.GET.get('location_id')
-            limit = int(request.GET.get('limit', 100))
+            limit = min(max(int(request.GET.get('limit', 100)), 1), 1000)
             
-            movements = get_stock_movements_history(
+            page = get_stock_movements_page(
                 int(part_id) if part_id else None,
                 int(location_id) if location_id else None,
-                limit
+                limit,
+                request.GET.get('cursor')
             )
             
             return Response({
-                'stock_movements': movements,
-                'count': len(movements)
+                'stock_movements': page['stock_movements'],
+                'count': len(page['stock_movements']),
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more']
             }, status=status.HTTP_200_OK)
             
+        except InvalidCursor as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 'error': f'Failed to get stock movements: {str(e)}'
@@ -696,6 +794,75 @@ class StockMovementsView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class _Echo:
+    """File-like object whose write() returns the line, so csv.writer can feed a generator"""
+
+    def write(self, value):
+        return value
+
+
+def _export_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class StockMovementsExportView(APIView):
+    """Streaming export of the whole movement ledger (CSV, NDJSON or one JSON document)"""
+    
+    COLUMNS = _MOVEMENT_COLUMNS
+    
+    def get(self, request):
+        """?output=csv|ndjson|json with optional part_id, location_id, date_from, date_to (YYYY-MM-DD)"""
+        output = request.GET.get('output', 'csv').lower()
+        if output not in ('csv', 'ndjson', 'json'):
+            return Response({'error': 'output must be csv, ndjson or json'}, status=status.HTTP_400_BAD_REQUEST)
+        part_id = request.GET.get('part_id')
+        location_id = request.GET.get('location_id')
+        date_from = request.GET.get('date_from')
+        date_to = request.GET.get('date_to')
+        
+        # Validate before streaming: once the response has started, errors can no longer become a 400
+        try:
+            part_id = int(part_id) if part_id else None
+            location_id = int(location_id) if location_id else None
+            for value in (date_from, date_to):
+                if value:
+                    date.fromisoformat(value)
+        except ValueError:
+            return Response({
+                'error': 'part_id and location_id must be integers, date_from and date_to YYYY-MM-DD'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        rows = iter_stock_movements(part_id, location_id, date_from, date_to)
+        
+        if output == 'csv':
+            writer = csv.writer(_Echo())
+            
+            def stream():
+                yield writer.writerow(self.COLUMNS)
+                for row in rows:
+                    yield writer.writerow([_export_value(v) for v in row])
+            
+            response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = 'attachment; filename="stock_movements.csv"'
+        elif output == 'ndjson':
+            def stream():
+                for row in rows:
+                    yield dumps(dict(zip(self.COLUMNS, row))) + b'\n'
+            
+            response = StreamingHttpResponse(stream(), content_type='application/x-ndjson; charset=utf-8')
+            response['Content-Disposition'] = 'attachment; filename="stock_movements.ndjson"'
+        else:
+            response = StreamingJSONResponse(
+                (dict(zip(self.COLUMNS, row)) for row in rows),
+                'stock_movements',
+                trailer=lambda count: {'count': count}
+            )
+            response['Content-Disposition'] = 'attachment; filename="stock_movements.json"'
+        return response
+
+
 # ===== CURRENCY & PRICING =====
 
 class CurrencyRatesView(APIView):
@@ -803,6 +970,9 @@ class CurrencyRatesView(APIView):
             
             conn.commit()
             conn.close()
+            invalidate_currency_rates()
+            # Results cached under 'inventory' may be priced with the old rates
+            invalidate_cache('inventory')
             
             return Response({
                 'message': 'Currency rates updated successfully',
@@ -825,14 +995,19 @@ class InventoryDashboardView(APIView):
     def get(self, request):
         """Get comprehensive inventory summary"""
         try:
-            summary = get_inventory_summary()
-            low_stock_parts = get_low_stock_parts()
-            
-            # Recent stock movements (last 10)
-            recent_movements = get_stock_movements_history(limit=10)
-            
-            # Currency rates
-            currency_rates = get_currency_rates()
+            ensure_part_stock_summary()
+            # Independent reads, run concurrently on separate pooled connections
+            results = gather({
+                'summary': get_inventory_summary,
+                'low_stock_parts': get_low_stock_parts,
+                # Recent stock movements (last 10)
+                'recent_movements': lambda: get_stock_movements_history(limit=10),
+                'currency_rates': get_currency_rates,
+            })
+            summary = results['summary']
+            low_stock_parts = results['low_stock_parts']
+            recent_movements = results['recent_movements']
+            currency_rates = results['currency_rates']
             
             return Response({
                 'summary': summary,
@@ -856,31 +1031,27 @@ class InventoryDashboardView(APIView):
 class VespaModelsView(APIView):
     """Vespa models management"""
     
+    @conditional_get('vespa_models')
     def get(self, request):
         """Get all Vespa models"""
         try:
-            from .database import execute_query
-            
-            query = """
-            SELECT 
-                vm.id,
-                vm.model_name,
-                vm.engine_size,
-                vm.category,
-                vm.model_year as year_from,
-                vm.model_year as year_to,
-                vm.image_path,
-                'No description' as description,
-                vm.is_active,
-                0 as price,
-                vm.created_date,
-                vm.updated_date
-            FROM vespa_models vm
-            WHERE vm.is_active = 1
-            ORDER BY vm.model_name
-            """
-            
-            models = execute_query(query)
+            models = [
+                {
+                    'id': vm.id,
+                    'model_name': vm.model_name,
+                    'engine_size': vm.engine_size,
+                    'category': vm.category,
+                    'year_from': vm.model_year,
+                    'year_to': vm.model_year,
+                    'image_path': vm.image_path,
+                    'description': 'No description',
+                    'is_active': vm.is_active,
+                    'price': 0,
+                    'created_date': vm.created_date,
+                    'updated_date': vm.updated_date,
+                }
+                for vm in reference_registry.vespa_models.active()
+            ]
             
             return Response(models, status=status.HTTP_200_OK)
             
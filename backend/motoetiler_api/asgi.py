@@ -14,3 +14,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'motoetiler_api.settings')
 
 application = get_asgi_application()
+
+# Reference tables are loaded once per worker before the first request
+from core.reference_registry import preload_reference_registry  # noqa: E402
+preload_reference_registry()
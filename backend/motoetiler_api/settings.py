@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -53,6 +54,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.SqlInstrumentationMiddleware',  # raw SQL sayaçları, Server-Timing, yavaş sorgu / N+1 logu
+    'core.middleware.RequestConnectionMiddleware',  # istek başına tek raw SQL bağlantısı
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -97,6 +100,86 @@ DATABASES = {
     }
 }
 
+# Raw SQL backend (core/db_backends.py): 'mssql' (varsayılan) veya 'sqlite' (Linux'ta test/benchmark)
+RAW_DB_BACKEND = {
+    'ENGINE': os.environ.get('VESPA_DB_ENGINE', 'mssql'),
+    'SQLITE_PATH': os.environ.get('VESPA_SQLITE_PATH', str(BASE_DIR / 'vespa_local.sqlite3')),
+}
+
+if RAW_DB_BACKEND['ENGINE'] == 'sqlite':
+    # Django'nun kendi tabloları (session, admin) için de SQL Server gerekmesin
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'django_local.sqlite3',
+        }
+    }
+
+# Raw SQL bağlantı havuzu (core/connection_pool.py)
+RAW_DB_POOL = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'IDLE_TIMEOUT': 300,           # saniye; MIN_SIZE üzerindeki boşta bağlantılar kapatılır
+    'MAX_LIFETIME': 3600,          # saniye; eski bağlantılar yenilenir
+    'CHECKOUT_TIMEOUT': 30,        # saniye; havuz doluysa bekleme süresi
+    'HEALTH_CHECK_INTERVAL': 10,   # saniye; bu süreden uzun boşta kalan bağlantı SELECT 1 ile kontrol edilir
+}
+
+# Raw SQL ölçümü (core/middleware.SqlInstrumentationMiddleware)
+RAW_SQL_INSTRUMENTATION = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,          # yanıta Server-Timing başlığı ekle
+    'SLOW_QUERY_MS': 200,           # bu süreyi aşan sorgular 'core.sql' logger'ına yazılır
+    'N_PLUS_ONE_THRESHOLD': 10,     # aynı sorgu bir istekte bundan fazla çalışırsa N+1 uyarısı
+}
+
+# Bağımsız okuma sorgularını paralel çalıştıran iş parçacığı sayısı (core/fanout.py); en fazla RAW_DB_POOL MAX_SIZE - 1
+# kullanılır, açık işlemi olan çağıranlarda sorgular sırayla aynı bağlantıda çalışır
+RAW_DB_FANOUT_WORKERS = 4
+
+# Döviz kuru önbelleği (inventory/currency_cache.py); yazma sonrası hemen, diğer worker'larda en geç bu süre sonra yenilenir
+CURRENCY_RATE_CACHE_TTL = 300  # saniye
+
+# Parça arama indeksi (inventory/search_index.py); parça yazma sonrası hemen, diğer worker'larda en geç bu süre sonra yenilenir
+PARTS_SEARCH_INDEX_TTL = 300  # saniye
+# Müşteri arama indeksi (customers/search_index.py): isim, telefon, plaka, vergi no önek aramaları
+CUSTOMERS_SEARCH_INDEX_TTL = 300  # saniye
+
+# Dashboard/özet sonuç önbelleği (core/result_cache.py): TTL boyunca taze, sonraki STALE süresince
+# eski sonuç dönülür ve arka planda tek bir yenileme çalışır; ilgili tablolara yazınca bu süreçte hemen,
+# diğer worker'larda data_versions sayacı üzerinden en geç REFERENCE_DATA_VERSION_TTL sonra temizlenir
+DASHBOARD_CACHE_TTL = 30  # saniye
+DASHBOARD_CACHE_STALE_TTL = 300  # saniye
+# Listelerin yaklaşık toplam kayıt sayısı (core/pagination.py approximate_count) aynı önbellekte tutulur;
+# yazma işlemleri aynı şekilde temizler; API dışındaki yazmalar en geç bu süre sonra yansır
+PAGINATION_COUNT_TTL = 60  # saniye
+PAGINATION_COUNT_STALE_TTL = 600  # saniye
+
+# Referans veri sürüm sayaçları (core/reference_data.py) en fazla bu sıklıkla veritabanından okunur;
+# diğer worker'lardaki değişiklikler ETag'e ve sonuç önbelleğine en geç bu süre sonra yansır
+REFERENCE_DATA_VERSION_TTL = 5  # saniye
+
+# Küçük referans tabloları (vespa_models, part_categories, storage_locations, work_types) süreç içinde tutulur
+# (core/reference_registry.py); sayaç değişince hemen, değişmese de bu süre dolunca yeniden yüklenir
+REFERENCE_REGISTRY_TTL = 60  # saniye
+REFERENCE_REGISTRY_PRELOAD = True  # wsgi/asgi başlarken tabloları yükle
+
+# JWT ile doğrulanan kullanıcı bilgisi süreç içinde tutulur (core/principal_cache.py);
+# şifre/kullanıcı adı değişikliği ve pasifleştirme kaydı hemen geçersiz kılar
+AUTH_PRINCIPAL_CACHE_TTL = 60  # saniye
+# Açıksa salt okunur (GET/HEAD/OPTIONS) isteklerde, önbellekte olmayan kullanıcı için imzalı token
+# bilgilerine güvenilir ve veritabanına gidilmez; token'dan sonra kullanıcı değişikliği olduysa yine sorgulanır
+AUTH_TRUST_TOKEN_CLAIMS = False
+
+# Giriş: bcrypt doğrulaması sınırlı bir iş parçacığı havuzunda çalışır (customers/password_hasher.py)
+AUTH_BCRYPT_ROUNDS = 12  # maliyet; değişince kullanıcı bir sonraki girişte yeni maliyetle yeniden hash'lenir
+AUTH_BCRYPT_WORKERS = None  # None: CPU çekirdeği sayısı
+AUTH_BCRYPT_MAX_PENDING = None  # aynı anda bekleyen/çalışan doğrulama sınırı (None: çekirdek x 8), aşılırsa 503
+AUTH_BCRYPT_QUEUE_TIMEOUT = 0.5  # saniye
+# last_login güncellemeleri bellekte toplanıp toplu yazılır (customers/last_login.py)
+AUTH_LAST_LOGIN_BATCH = 100
+AUTH_LAST_LOGIN_FLUSH_INTERVAL = 10  # saniye
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -0,0 +1,188 @@
+import math
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from core.bulk import bulk_insert
+from core.database import get_db_connection, request_connection_scope
+from accounting.invoice_balance import ensure_invoice_balance_due
+from reports.report_functions import get_comprehensive_dashboard
+from accounting.accounting_functions import get_accounting_summary
+
+# The financial queries these dashboards ran before, kept to show the cartesian growth
+LEGACY_QUERIES = {
+    'dashboard_legacy': """
+        SELECT
+            SUM(CASE WHEN ct.transaction_type = 'INCOME' AND ct.transaction_date >= DATEADD(month, -1, GETDATE()) THEN ct.amount ELSE 0 END),
+            SUM(CASE WHEN ct.transaction_type = 'EXPENSE' AND ct.transaction_date >= DATEADD(month, -1, GETDATE()) THEN ct.amount ELSE 0 END),
+            SUM(CASE WHEN i.paid_amount < i.total_amount THEN (i.total_amount - i.paid_amount) ELSE 0 END)
+        FROM cash_transactions ct
+        FULL OUTER JOIN invoices i ON 1=1
+    """,
+    'accounting_legacy': """
+        SELECT
+            COUNT(DISTINCT i.id),
+            SUM(CASE WHEN ct.transaction_type = 'INCOME' AND ct.transaction_date >= DATEADD(month, -1, GETDATE()) THEN ct.amount ELSE 0 END)
+        FROM invoices i
+        LEFT JOIN cash_transactions ct ON 1=1
+        WHERE i.invoice_date >= DATEADD(month, -12, GETDATE())
+    """,
+}
+
+# The dashboard's unpaid invoice aggregate through IX_invoices_balance_due, and the scan it replaced
+UNPAID_QUERIES = {
+    'unpaid': "SELECT COUNT(*), SUM(balance_due) FROM invoices WHERE balance_due > 0",
+    'unpaid_scan': "SELECT COUNT(*), SUM(total_amount - paid_amount) FROM invoices WHERE paid_amount < total_amount",
+}
+
+INSERT_BATCH = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        'Times the dashboard financial aggregates while invoices and cash_transactions grow. '
+        'Synthetic rows are committed (the dashboards fan out to other pooled connections, which only '
+        'see committed data) and deleted at the end; run it against a disposable database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help='Comma separated row counts added to each table (e.g. 1000,10000,100000,1000000)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per size (median is reported)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed for the synthetic rows')
+        parser.add_argument('--unpaid', type=int, default=500,
+                            help='Synthetic invoices left (partly) unpaid; the rest are paid, so the unpaid '
+                                 'aggregate should stay flat while the table grows')
+        parser.add_argument('--legacy-limit', type=int, default=10 ** 7,
+                            help='Time the old ON 1=1 queries while invoices x transactions stays below this')
+        parser.add_argument('--max-exponent', type=float, default=None,
+                            help='Fail when time grows faster than rows**N between the smallest and largest size '
+                                 '(1.0 = linear, 2.0 = the old cartesian join)')
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(s) for s in options['sizes'].split(',') if s.strip())
+        if not sizes:
+            raise CommandError('--sizes is empty')
+        rng = random.Random(options['seed'])
+
+        ensure_invoice_balance_due()
+        results = []
+        with request_connection_scope():
+            # Leftovers of an interrupted run
+            self._run(self._cleanup)
+            try:
+                customer_id, user_id = self._run(self._fixtures)
+                inserted = 0
+                for size in sizes:
+                    self._run(lambda cursor: self._grow(cursor, rng, inserted, size, customer_id, user_id,
+                                                        options['unpaid']))
+                    inserted = size
+                    # No handle is open here, so the dashboards fan out exactly as in a request
+                    timings = {
+                        'dashboard': self._time(get_comprehensive_dashboard.uncached, options['repeat']),
+                        'accounting_summary': self._time(get_accounting_summary.uncached, options['repeat']),
+                    }
+                    for name, query in UNPAID_QUERIES.items():
+                        timings[name] = self._time(lambda q=query: self._run(lambda cursor: self._fetch(cursor, q)),
+                                                   options['repeat'])
+                    if size * size <= options['legacy_limit']:
+                        for name, query in LEGACY_QUERIES.items():
+                            timings[name] = self._time(lambda q=query: self._run(lambda cursor: self._fetch(cursor, q)), 1)
+                    results.append((size, timings))
+                    self.stdout.write(f'{size:>9} rows  ' + '  '.join(
+                        f'{name}={ms:.1f}ms' for name, ms in timings.items()
+                    ))
+            finally:
+                self._run(self._cleanup)
+
+        if len(sizes) < 2:
+            return
+        smallest, largest = results[0][1], results[-1][1]
+        failures = []
+        for name in ('dashboard', 'accounting_summary', 'unpaid', 'unpaid_scan'):
+            growth = largest[name] / max(smallest[name], 0.001)
+            exponent = math.log(max(growth, 1.0)) / math.log(sizes[-1] / max(sizes[0], 1))
+            self.stdout.write(f'{name}: {growth:.1f}x from {sizes[0]} to {sizes[-1]} rows (time ~ rows**{exponent:.2f})')
+            if options['max_exponent'] is not None and exponent > options['max_exponent']:
+                failures.append(f'{name} scales as rows**{exponent:.2f}')
+        if failures:
+            raise CommandError('; '.join(failures))
+
+    @staticmethod
+    def _time(fn, repeat):
+        samples = []
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
+
+    @staticmethod
+    def _run(fn):
+        """fn(cursor) on the scope's connection, committed"""
+        connection = get_db_connection()
+        try:
+            result = fn(connection.cursor())
+            connection.commit()
+            return result
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _cleanup(cursor):
+        """Delete the synthetic rows (they are recognisable by their BENCH codes)"""
+        cursor.execute("DELETE FROM cash_transactions WHERE reference_type = 'BENCH'")
+        cursor.execute("DELETE FROM invoices WHERE invoice_number LIKE 'BENCH-%'")
+        cursor.execute("DELETE FROM customers WHERE customer_code = 'BENCH-0001'")
+
+    @staticmethod
+    def _fetch(cursor, query):
+        cursor.execute(query)
+        return cursor.fetchall()
+
+    @staticmethod
+    def _fixtures(cursor):
+        cursor.execute("SELECT TOP 1 id FROM users ORDER BY id")
+        row = cursor.fetchone()
+        if not row:
+            raise CommandError('A users row is required (cash_transactions.created_by)')
+        cursor.execute("""
+            INSERT INTO customers (customer_code, first_name, last_name, phone)
+            OUTPUT INSERTED.id
+            VALUES ('BENCH-0001', 'Benchmark', 'Customer', '0000000000')
+        """)
+        return cursor.fetchone()[0], row[0]
+
+    @staticmethod
+    def _grow(cursor, rng, start, stop, customer_id, user_id, unpaid):
+        """
+        Add rows start..stop-1 to invoices and cash_transactions, dated over the last two years.
+        Only the first `unpaid` invoices are left (partly) unpaid.
+        """
+        today = date.today()
+        for batch_start in range(start, stop, INSERT_BATCH):
+            batch = range(batch_start, min(batch_start + INSERT_BATCH, stop))
+            invoices, transactions = [], []
+            for n in batch:
+                subtotal = round(rng.uniform(100, 5000), 2)
+                total = round(subtotal * 1.2, 2)
+                paid = total if n >= unpaid else round(total * rng.random(), 2)
+                invoices.append((
+                    f'BENCH-{n:08d}', 'SERVICE', customer_id, today - timedelta(days=rng.randrange(730)),
+                    subtotal, round(total - subtotal, 2), total, paid, 'PAID' if paid >= total else 'PENDING'
+                ))
+                transactions.append((
+                    today - timedelta(days=rng.randrange(730)), rng.choice(('INCOME', 'EXPENSE')),
+                    rng.choice(('CASH', 'CARD', 'TRANSFER')), round(rng.uniform(50, 3000), 2), 'BENCH', user_id
+                ))
+            bulk_insert(cursor, 'invoices', (
+                'invoice_number', 'invoice_type', 'customer_id', 'invoice_date',
+                'subtotal', 'tax_amount', 'total_amount', 'paid_amount', 'status'
+            ), invoices)
+            bulk_insert(cursor, 'cash_transactions', (
+                'transaction_date', 'transaction_type', 'payment_method', 'amount', 'reference_type', 'created_by'
+            ), transactions)
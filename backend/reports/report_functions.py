@@ -4,6 +4,9 @@ Uses DATABASE.txt views and creates comprehensive analytics
 """
 from datetime import datetime, date, timedelta
 from .database import execute_query, get_db_connection
+from core.result_cache import cached_result
+from core.fanout import gather
+from accounting.invoice_balance import ensure_invoice_balance_due
 
 
 def get_customer_summary_report():
@@ -83,9 +86,11 @@ def get_service_performance_report():
     return reports
 
 
+@cached_result('customers', 'inventory', 'services', 'appointments', 'accounting')
 def get_comprehensive_dashboard():
     """Get all dashboard data"""
     try:
+        ensure_invoice_balance_due()
         # Get basic counts
         summary_query = """
         SELECT 
@@ -93,24 +98,33 @@ def get_comprehensive_dashboard():
             (SELECT COUNT(*) FROM parts WHERE is_active = 1) as total_parts,
             (SELECT COUNT(*) FROM service_records WHERE status = 'PENDING') as pending_services,
             (SELECT COUNT(*) FROM appointments WHERE status = 'SCHEDULED' AND appointment_date >= CAST(GETDATE() AS DATE)) as upcoming_appointments,
-            (SELECT COUNT(*) FROM invoices WHERE paid_amount < total_amount) as unpaid_invoices
+            (SELECT COUNT(*) FROM invoices WHERE balance_due > 0) as unpaid_invoices
         """
         
-        summary_results = execute_query(summary_query)
-        summary_data = summary_results[0] if summary_results else {}
-        
-        # Get financial summary
+        # Get financial summary: independent single-row aggregates, one per table
         financial_query = """
-        SELECT 
-            SUM(CASE WHEN ct.transaction_type = 'INCOME' AND ct.transaction_date >= DATEADD(month, -1, GETDATE()) THEN ct.amount ELSE 0 END) as monthly_income,
-            SUM(CASE WHEN ct.transaction_type = 'EXPENSE' AND ct.transaction_date >= DATEADD(month, -1, GETDATE()) THEN ct.amount ELSE 0 END) as monthly_expenses,
-            SUM(CASE WHEN i.paid_amount < i.total_amount THEN (i.total_amount - i.paid_amount) ELSE 0 END) as total_unpaid
-        FROM cash_transactions ct
-        FULL OUTER JOIN invoices i ON 1=1
+        SELECT cash.monthly_income, cash.monthly_expenses, unpaid.total_unpaid
+        FROM (
+            SELECT 
+                SUM(CASE WHEN transaction_type = 'INCOME' THEN amount ELSE 0 END) as monthly_income,
+                SUM(CASE WHEN transaction_type = 'EXPENSE' THEN amount ELSE 0 END) as monthly_expenses
+            FROM cash_transactions
+            WHERE transaction_date >= DATEADD(month, -1, GETDATE())
+        ) cash
+        CROSS JOIN (
+            SELECT SUM(balance_due) as total_unpaid
+            FROM invoices
+            WHERE balance_due > 0
+        ) unpaid
         """
         
-        financial_results = execute_query(financial_query)
-        financial_data = financial_results[0] if financial_results else {}
+        # Both queries run concurrently on separate pooled connections
+        results = gather({
+            'summary': lambda: execute_query(summary_query),
+            'financial': lambda: execute_query(financial_query),
+        })
+        summary_data = results['summary'][0] if results['summary'] else {}
+        financial_data = results['financial'][0] if results['financial'] else {}
         
         return {
             'summary': {
@@ -1,14 +1,2 @@
-import pyodbc
-from django.conf import settings
-
-
-def get_db_connection():
-    connection_string = (
-        f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-        f"SERVER={settings.DATABASES['default']['HOST']};"
-        f"DATABASE={settings.DATABASES['default']['NAME']};"
-        f"Trusted_Connection=yes;"
-    )
-    return pyodbc.connect(connection_string)
-
-
+# Connections come from the shared pool in core; close() returns them to it
+from core.database import get_db_connection  # noqa: F401
@@ -1,23 +1,38 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from core.renderers import FAST_JSON_RENDERERS
 from datetime import date
 from .database import get_db_connection
+from inventory.currency_cache import get_latest_rate, get_rate_on
+from inventory.stock_summary import ensure_part_stock_summary
+from inventory.stock_allocation import allocate_stock_out
+from inventory.search_index import search_part_ids
+from core.bulk import require_ids, bulk_insert
+from core.result_cache import invalidate_cache
 
 
 class SalesPartsSearchView(APIView):
+    renderer_classes = FAST_JSON_RENDERERS
+
     def get(self, request):
         search = request.GET.get('search')
         part_type = request.GET.get('type', 'ACCESSORY')  # ACCESSORY | PART | ALL
+        ensure_part_stock_summary()
         connection = get_db_connection()
         cursor = connection.cursor()
         try:
             conditions = ["p.is_active = 1"]
             params = []
+            rank = None
             if search:
-                conditions.append("(p.part_code LIKE ? OR p.part_name LIKE ?)")
-                sp = f"%{search}%"
-                params.extend([sp, sp])
+                # ranked ids from the in-memory parts index, hydrated below with one IN (...)
+                ids = search_part_ids(search, part_type if part_type != 'ALL' else None, limit=100)
+                if not ids:
+                    return Response({'parts': []}, status=status.HTTP_200_OK)
+                conditions.append(f"p.id IN ({', '.join('?' for _ in ids)})")
+                params.extend(ids)
+                rank = {pid: i for i, pid in enumerate(ids)}
             if part_type and part_type != 'ALL':
                 conditions.append("p.part_type = ?")
                 params.append(part_type)
@@ -32,31 +47,25 @@ class SalesPartsSearchView(APIView):
                     ISNULL(pp.purchase_price,0) as purchase_price,
                     ISNULL(pp.sale_price,0) as sale_price,
                     ISNULL(pp.currency_type,'TRY') as currency,
-                    pp.effective_date,
-                    -- latest rates for today
-                    (SELECT TOP 1 sell_rate FROM currency_rates WHERE currency_code = 'EUR' ORDER BY rate_date DESC) as eur_try_today,
-                    (SELECT TOP 1 sell_rate FROM currency_rates WHERE currency_code = 'USD' ORDER BY rate_date DESC) as usd_try_today,
-                    -- rate on purchase effective date
-                    (SELECT TOP 1 sell_rate FROM currency_rates WHERE currency_code = 'EUR' AND rate_date <= pp.effective_date ORDER BY rate_date DESC) as eur_try_on_purchase,
-                    (SELECT TOP 1 sell_rate FROM currency_rates WHERE currency_code = 'USD' AND rate_date <= pp.effective_date ORDER BY rate_date DESC) as usd_try_on_purchase
+                    pp.effective_date
                 FROM parts p
                 INNER JOIN part_categories pc ON p.category_id = pc.id
-                LEFT JOIN (
-                    SELECT part_id, SUM(current_stock) as total_stock FROM part_stock_locations GROUP BY part_id
-                ) stock ON p.id = stock.part_id
+                LEFT JOIN part_stock_summary stock ON p.id = stock.part_id
                 LEFT JOIN part_prices pp ON p.id = pp.part_id AND pp.is_current = 1
                 WHERE {where}
                 ORDER BY CASE WHEN p.part_type = 'ACCESSORY' THEN 0 ELSE 1 END, p.part_name
             """, params)
             rows = cursor.fetchall()
+            # latest rates for today (rate cache, no per-row subqueries)
+            eur_try_today = get_latest_rate('EUR')
+            usd_try_today = get_latest_rate('USD')
             data = []
             for r in rows:
                 # unpack
-                (pid, pcode, pname, ptype, cat, brand, model, color, size, image_path, stock, purchase_price, sale_price, currency, effective_date, eur_try_today, usd_try_today, eur_try_on_purchase, usd_try_on_purchase) = r
-                eur_try_today = float(eur_try_today) if eur_try_today else None
-                usd_try_today = float(usd_try_today) if usd_try_today else None
-                eur_try_on_purchase = float(eur_try_on_purchase) if eur_try_on_purchase else eur_try_today
-                usd_try_on_purchase = float(usd_try_on_purchase) if usd_try_on_purchase else usd_try_today
+                (pid, pcode, pname, ptype, cat, brand, model, color, size, image_path, stock, purchase_price, sale_price, currency, effective_date) = r
+                # rate on purchase effective date
+                eur_try_on_purchase = get_rate_on('EUR', effective_date) or eur_try_today
+                usd_try_on_purchase = get_rate_on('USD', effective_date) or usd_try_today
                 purchase_price = float(purchase_price or 0)
                 sale_price = float(sale_price or 0)
                 # compute USD and TRY at purchase date for purchase
@@ -93,6 +102,8 @@ class SalesPartsSearchView(APIView):
                     'purchase_price_try_at_purchase': round(purchase_try_at_purchase, 2),
                     'purchase_effective_date': effective_date,
                 })
+            if rank is not None:
+                data.sort(key=lambda p: rank[p['id']])
             return Response({'parts': data}, status=status.HTTP_200_OK)
         finally:
             connection.close()
@@ -111,6 +122,7 @@ class SalesView(APIView):
         payment_method = payload.get('payment_method', 'CASH')
         if not items:
             return Response({'error': 'No items provided'}, status=status.HTTP_400_BAD_REQUEST)
+        ensure_part_stock_summary()
         connection = get_db_connection()
         cursor = connection.cursor()
         try:
@@ -132,11 +144,12 @@ class SalesView(APIView):
             invoice_id = cursor.fetchone()[0]
 
             # Insert invoice items
-            for it in items:
-                cursor.execute("""
-                    INSERT INTO invoice_items (invoice_id, part_id, quantity, unit_price, line_total)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (invoice_id, it['part_id'], int(it['quantity']), float(it['unit_price']), float(it['unit_price']) * int(it['quantity'])))
+            require_ids(cursor, 'parts', [it['part_id'] for it in items], label='Part')
+            bulk_insert(
+                cursor, 'invoice_items',
+                ('invoice_id', 'part_id', 'quantity', 'unit_price', 'line_total'),
+                [(invoice_id, it['part_id'], int(it['quantity']), float(it['unit_price']), float(it['unit_price']) * int(it['quantity'])) for it in items]
+            )
             
             # Create cash transaction (income)
             cursor.execute("""
@@ -145,29 +158,17 @@ class SalesView(APIView):
                 VALUES (?, 'INCOME', ?, ?, 'INVOICE', ?, 'Retail sale', 1)
             """, (date.today(), payment_method, total_amount, invoice_id))
 
-            # Decrease stock from any available location in FIFO by stock
-            for it in items:
-                needed = int(it['quantity'])
-                cursor.execute("""
-                    SELECT TOP 100 storage_location_id, current_stock
-                    FROM part_stock_locations
-                    WHERE part_id = ? AND current_stock > 0
-                    ORDER BY current_stock DESC
-                """, (it['part_id'],))
-                rows = cursor.fetchall()
-                for loc_id, current_stock in rows:
-                    if needed <= 0:
-                        break
-                    take = min(needed, int(current_stock))
-                    cursor.execute("""
-                        UPDATE part_stock_locations
-                        SET current_stock = current_stock - ?
-                        WHERE part_id = ? AND storage_location_id = ?
-                    """, (take, it['part_id'], loc_id))
-                    needed -= take
+            # Decrease stock for the whole basket: STORE first, then oldest stock (sells what is available)
+            plan = allocate_stock_out(cursor, items, 'SALE', invoice_id, 'Retail sale', allow_partial=True)
 
             connection.commit()
-            return Response({'message': 'Sale completed', 'invoice_id': invoice_id}, status=status.HTTP_201_CREATED)
+            invalidate_cache('inventory', 'accounting')
+            return Response({
+                'message': 'Sale completed',
+                'invoice_id': invoice_id,
+                'warnings': plan.warnings,
+                'allocation': plan.as_dict()['lines'],
+            }, status=status.HTTP_201_CREATED)
         except Exception as e:
             connection.rollback()
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
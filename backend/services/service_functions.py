@@ -8,6 +8,14 @@ Implements DATABASE.txt service system with:
 """
 from datetime import datetime, date
 from .database import get_db_connection
+from core.database import get_dedicated_connection
+from inventory.stock_summary import ensure_part_stock_summary
+from inventory.stock_allocation import allocate_stock_out, restore_stock_out
+from core.bulk import require_ids, bulk_insert
+from core.result_cache import cached_result, invalidate_cache
+from core.row_mapping import RowShape, to_float
+from core.reference_registry import reference_registry
+from core.pagination import Keyset, approximate_count
 
 # Cache flag to avoid recreating tables on every call
 _SERVICE_TABLES_ENSURED = False
@@ -19,7 +27,8 @@ def _ensure_service_work_items_table():
     global _SERVICE_TABLES_ENSURED
     if _SERVICE_TABLES_ENSURED:
         return
-    connection = get_db_connection()
+    # Own connection: the DDL commit must not commit a caller's open transaction
+    connection = get_dedicated_connection()
     cursor = connection.cursor()
     try:
         cursor.execute(
@@ -77,11 +86,23 @@ def _get_default_storage_location_id():
 
 # ===== SERVICE RECORDS =====
 
-def get_all_service_records(limit=100, offset=0, status_filter=None, customer_id=None, vespa_id=None):
-    """Get service records with customer and vespa info"""
-    connection = get_db_connection()
-    cursor = connection.cursor()
-    
+_SERVICE_LIST_ROW = RowShape('ServiceListRow', converters={
+    'labor_cost': to_float,
+    'parts_cost': to_float,
+    'work_items_cost': to_float,
+    'total_cost': to_float,
+})
+
+
+_SERVICE_KEYSET = Keyset('service_records', ('sr.service_date', 'DESC', 'service_date'), ('sr.id', 'DESC', 'id'))
+
+
+def get_all_service_records(limit=100, cursor_token=None, status_filter=None, customer_id=None, vespa_id=None,
+                            with_total=False):
+    """
+    Service records with customer and vespa info, newest first, keyset-paginated on (service_date, id).
+    Returns {'services', 'next_cursor', 'has_more', 'total'}; total (approximate) only with with_total.
+    """
     where_conditions = []
     params = []
     
@@ -90,17 +111,25 @@ def get_all_service_records(limit=100, offset=0, status_filter=None, customer_id
         params.append(status_filter)
     
     if customer_id:
-        where_conditions.append("c.id = ?")
+        where_conditions.append("cv.customer_id = ?")
         params.append(customer_id)
     
     if vespa_id:
         where_conditions.append("cv.id = ?")
         params.append(vespa_id)
     
+    count_where = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
+    count_params = list(params)
+    
+    seek, seek_params = _SERVICE_KEYSET.seek(cursor_token)
+    if seek:
+        where_conditions.append(seek)
+        params.extend(seek_params)
+    
     where_clause = "WHERE " + " AND ".join(where_conditions) if where_conditions else ""
     
     query = f"""
-    SELECT 
+    SELECT TOP (?)
         sr.id, sr.service_number, sr.service_type, sr.service_date,
         sr.status, sr.description, sr.customer_complaints, sr.work_done,
         sr.labor_cost, sr.start_date, sr.completion_date,
@@ -133,43 +162,32 @@ def get_all_service_records(limit=100, offset=0, status_filter=None, customer_id
         GROUP BY service_record_id
     ) wi_total ON sr.id = wi_total.service_record_id
     {where_clause}
-    ORDER BY sr.service_date DESC, sr.created_date DESC
-    OFFSET ? ROWS FETCH NEXT ? ROWS ONLY
+    ORDER BY {_SERVICE_KEYSET.order_by()}
     """
     
-    params.extend([offset, limit])
-    cursor.execute(query, params)
-    rows = cursor.fetchall()
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    # One extra row tells whether another page exists
+    cursor.execute(query, [int(limit) + 1] + params)
+    rows = _SERVICE_LIST_ROW.dicts(cursor)
     connection.close()
     
-    services = []
-    for row in rows:
-        services.append({
-            'id': row[0],
-            'service_number': row[1],
-            'service_type': row[2],
-            'service_date': row[3],
-            'status': row[4],
-            'description': row[5],
-            'customer_complaints': row[6],
-            'work_done': row[7],
-            'labor_cost': float(row[8]) if row[8] else 0,
-            'start_date': row[9],
-            'completion_date': row[10],
-            'technician_name': row[11],
-            'mileage_at_service': row[12],
-            'customer_name': row[13],
-            'customer_phone': row[14],
-            'license_plate': row[15],
-            'model_name': row[16],
-            'parts_cost': float(row[17]) if row[17] else 0,
-            'work_items_cost': float(row[18]) if row[18] else 0,
-            'total_cost': float(row[19]) if row[19] else 0,
-            'customer_id': row[20],
-            'customer_vespa_id': row[21]
-        })
+    services, next_cursor, has_more = _SERVICE_KEYSET.page(rows, limit)
+    total = None
+    if with_total:
+        total = approximate_count('service_records', f"""
+        SELECT COUNT(*)
+        FROM service_records sr
+        INNER JOIN customer_vespas cv ON sr.customer_vespa_id = cv.id
+        {count_where}
+        """, count_params, tags=('services',))
     
-    return services
+    return {
+        'services': services,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'total': total
+    }
 
 
 def get_service_by_id(service_id):
@@ -314,78 +332,54 @@ def get_service_by_id(service_id):
     return service
 
 
-def _get_all_locations_by_priority(cursor):
-    """Return list of (id, location_type) ordered by priority: STORE first, then others."""
-    cursor.execute("""
-        SELECT id, location_type FROM storage_locations
-        ORDER BY CASE WHEN location_type='STORE' THEN 0 ELSE 1 END, id
-    """)
-    return cursor.fetchall() or []
+def _insert_service_parts(cursor, service_id, used_parts):
+    """Write service_parts rows in one batch; unit price is derived from the line cost"""
+    rows = []
+    for part_data in used_parts:
+        unit_price = 0
+        if part_data['quantity'] > 0:
+            cost = float(part_data.get('cost', 0))
+            unit_price = cost / part_data['quantity']
+        rows.append((service_id, part_data['part_id'], part_data['quantity'], float(unit_price), 'TRY'))
+    bulk_insert(
+        cursor, 'service_parts',
+        ('service_record_id', 'part_id', 'quantity', 'unit_price', 'currency_type'),
+        rows
+    )
 
 
-def _get_available_qty(cursor, part_id, location_id):
-    """Compute available quantity at a location using stock_movements (IN - OUT)."""
-    cursor.execute(
-        """
-        SELECT SUM(CASE WHEN movement_type='IN' THEN quantity
-                        WHEN movement_type='OUT' THEN -quantity
-                        WHEN movement_type='ADJUSTMENT' THEN quantity
-                        ELSE 0 END) as qty
-        FROM stock_movements WHERE part_id = ? AND storage_location_id = ?
-        """,
-        (part_id, location_id)
+def _insert_service_work_items(cursor, service_id, work_items):
+    """Validate all work types against the reference registry, then write service_work_items in one batch"""
+    work_type_ids = [wi.get('work_type_id') or wi.get('id') for wi in work_items]
+    registry = reference_registry.work_types
+    work_types = registry.get_many(work_type_ids)
+    if any(i is not None and int(i) not in work_types for i in work_type_ids):
+        # Possibly created by another worker since the last reload
+        registry.refresh()
+        work_types = registry.get_many(work_type_ids)
+    for i in work_type_ids:
+        if i is None or int(i) not in work_types:
+            raise Exception(f"Work type ID {i} not found in work_types table")
+    rows = []
+    for wi, work_type_id in zip(work_items, work_type_ids):
+        quantity = int(wi.get('quantity') or 1)
+        wt = work_types[int(work_type_id)]
+        base_price = float(wt.base_price) if wt.base_price else 0.0
+        provided_cost = wi.get('cost')
+        line_total = float(provided_cost) if provided_cost is not None else (base_price * quantity)
+        unit_price = line_total / quantity if quantity > 0 else 0.0
+        rows.append((service_id, work_type_id, quantity, float(unit_price), float(line_total)))
+    bulk_insert(
+        cursor, 'service_work_items',
+        ('service_record_id', 'work_type_id', 'quantity', 'unit_price', 'line_total'),
+        rows
     )
-    row = cursor.fetchone()
-    return int(row[0]) if row and row[0] is not None else 0
-
-
-def _allocate_and_register_stock_out(cursor, service_id, service_number, part_id, required_qty, warnings_accumulator):
-    """Allocate stock OUT movements prioritizing STORE, then other locations. Append warnings as needed."""
-    locations = _get_all_locations_by_priority(cursor)
-    remaining = int(required_qty)
-    total_available = 0
-    store_available = 0
-    for loc_id, loc_type in locations:
-        avail = _get_available_qty(cursor, part_id, loc_id)
-        total_available += max(0, avail)
-        if loc_type == 'STORE':
-            store_available = max(0, avail)
-
-    if total_available < remaining:
-        warnings_accumulator.append(f"Yetersiz stok: Parça {part_id} için ihtiyaç {remaining}, mevcut {total_available} (Mağaza {store_available}).")
-        # yine de mevcut kadar düşmeyelim; servis kaydı tutarlılığı için istisna atalım
-        raise Exception(f"Insufficient stock for part {part_id}: required {remaining}, available {total_available}")
-
-    # Allocate from STORE first
-    for loc_id, loc_type in locations:
-        if remaining <= 0:
-            break
-        avail = _get_available_qty(cursor, part_id, loc_id)
-        take = min(max(0, avail), remaining)
-        if take > 0:
-            cursor.execute(
-                """
-                INSERT INTO stock_movements (
-                    part_id, storage_location_id, movement_type, quantity,
-                    reference_type, reference_id, description
-                ) VALUES (?, ?, 'OUT', ?, 'SERVICE', ?, ?)
-                """,
-                (
-                    part_id,
-                    loc_id,
-                    int(take),
-                    service_id,
-                    f"Service #{service_number} parça tüketimi"
-                )
-            )
-            remaining -= take
-
-    if store_available < required_qty and total_available >= required_qty:
-        warnings_accumulator.append(f"Mağazada stok yetersiz (var: {store_available}), depo kullanıldı. Parça {part_id} için toplam {required_qty} düşüldü.")
 
 
 def create_service_record(data):
     """Create new service record with parts"""
+    ensure_part_stock_summary()
+    _ensure_service_work_items_table()
     connection = get_db_connection()
     cursor = connection.cursor()
     
@@ -419,67 +413,23 @@ def create_service_record(data):
         
         service_id = cursor.fetchone()[0]
         
-        # Ensure work items table exists (no-op if already exists)
-        _ensure_service_work_items_table()
-
         # Add used parts if provided
         used_parts = data.get('used_parts', [])
         warnings = []
         if used_parts:
-            for part_data in used_parts:
-                print(f"🔧 Processing part: ID={part_data['part_id']}, Quantity={part_data['quantity']}, Cost={part_data.get('cost', 0)}")
-                
-                # Verify part exists
-                cursor.execute("SELECT id, part_name FROM parts WHERE id = ?", (part_data['part_id'],))
-                part_exists = cursor.fetchone()
-                if not part_exists:
-                    print(f"❌ ERROR: Part ID {part_data['part_id']} does not exist in parts table!")
-                    raise Exception(f"Part ID {part_data['part_id']} not found in parts table")
-                
-                print(f"✅ Part exists: {part_exists[1]} (ID: {part_exists[0]})")
-                
-                unit_price = 0
-                if part_data['quantity'] > 0:
-                    cost = float(part_data.get('cost', 0))
-                    unit_price = cost / part_data['quantity']
-                
-                cursor.execute("""
-                    INSERT INTO service_parts (
-                        service_record_id, part_id, quantity, unit_price, currency_type
-                    ) VALUES (?, ?, ?, ?, ?)
-                """, (
-                    service_id,
-                    part_data['part_id'],
-                    part_data['quantity'],
-                    float(unit_price),
-                    'TRY'
-                ))
-                # Allocate stock OUT across locations with warnings
-                _allocate_and_register_stock_out(cursor, service_id, service_number, part_data['part_id'], part_data['quantity'], warnings)
+            # Verify all parts exist (one query)
+            require_ids(cursor, 'parts', [p['part_id'] for p in used_parts], label='Part')
+
+            # Stock OUT for the whole basket (STORE first); raises before any service_parts row is written
+            plan = allocate_stock_out(cursor, used_parts, 'SERVICE', service_id, f"Service #{service_number} parça tüketimi")
+            warnings.extend(plan.warnings)
+            _insert_service_parts(cursor, service_id, used_parts)
         # Add work items if provided
         work_items = data.get('work_items', [])
         if work_items:
-            for wi in work_items:
-                work_type_id = wi.get('work_type_id') or wi.get('id')
-                quantity = int(wi.get('quantity') or 1)
-                # Validate work type
-                cursor.execute("SELECT id, name, base_price FROM work_types WHERE id = ?", (work_type_id,))
-                wt = cursor.fetchone()
-                if not wt:
-                    raise Exception(f"Work type ID {work_type_id} not found in work_types table")
-                base_price = float(wt[2]) if wt[2] else 0.0
-                provided_cost = wi.get('cost')
-                line_total = float(provided_cost) if provided_cost is not None else (base_price * quantity)
-                unit_price = line_total / quantity if quantity > 0 else 0.0
-                cursor.execute(
-                    """
-                    INSERT INTO service_work_items (
-                        service_record_id, work_type_id, quantity, unit_price, line_total
-                    ) VALUES (?, ?, ?, ?, ?)
-                    """,
-                    (service_id, work_type_id, quantity, float(unit_price), float(line_total))
-                )
+            _insert_service_work_items(cursor, service_id, work_items)
         connection.commit()
+        invalidate_cache('services', 'inventory')
         # Return id and warnings for response
         return {'service_id': service_id, 'warnings': warnings}
         
@@ -492,6 +442,8 @@ def create_service_record(data):
 
 def update_service_record(service_id, data):
     """Update complete service record with parts"""
+    ensure_part_stock_summary()
+    _ensure_service_work_items_table()
     connection = get_db_connection()
     cursor = connection.cursor()
     
@@ -527,12 +479,10 @@ def update_service_record(service_id, data):
             service_id
         ))
         
-        # Ensure work items table exists (no-op if already exists)
-        _ensure_service_work_items_table()
-
         # Delete existing service parts
         cursor.execute("DELETE FROM service_parts WHERE service_record_id = ?", (service_id,))
-        # Delete previous stock movements for this service
+        # Return the previous allocation to stock, then delete its movements
+        restore_stock_out(cursor, 'SERVICE', service_id)
         cursor.execute("DELETE FROM stock_movements WHERE reference_type = 'SERVICE' AND reference_id = ?", (service_id,))
         # Delete existing work items
         cursor.execute("IF OBJECT_ID('dbo.service_work_items','U') IS NOT NULL DELETE FROM service_work_items WHERE service_record_id = ?", (service_id,))
@@ -541,61 +491,18 @@ def update_service_record(service_id, data):
         used_parts = data.get('used_parts', [])
         warnings = []
         if used_parts:
-            for part_data in used_parts:
-                print(f"🔧 UPDATE: Processing part: ID={part_data['part_id']}, Quantity={part_data['quantity']}, Cost={part_data.get('cost', 0)}")
-                
-                # Verify part exists
-                cursor.execute("SELECT id, part_name FROM parts WHERE id = ?", (part_data['part_id'],))
-                part_exists = cursor.fetchone()
-                if not part_exists:
-                    print(f"❌ UPDATE ERROR: Part ID {part_data['part_id']} does not exist in parts table!")
-                    raise Exception(f"Part ID {part_data['part_id']} not found in parts table")
-                
-                print(f"✅ UPDATE: Part exists: {part_exists[1]} (ID: {part_exists[0]})")
-                
-                unit_price = 0
-                if part_data['quantity'] > 0:
-                    cost = float(part_data.get('cost', 0))
-                    unit_price = cost / part_data['quantity']
-                
-                cursor.execute("""
-                    INSERT INTO service_parts (
-                        service_record_id, part_id, quantity, unit_price, currency_type
-                    ) VALUES (?, ?, ?, ?, ?)
-                """, (
-                    service_id,
-                    part_data['part_id'],
-                    part_data['quantity'],
-                    float(unit_price),
-                    'TRY'
-                ))
-                # Register stock OUT movement
-                _allocate_and_register_stock_out(cursor, service_id, f"UPDATE-{service_id}", part_data['part_id'], part_data['quantity'], warnings)
+            require_ids(cursor, 'parts', [p['part_id'] for p in used_parts], label='Part')
+
+            plan = allocate_stock_out(cursor, used_parts, 'SERVICE', service_id, f"Service #UPDATE-{service_id} parça tüketimi")
+            warnings.extend(plan.warnings)
+            _insert_service_parts(cursor, service_id, used_parts)
         # Add updated work items if provided
         work_items = data.get('work_items', [])
         if work_items:
-            for wi in work_items:
-                work_type_id = wi.get('work_type_id') or wi.get('id')
-                quantity = int(wi.get('quantity') or 1)
-                # Validate work type
-                cursor.execute("SELECT id, name, base_price FROM work_types WHERE id = ?", (work_type_id,))
-                wt = cursor.fetchone()
-                if not wt:
-                    raise Exception(f"Work type ID {work_type_id} not found in work_types table")
-                base_price = float(wt[2]) if wt[2] else 0.0
-                provided_cost = wi.get('cost')
-                line_total = float(provided_cost) if provided_cost is not None else (base_price * quantity)
-                unit_price = line_total / quantity if quantity > 0 else 0.0
-                cursor.execute(
-                    """
-                    INSERT INTO service_work_items (
-                        service_record_id, work_type_id, quantity, unit_price, line_total
-                    ) VALUES (?, ?, ?, ?, ?)
-                    """,
-                    (service_id, work_type_id, quantity, float(unit_price), float(line_total))
-                )
+            _insert_service_work_items(cursor, service_id, work_items)
         
         connection.commit()
+        invalidate_cache('services', 'inventory')
         return {'success': True, 'warnings': warnings}
         
     except Exception as e:
@@ -629,6 +536,7 @@ def update_service_status(service_id, status, completion_date=None, work_done=''
     cursor.execute(query, values)
     affected_rows = cursor.rowcount
     connection.commit()
+    invalidate_cache('services')
     connection.close()
     
     return affected_rows > 0
@@ -636,24 +544,26 @@ def update_service_status(service_id, status, completion_date=None, work_done=''
 
 def add_service_parts(service_id, parts_list):
     """Add multiple parts to service record"""
+    ensure_part_stock_summary()
     connection = get_db_connection()
     cursor = connection.cursor()
     
     try:
-        for part_data in parts_list:
-            cursor.execute("""
-                INSERT INTO service_parts (
-                    service_record_id, part_id, quantity, unit_price, currency_type
-                ) VALUES (?, ?, ?, ?, ?)
-            """, (
-                service_id,
-                part_data['part_id'],
-                part_data['quantity'],
-                part_data['unit_price'],
-                part_data.get('currency_type', 'TRY')
-            ))
+        require_ids(cursor, 'parts', [p['part_id'] for p in parts_list], label='Part')
+        bulk_insert(
+            cursor, 'service_parts',
+            ('service_record_id', 'part_id', 'quantity', 'unit_price', 'currency_type'),
+            [
+                (service_id, p['part_id'], p['quantity'], p['unit_price'], p.get('currency_type', 'TRY'))
+                for p in parts_list
+            ]
+        )
+        
+        # Stock OUT for the added parts (STORE first); nothing is written when a part is short
+        allocate_stock_out(cursor, parts_list, 'SERVICE', service_id, f"Service #{service_id} parça ekleme")
         
         connection.commit()
+        invalidate_cache('services', 'inventory')
         return True
         
     except Exception as e:
@@ -784,6 +694,7 @@ def create_paint_job(service_id, template_id, selected_parts, estimated_cost):
             ))
         
         connection.commit()
+        invalidate_cache('services')
         return paint_job_id
         
     except Exception as e:
@@ -866,6 +777,7 @@ def get_paint_job_details(paint_job_id):
 
 # ===== SERVICE ANALYTICS =====
 
+@cached_result('services')
 def get_service_summary():
     """Get service statistics summary"""
     connection = get_db_connection()
@@ -1,3 +1,97 @@
-from django.test import TestCase
+from core import database
+from core.tests import RawSqliteTestCase
+from inventory.stock_allocation import InsufficientStock
+from services import service_functions
+from services.service_functions import create_service_record, update_service_record
 
-# Create your tests here.
+
+class ServiceStockTests(RawSqliteTestCase):
+    """Service create/update: parts are taken from stock exactly once (no trigger, STORE first)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.seed = cls._seed()
+
+    @classmethod
+    def _seed(cls):
+        connection = database.get_db_connection()
+        try:
+            cursor = connection.cursor()
+            cls.seed_stock(cursor, [(3, 10)])
+            model = cls.insert(cursor, "INSERT INTO vespa_models (model_code, model_name) VALUES (?, ?)",
+                               ('T-MDL', 'Test Model'))
+            customer = cls.insert(
+                cursor, "INSERT INTO customers (customer_code, first_name, last_name, phone) VALUES (?, ?, ?, ?)",
+                ('T-CUST', 'Test', 'Müşteri', '5550000000')
+            )
+            vespa = cls.insert(
+                cursor, "INSERT INTO customer_vespas (customer_id, vespa_model_id, license_plate) VALUES (?, ?, ?)",
+                (customer, model, '34 TST 01')
+            )
+            connection.commit()
+        finally:
+            connection.close()
+        return {'store': cls.store, 'warehouse': cls.warehouse, 'part': cls.parts[0], 'vespa': vespa}
+
+    def stock_by_location(self):
+        rows = self.execute(
+            "SELECT storage_location_id, current_stock FROM part_stock_locations WHERE part_id = ?",
+            (self.seed['part'],)
+        )
+        return {location_id: stock for location_id, stock in rows}
+
+    def summary(self):
+        return tuple(self.execute(
+            "SELECT total_stock, available_stock, stock_status FROM part_stock_summary WHERE part_id = ?",
+            (self.seed['part'],)
+        )[0])
+
+    def movements(self, service_id):
+        rows = self.execute(
+            """
+            SELECT storage_location_id, movement_type, quantity FROM stock_movements
+            WHERE reference_type = 'SERVICE' AND reference_id = ? ORDER BY storage_location_id
+            """,
+            (service_id,)
+        )
+        return [tuple(row) for row in rows]
+
+    def test_create_then_update_moves_stock_once(self):
+        store, warehouse, part = self.seed['store'], self.seed['warehouse'], self.seed['part']
+        data = {
+            'customer_vespa_id': self.seed['vespa'],
+            'service_type': 'BAKIM',
+            'service_date': '2026-01-05',
+            'used_parts': [{'part_id': part, 'quantity': 5, 'cost': 50}],
+        }
+        service_id = create_service_record(data)['service_id']
+
+        # 5 taken: all 3 from the store, the remaining 2 from the warehouse
+        self.assertEqual(self.stock_by_location(), {store: 0, warehouse: 8})
+        self.assertEqual(self.summary(), (8, 8, 'NORMAL'))
+        self.assertEqual(self.movements(service_id), [(store, 'OUT', 3), (warehouse, 'OUT', 2)])
+
+        data['used_parts'] = [{'part_id': part, 'quantity': 2, 'cost': 20}]
+        update_service_record(service_id, data)
+
+        # The first allocation is given back before the new one is taken
+        self.assertEqual(self.stock_by_location(), {store: 1, warehouse: 10})
+        self.assertEqual(self.summary(), (11, 11, 'NORMAL'))
+        self.assertEqual(self.movements(service_id), [(store, 'OUT', 2)])
+
+    def test_failed_create_in_request_scope_leaves_no_header_row(self):
+        # First service save of the process: the work items table check runs as well
+        service_functions._SERVICE_TABLES_ENSURED = False
+        count = "SELECT COUNT(*) FROM service_records"
+        before = self.execute(count)[0][0]
+        data = {
+            'customer_vespa_id': self.seed['vespa'],
+            'service_type': 'BAKIM',
+            'service_date': '2026-01-05',
+            'used_parts': [{'part_id': self.seed['part'], 'quantity': 1000, 'cost': 50}],
+        }
+        with database.request_connection_scope():
+            with self.assertRaises(InsufficientStock):
+                create_service_record(data)
+        self.assertEqual(self.execute(count)[0][0], before)
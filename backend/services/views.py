@@ -5,6 +5,9 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
+from core.renderers import FAST_JSON_RENDERERS
+from core.pagination import InvalidCursor
+from core.reference_data import conditional_get
 from .service_functions import (
     get_all_service_records, get_service_by_id,
     create_service_record, update_service_status, add_service_parts,
@@ -23,29 +26,37 @@ from .work_type_functions import (
 
 class ServicesView(APIView):
     """Service records management"""
+    renderer_classes = FAST_JSON_RENDERERS
     
     def get(self, request):
-        """Get service records with filters"""
+        """Get service records with filters (keyset pages: pass next_cursor back as ?cursor=, ?with_total=1 for an approximate total)"""
         try:
-            limit = int(request.GET.get('limit', 100))
-            offset = int(request.GET.get('offset', 0))
+            limit = min(max(int(request.GET.get('limit', 100)), 1), 1000)
             status_filter = request.GET.get('status')
             customer_id = request.GET.get('customer_id')
             vespa_id = request.GET.get('vespa_id')
             
-            services = get_all_service_records(
+            page = get_all_service_records(
                 limit=limit,
-                offset=offset,
+                cursor_token=request.GET.get('cursor'),
                 status_filter=status_filter,
                 customer_id=int(customer_id) if customer_id else None,
                 vespa_id=int(vespa_id) if vespa_id else None,
+                with_total=request.GET.get('with_total') in ('1', 'true'),
             )
             
             return Response({
-                'services': services,
-                'count': len(services)
+                'services': page['services'],
+                'count': len(page['services']),
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more'],
+                'total': page['total']
             }, status=status.HTTP_200_OK)
             
+        except InvalidCursor as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 'error': f'Failed to get services: {str(e)}'
@@ -333,6 +344,7 @@ class WorkTypesView(APIView):
     """Work types (İşlem Türleri) management"""
     permission_classes = [AllowAny]
     
+    @conditional_get('work_types')
     def get(self, request):
         """Get all work types or search"""
         try:
@@ -503,6 +515,7 @@ class WorkTypesCategoriesView(APIView):
     """Work types grouped by categories"""
     permission_classes = [AllowAny]
     
+    @conditional_get('work_types')
     def get(self, request):
         """Get work types grouped by category"""
         try:
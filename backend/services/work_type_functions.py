@@ -4,47 +4,31 @@ MotoEtiler Vespa Servis Yönetim Sistemi
 """
 
 from core.database import DatabaseConnection
+from core.reference_data import bump_data_version
+from core.reference_registry import reference_registry
+
+
+def _work_type_dict(work_type):
+    return {
+        'id': work_type.id,
+        'name': work_type.name,
+        'base_price': float(work_type.base_price) if work_type.base_price else 0.0,
+        'description': work_type.description,
+        'category': work_type.category,
+        'estimated_duration': work_type.estimated_duration,
+        'is_active': bool(work_type.is_active),
+        'created_date': work_type.created_date.isoformat() if work_type.created_date else None,
+        'updated_date': work_type.updated_date.isoformat() if work_type.updated_date else None
+    }
 
 
 def get_work_types():
     """
-    Tüm aktif işlem türlerini getir
+    Tüm aktif işlem türlerini getir (süreç içi referans kayıt defterinden, kategori ve isim sırasıyla)
     Returns: List of work type dictionaries
     """
     try:
-        query = """
-        SELECT 
-            id,
-            name,
-            base_price,
-            description,
-            category,
-            estimated_duration,
-            is_active,
-            created_date,
-            updated_date
-        FROM work_types 
-        WHERE is_active = 1
-        ORDER BY category, name
-        """
-        
-        result = DatabaseConnection.execute_query(query)
-        
-        work_types = []
-        for row in result:
-            work_types.append({
-                'id': row['id'],
-                'name': row['name'],
-                'base_price': float(row['base_price']) if row['base_price'] else 0.0,
-                'description': row['description'],
-                'category': row['category'],
-                'estimated_duration': row['estimated_duration'],
-                'is_active': bool(row['is_active']),
-                'created_date': row['created_date'].isoformat() if row['created_date'] else None,
-                'updated_date': row['updated_date'].isoformat() if row['updated_date'] else None
-            })
-        
-        return work_types
+        return [_work_type_dict(work_type) for work_type in reference_registry.work_types.active()]
         
     except Exception as e:
         print(f"Error getting work types: {e}")
@@ -58,36 +42,9 @@ def get_work_type_by_id(work_type_id):
     Returns: Work type dictionary or None
     """
     try:
-        query = """
-        SELECT 
-            id,
-            name,
-            base_price,
-            description,
-            category,
-            estimated_duration,
-            is_active,
-            created_date,
-            updated_date
-        FROM work_types 
-        WHERE id = ? AND is_active = 1
-        """
-        
-        result = DatabaseConnection.execute_query(query, (work_type_id,))
-        
-        if result:
-            row = result[0]
-            return {
-                'id': row['id'],
-                'name': row['name'],
-                'base_price': float(row['base_price']) if row['base_price'] else 0.0,
-                'description': row['description'],
-                'category': row['category'],
-                'estimated_duration': row['estimated_duration'],
-                'is_active': bool(row['is_active']),
-                'created_date': row['created_date'].isoformat() if row['created_date'] else None,
-                'updated_date': row['updated_date'].isoformat() if row['updated_date'] else None
-            }
+        work_type = reference_registry.work_types.get(work_type_id)
+        if work_type is not None and work_type.is_active:
+            return _work_type_dict(work_type)
         
         return None
         
@@ -119,6 +76,7 @@ def create_work_type(name, base_price, description=None, category=None, estimate
             # Get the newly created ID
             id_query = "SELECT SCOPE_IDENTITY()"
             id_result = DatabaseConnection.execute_scalar(id_query)
+            bump_data_version('work_types')
             if id_result:
                 return int(id_result)
         
@@ -180,6 +138,8 @@ def update_work_type(work_type_id, name=None, base_price=None, description=None,
         """
         
         affected_rows = DatabaseConnection.execute_command(query, params)
+        if affected_rows > 0:
+            bump_data_version('work_types')
         return affected_rows > 0
         
     except Exception as e:
@@ -201,6 +161,8 @@ def delete_work_type(work_type_id):
         """
         
         affected_rows = DatabaseConnection.execute_command(query, (work_type_id,))
+        if affected_rows > 0:
+            bump_data_version('work_types')
         return affected_rows > 0
         
     except Exception as e: